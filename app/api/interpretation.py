@@ -5,10 +5,9 @@ import uuid
 from app.models.schemas import SkinDiagnosisResponse, SkinLesionRequest, ResponseFormat
 from app.services.analysis_store import analysis_store
 from app.services.interpretation_service import interpretation_service
-from app.core.image_utils import encode_image_to_base64, validate_image_file, get_image_info
+from app.core.image_upload import preprocess_upload
 from app.core.xml_utils import analysis_to_xml
 from app.core.diagnosis_parser import parse_diagnosis_xml
-from starlette.concurrency import run_in_threadpool
 import logging
 import json
 
@@ -65,6 +64,8 @@ async def interpret_skin(request: SkinLesionRequest):
             return Response(content=analysis_to_xml(stored.model_dump()), media_type="application/xml")
 
         return stored
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -94,9 +95,9 @@ async def interpret_skin_image(
     response_format: ResponseFormat = Form(ResponseFormat.JSON, description="응답 형식"),
 ):
     try:
-        validate_image_file(image)
-        image_info = await run_in_threadpool(get_image_info, image)
-        image_base64 = await run_in_threadpool(encode_image_to_base64, image)
+        preprocessed = await preprocess_upload(image, interpretation_service.provider.image_profile)
+        image_info = preprocessed["image_info"]
+        image_data_url = preprocessed["image_data_url"]
 
         parsed_questionnaire = None
         if questionnaire_data:
@@ -106,16 +107,18 @@ async def interpret_skin_image(
                 logger.warning(f"설문조사 데이터 파싱 실패: {questionnaire_data}")
 
         result = await interpretation_service.diagnose_image(
-            image_base64=image_base64,
+            image_base64=image_data_url,
             additional_info=additional_info,
             questionnaire_data=parsed_questionnaire,
+            image_hash=preprocessed["image_hash"],
+            image_phash=preprocessed["image_phash"],
         )
 
         # merge metadata
         meta = result.get("metadata", {})
         meta.update({
             "image_info": image_info,
-            "image_size_kb": round(len(image_base64) * 0.75 / 1024, 2),
+            "image_size_kb": round(image_info["encoding"]["bytes"] / 1024, 2),
             "questionnaire_included": bool(parsed_questionnaire),
         })
 
@@ -137,6 +140,8 @@ async def interpret_skin_image(
             return Response(content=analysis_to_xml(stored.model_dump()), media_type="application/xml")
 
         return stored
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
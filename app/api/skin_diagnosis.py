@@ -1,14 +1,23 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from fastapi.responses import Response
-from typing import Optional
+from fastapi.responses import Response, StreamingResponse
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
 import uuid
+import orjson
 from app.models.schemas import SkinDiagnosisResponse, SkinLesionRequest, ResponseFormat
-from app.services.langchain_service import langchain_service
+from app.services.langchain_service import DiagnosisStream, langchain_service
 from app.services.analysis_store import analysis_store
+from app.services.diagnosis_cache import diagnosis_cache
 from app.core.xml_utils import analysis_to_xml
-from app.core.image_utils import encode_image_to_base64, validate_image_file, get_image_info
+from app.core.diagnosis_parser import IncrementalDiagnosisParser
+from app.core.generation_governor import generation_governor
+from app.core.hedging import request_hedger
+from app.core.provider_limits import provider_limiter
+from app.core.provider_router import IMAGE_ROUTE, provider_router
+from app.core.rate_limits import openai_rate_scheduler
+from app.core.single_flight import llm_flights
+from app.core.image_profile import ImageProfile
+from app.core.image_upload import preprocess_mosaic_upload, preprocess_upload
 import logging
-from starlette.concurrency import run_in_threadpool
 import re
 import xml.etree.ElementTree as ET
 
@@ -100,6 +109,112 @@ def parse_diagnosis_xml(xml_response: str) -> dict:
             "similar_conditions": None
         }
 
+def _save_diagnosis(diagnosis_result: dict) -> SkinDiagnosisResponse:
+    """진단 결과를 SkinDiagnosisResponse로 변환/저장하고 병원·챗봇 백엔드에 전달"""
+    # ID 추가
+    diagnosis_result["id"] = f"skin_diagnosis_{uuid.uuid4().hex[:8]}"
+    
+    # XML 응답 파싱
+    raw_result = diagnosis_result.get("result", "진단 결과 없음")
+    parsed_data = parse_diagnosis_xml(raw_result)
+    
+    # SkinDiagnosisResponse 형식에 맞게 변환
+    formatted_result = {
+        "id": diagnosis_result["id"],
+        "diagnosis": parsed_data["diagnosis"],
+        "confidence_score": parsed_data["confidence_score"],
+        "recommendations": parsed_data["recommendations"],
+        "similar_conditions": parsed_data["similar_conditions"],
+        "metadata": {
+            **diagnosis_result.get("metadata", {}),
+            "similar_diseases_scored": parsed_data.get("similar_diseases_scored", [])
+        },
+        "created_at": diagnosis_result.get("created_at")
+    }
+    
+    # 결과 저장
+    stored_diagnosis = analysis_store.create_diagnosis(formatted_result)
+    
+    # 🚀 3개 서비스에 동시 전송 (백그라운드)
+    from app.services.hospital_service import hospital_service
+    from app.services.chatbot_service import chatbot_service
+    
+    # 1. 병원 백엔드에 병원 검색 요청 (백그라운드)
+    hospital_service.search_hospitals_fire_and_forget(
+        diagnosis=parsed_data["diagnosis"],
+        description=parsed_data.get("recommendations", ""),
+        similar_diseases=[]  # 주 진단명만 사용
+    )
+    
+    # 2. 챗봇 백엔드에 진단 결과 전송 (백그라운드)
+    chatbot_service.notify_diagnosis_fire_and_forget(
+        stored_diagnosis.model_dump()
+    )
+    
+    return stored_diagnosis
+
+def _store_diagnosis(diagnosis_result: dict, response_format: ResponseFormat):
+    """진단 결과를 저장하고 응답 형식에 맞춰 반환"""
+    stored_diagnosis = _save_diagnosis(diagnosis_result)
+    
+    # 응답 형식에 따라 반환
+    if response_format == ResponseFormat.XML:
+        xml_response = analysis_to_xml(stored_diagnosis.model_dump())
+        return Response(
+            content=xml_response,
+            media_type="application/xml"
+        )
+    
+    return stored_diagnosis
+
+def _reprocess_upload(images: List[UploadFile], mosaic: bool = False) -> Callable[[ImageProfile], Awaitable[Dict[str, Any]]]:
+    """같은 업로드를 다른 프로바이더 프로파일로 다시 전처리하는 함수 (헤지 프로바이더 입력용)
+
+    업로드 파일은 응답이 끝날 때까지 남아 있으므로 처음부터 다시 읽음
+    """
+    async def reprocess(profile: ImageProfile) -> Dict[str, Any]:
+        for image in images:
+            await image.seek(0)
+        if mosaic:
+            return await preprocess_mosaic_upload(images, profile)
+        return await preprocess_upload(images[0], profile)
+    
+    return reprocess
+
+def _sse(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+async def _diagnosis_events(
+    stream: DiagnosisStream, extra_metadata: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[bytes]:
+    """프로바이더 토큰을 점진 파싱해 label → summary 조각 → similar_label → result 순으로 SSE 전송
+
+    result 이벤트는 일반 엔드포인트 JSON 응답과 같은 저장된 SkinDiagnosisResponse
+    """
+    parser = IncrementalDiagnosisParser()
+    try:
+        async for chunk in stream:
+            for event, data in parser.feed(chunk):
+                yield _sse(event, data)
+        
+        diagnosis_result = stream.result
+        if extra_metadata:
+            diagnosis_result["metadata"].update(extra_metadata)
+        stored_diagnosis = _save_diagnosis(diagnosis_result)
+        yield _sse("result", stored_diagnosis.model_dump(mode="json"))
+    except Exception as e:
+        # 스트림이 이미 시작되어 상태 코드를 바꿀 수 없으므로 error 이벤트로 전달 (HTTPException과 같은 detail)
+        logger.error(f"스트리밍 진단 중 오류: {e}", exc_info=True)
+        yield _sse("error", {"detail": e.detail if isinstance(e, HTTPException) else str(e)})
+
+def _event_stream_response(events: AsyncIterator[bytes]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        # 프록시 버퍼링 비활성화 (nginx)
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/skin-lesion", 
     response_model=SkinDiagnosisResponse,
     summary="텍스트 기반 피부 병변 진단",
@@ -123,56 +238,10 @@ async def diagnose_skin_lesion(request: SkinLesionRequest):
             additional_info=None  # 설문/추가정보 미주입
         )
         
-        # ID 추가
-        diagnosis_result["id"] = f"skin_diagnosis_{uuid.uuid4().hex[:8]}"
-        
-        # XML 응답 파싱
-        raw_result = diagnosis_result.get("result", "진단 결과 없음")
-        parsed_data = parse_diagnosis_xml(raw_result)
-        
-        # SkinDiagnosisResponse 형식에 맞게 변환
-        formatted_result = {
-            "id": diagnosis_result["id"],
-            "diagnosis": parsed_data["diagnosis"],
-            "confidence_score": parsed_data["confidence_score"],
-            "recommendations": parsed_data["recommendations"],
-            "similar_conditions": parsed_data["similar_conditions"],
-            "metadata": {
-                **diagnosis_result.get("metadata", {}),
-                "similar_diseases_scored": parsed_data.get("similar_diseases_scored", [])
-            },
-            "created_at": diagnosis_result.get("created_at")
-        }
-        
-        # 결과 저장
-        stored_diagnosis = analysis_store.create_diagnosis(formatted_result)
-        
-        # 🚀 3개 서비스에 동시 전송 (백그라운드)
-        from app.services.hospital_service import hospital_service
-        from app.services.chatbot_service import chatbot_service
-        
-        # 1. 병원 백엔드에 병원 검색 요청 (백그라운드)
-        hospital_service.search_hospitals_fire_and_forget(
-            diagnosis=parsed_data["diagnosis"],
-            description=parsed_data.get("recommendations", ""),
-            similar_diseases=[]  # 주 진단명만 사용
-        )
-        
-        # 2. 챗봇 백엔드에 진단 결과 전송 (백그라운드)
-        chatbot_service.notify_diagnosis_fire_and_forget(
-            stored_diagnosis.model_dump()
-        )
-        
-        # 응답 형식에 따라 반환
-        if request.response_format == ResponseFormat.XML:
-            xml_response = analysis_to_xml(stored_diagnosis.model_dump())
-            return Response(
-                content=xml_response,
-                media_type="application/xml"
-            )
-        
-        return stored_diagnosis
+        return _store_diagnosis(diagnosis_result, request.response_format)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -184,7 +253,8 @@ async def diagnose_skin_lesion(request: SkinLesionRequest):
     **지원 이미지 형식:**
     - JPEG, PNG, WebP 파일
     - 최대 파일 크기: 10MB
-    - 자동 리사이징: 1024x1024 최대
+    - 자동 리사이징: 진단 프로바이더 프로파일 기준 (OpenAI 512px, RunPod 1024px)
+    - 품질 게이트: 흐림/노출/병변 크기 점수를 메타데이터에 기록 (reject 모드에서는 422 반환)
     
     **추가 기능:**
     - 설문조사 데이터 포함 가능
@@ -201,14 +271,12 @@ async def diagnose_skin_lesion_with_image(
 ):
     """이미지 기반 피부 병변 진단"""
     try:
-        # 이미지 파일 유효성 검사
-        validate_image_file(image)
-        
-        # 이미지 정보 추출 (thread offload)
-        image_info = await run_in_threadpool(get_image_info, image)
-        
-        # 이미지를 base64로 인코딩 (thread offload)
-        image_base64 = await run_in_threadpool(encode_image_to_base64, image)
+        # 전처리 프로파일과 진단 호출이 같은 라우팅 결정을 따르도록 프로바이더를 먼저 고름
+        provider_name, provider = langchain_service.route(IMAGE_ROUTE, claim=False)
+        # 업로드 검증(매직 바이트/크기) + 이미지 정보 추출 + base64 인코딩 (이미지 워커 풀)
+        preprocessed = await preprocess_upload(image, provider.image_profile)
+        image_info = preprocessed["image_info"]
+        image_data_url = preprocessed["image_data_url"]
         
         # 설문조사 데이터 파싱
         parsed_questionnaire = None
@@ -221,70 +289,202 @@ async def diagnose_skin_lesion_with_image(
         
         # OpenAI Vision API를 통한 진단
         diagnosis_result = await langchain_service.diagnose_skin_lesion_with_image(
-            image_base64=image_base64,
+            image_base64=image_data_url,
             additional_info=None,
-            questionnaire_data=None  # 설문/추가정보 미주입
+            questionnaire_data=None,  # 설문/추가정보 미주입
+            image_hash=preprocessed["image_hash"],
+            image_phash=preprocessed["image_phash"],
+            provider_name=provider_name,
+            image_for_profile=_reprocess_upload([image])
         )
         
         # 이미지 정보를 메타데이터에 추가
         diagnosis_result["metadata"].update({
             "image_info": image_info,
-            "image_size_kb": round(len(image_base64) * 0.75 / 1024, 2),  # base64 크기 추정
+            "image_size_kb": round(image_info["encoding"]["bytes"] / 1024, 2),
             "questionnaire_included": False
         })
         
-        # ID 추가
-        diagnosis_result["id"] = f"skin_diagnosis_{uuid.uuid4().hex[:8]}"
-        
-        # XML 응답 파싱
-        raw_result = diagnosis_result.get("result", "진단 결과 없음")
-        parsed_data = parse_diagnosis_xml(raw_result)
-        
-        # SkinDiagnosisResponse 형식에 맞게 변환
-        formatted_result = {
-            "id": diagnosis_result["id"],
-            "diagnosis": parsed_data["diagnosis"],
-            "confidence_score": parsed_data["confidence_score"],
-            "recommendations": parsed_data["recommendations"],
-            "similar_conditions": parsed_data["similar_conditions"],
-            "metadata": {
-                **diagnosis_result.get("metadata", {}),
-                "similar_diseases_scored": parsed_data.get("similar_diseases_scored", [])
-            },
-            "created_at": diagnosis_result.get("created_at")
-        }
+        return _store_diagnosis(diagnosis_result, response_format)
         
-        # 결과 저장
-        stored_diagnosis = analysis_store.create_diagnosis(formatted_result)
-        
-        # 🚀 3개 서비스에 동시 전송 (백그라운드)
-        from app.services.hospital_service import hospital_service
-        from app.services.chatbot_service import chatbot_service
-        
-        # 1. 병원 백엔드에 병원 검색 요청 (백그라운드)
-        hospital_service.search_hospitals_fire_and_forget(
-            diagnosis=parsed_data["diagnosis"],
-            description=parsed_data.get("recommendations", ""),
-            similar_diseases=[]  # 주 진단명만 사용
+    except HTTPException:
+        # HTTPException은 그대로 re-raise
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/skin-lesion/stream",
+    summary="텍스트 기반 피부 병변 진단 (SSE 스트리밍)",
+    description="""`/diagnose/skin-lesion`과 같은 진단을 Server-Sent Events로 점진 전송합니다.
+    
+    **이벤트 순서:**
+    - `label`: 주 진단명/점수 (모델 출력의 첫 요소가 완성되는 즉시)
+    - `summary`: 진단소견 텍스트 조각 (여러 번)
+    - `similar_label`: 유사 질병 (항목마다)
+    - `result`: 저장된 최종 진단 결과 (`SkinDiagnosisResponse`)
+    - `error`: 스트리밍 도중 오류 발생 시
+    """,
+    response_description="text/event-stream"
+)
+async def diagnose_skin_lesion_stream(request: SkinLesionRequest):
+    """텍스트 기반 피부 병변 진단 (SSE)"""
+    try:
+        # 라우팅/동시 호출 슬롯은 응답 시작 전에 처리 (과부하 503 등은 SSE error 이벤트가 아닌 HTTP 상태 코드로 반환)
+        stream = await langchain_service.stream_skin_lesion_diagnosis(
+            lesion_description=request.lesion_description,
+            additional_info=None  # 설문/추가정보 미주입
         )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    # 응답 시작 후 오류는 SSE error 이벤트로 전달
+    return _event_stream_response(_diagnosis_events(stream))
+
+
+@router.post("/skin-lesion-image/stream",
+    summary="이미지 기반 피부 병변 진단 (SSE 스트리밍)",
+    description="""`/diagnose/skin-lesion-image`와 같은 진단을 Server-Sent Events로 점진 전송합니다.
+    
+    업로드 검증/전처리 오류는 스트림 시작 전 일반 HTTP 오류(400/413/415/422)로 반환되며,
+    이벤트 형식은 `/diagnose/skin-lesion/stream`과 같습니다. 캐시 히트 시 모든 이벤트가 즉시 전송됩니다.
+    """,
+    response_description="text/event-stream"
+)
+async def diagnose_skin_lesion_with_image_stream(
+    image: UploadFile = File(..., description="피부 병변 이미지 파일 (JPEG, PNG, WebP, 최대 10MB)"),
+):
+    """이미지 기반 피부 병변 진단 (SSE)"""
+    try:
+        provider_name, provider = langchain_service.route(IMAGE_ROUTE, claim=False)
+        preprocessed = await preprocess_upload(image, provider.image_profile)
+        image_info = preprocessed["image_info"]
         
-        # 2. 챗봇 백엔드에 진단 결과 전송 (백그라운드)
-        chatbot_service.notify_diagnosis_fire_and_forget(
-            stored_diagnosis.model_dump()
+        stream = await langchain_service.stream_skin_lesion_diagnosis_with_image(
+            image_base64=preprocessed["image_data_url"],
+            additional_info=None,
+            questionnaire_data=None,  # 설문/추가정보 미주입
+            image_hash=preprocessed["image_hash"],
+            image_phash=preprocessed["image_phash"],
+            provider_name=provider_name
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return _event_stream_response(_diagnosis_events(stream, {
+        "image_info": image_info,
+        "image_size_kb": round(image_info["encoding"]["bytes"] / 1024, 2),
+        "questionnaire_included": False
+    }))
+
+
+@router.post("/skin-lesion-images",
+    response_model=SkinDiagnosisResponse,
+    summary="다중 이미지 기반 피부 병변 진단",
+    description="""같은 병변을 찍은 사진 2~4장(근접/원거리 등)을 업로드하여 한 번의 Vision 호출로 진단합니다.
+    
+    **처리 방식:**
+    - 사진마다 번호 라벨을 붙여 모자이크 한 장으로 합성 (2장: 1x2, 3~4장: 2x2)
+    - 모자이크 전체를 진단 프로바이더 해상도 프로파일 안에 맞춤
+    - 사진 수와 관계없이 프로바이더 호출 1회
+    
+    **지원 이미지 형식:** JPEG, PNG, WebP (장당 최대 10MB)
+    """,
+    response_description="모자이크 분석 결과와 사진별 메타데이터 포함"
+)
+async def diagnose_skin_lesion_with_images(
+    images: List[UploadFile] = File(..., description="같은 병변의 이미지 파일 2~4장"),
+    response_format: ResponseFormat = Form(ResponseFormat.JSON, description="응답 형식 (json 또는 xml)")
+):
+    """다중 이미지(모자이크) 기반 피부 병변 진단"""
+    try:
+        provider_name, provider = langchain_service.route(IMAGE_ROUTE, claim=False)
+        preprocessed = await preprocess_mosaic_upload(images, provider.image_profile)
+        image_info = preprocessed["image_info"]
+        
+        # 모자이크 구성을 모델에 알려 사진 번호별 관찰을 종합하도록 함
+        mosaic_note = (
+            f"첨부 이미지는 같은 병변을 촬영한 사진 {len(image_info['tiles'])}장을 "
+            f"번호 라벨과 함께 {image_info['layout']} 격자로 배치한 것입니다. 모든 사진을 종합하여 하나의 진단을 내려주세요."
+        )
+        diagnosis_result = await langchain_service.diagnose_skin_lesion_with_image(
+            image_base64=preprocessed["image_data_url"],
+            additional_info=mosaic_note,
+            questionnaire_data=None,
+            image_hash=preprocessed["image_hash"],
+            image_phash=preprocessed["image_phash"],
+            provider_name=provider_name,
+            image_for_profile=_reprocess_upload(images, mosaic=True)
         )
         
-        # 응답 형식에 따라 반환
-        if response_format == ResponseFormat.XML:
-            xml_response = analysis_to_xml(stored_diagnosis.model_dump())
-            return Response(
-                content=xml_response,
-                media_type="application/xml"
-            )
+        diagnosis_result["metadata"].update({
+            "image_info": image_info,
+            "image_count": len(image_info["tiles"]),
+            "image_size_kb": round(image_info["encoding"]["bytes"] / 1024, 2),
+            "questionnaire_included": False
+        })
         
-        return stored_diagnosis
+        return _store_diagnosis(diagnosis_result, response_format)
         
     except HTTPException:
-        # HTTPException은 그대로 re-raise
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache/stats",
+    summary="이미지 진단 결과 캐시 통계",
+    description="이미지 진단 결과 캐시의 히트/미스, 크기, 진행 중 요청 수를 반환합니다."
+)
+async def diagnosis_cache_stats():
+    return diagnosis_cache.stats()
+
+
+@router.get("/generation/stats",
+    summary="진단 생성 출력 토큰 통계",
+    description="엔드포인트별 출력 토큰 분포(p50/p99/최대), 산정된 max_tokens 예산, 예산에 걸려 잘린 응답 수를 반환합니다."
+)
+async def generation_stats():
+    return generation_governor.stats()
+
+
+@router.get("/single-flight/stats",
+    summary="동시 LLM 호출 합치기 통계",
+    description="진행 중인 합쳐진 호출 수와 대기 요청 수, 첫 호출/합류/취소 누적 횟수를 반환합니다."
+)
+async def single_flight_stats():
+    return llm_flights.stats()
+
+
+@router.get("/hedge/stats",
+    summary="헤지 요청 통계",
+    description="엔드포인트별 헤지 요청 비율, 주/보조 프로바이더 채택 횟수, 현재 헤지 지연을 반환합니다."
+)
+async def hedge_stats():
+    return request_hedger.stats()
+
+
+@router.get("/router/stats",
+    summary="진단 프로바이더 라우터 상태",
+    description="경로(text/image)별 프로바이더의 서킷 상태(closed/open/half_open), EWMA 응답 시간/오류율, 실패/타임아웃/라우팅 횟수를 반환합니다."
+)
+async def provider_router_stats():
+    return provider_router.stats()
+
+
+@router.get("/concurrency/stats",
+    summary="프로바이더 동시 호출 제한 통계",
+    description="프로바이더별 동시 호출 상한/처리 중 호출 수, 대기열 깊이, 대기 시간(p50/p95/최대), 대기열 초과·대기 시간 초과로 거절(503)된 횟수를 반환합니다."
+)
+async def provider_concurrency_stats():
+    return provider_limiter.stats()
+
+
+@router.get("/openai-rate/stats",
+    summary="OpenAI 요청 한도 스케줄러 통계",
+    description="학습/설정된 RPM·TPM 한도와 현재 버킷 잔량, 429 보류 남은 시간, 한도 때문에 대기한 요청 수와 대기 시간을 반환합니다."
+)
+async def openai_rate_stats():
+    return openai_rate_scheduler.stats()
@@ -35,6 +35,8 @@ async def refine_utterance(body: UtteranceRefineRequest):
     try:
         result = await refiner_service.refine(text=body.text, language=body.language)
         return UtteranceRefineResponse(**result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
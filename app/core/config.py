@@ -14,6 +14,86 @@ class Settings(BaseSettings):
     TEMPERATURE: float = float(os.getenv("TEMPERATURE", "0.3"))
     LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
     LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+    # LLM HTTP 커넥션 풀 (프로세스 전역 공유, base_url별 keep-alive)
+    LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+    LLM_HTTP_MAX_KEEPALIVE: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+    LLM_HTTP2: bool = os.getenv("LLM_HTTP2", "true").lower() == "true"
+    # LLM 호출 경로: langchain | direct (LangChain 없이 chat/completions에 미리 만든 요청 본문으로 직접 POST)
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "langchain")
+    # 진단 생성 출력 관리: </root> 중단 시퀀스, 엔드포인트별 관측 p99 × 여유율로 max_tokens 예산 산정
+    GENERATION_STOP_AT_ROOT: bool = os.getenv("GENERATION_STOP_AT_ROOT", "true").lower() == "true"
+    GENERATION_BUDGET_ADAPTIVE: bool = os.getenv("GENERATION_BUDGET_ADAPTIVE", "true").lower() == "true"
+    GENERATION_BUDGET_HEADROOM: float = float(os.getenv("GENERATION_BUDGET_HEADROOM", "1.25"))
+    GENERATION_BUDGET_MIN_SAMPLES: int = int(os.getenv("GENERATION_BUDGET_MIN_SAMPLES", "50"))
+    GENERATION_BUDGET_WINDOW: int = int(os.getenv("GENERATION_BUDGET_WINDOW", "1000"))
+    GENERATION_BUDGET_FLOOR: int = int(os.getenv("GENERATION_BUDGET_FLOOR", "128"))
+    # 동일 입력의 동시 LLM 호출(진단/정제)을 하나로 합침 (재시도/중복 제출 시 프로바이더 부하 감소)
+    SINGLE_FLIGHT_ENABLED: bool = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+    # 헤지 요청: 주 진단 프로바이더가 지연(HEDGE_DELAY초, 0이면 관측 응답 시간 p9x)까지 응답하지 않으면
+    # 다른 프로바이더(runpod↔openai)로 같은 요청을 보내 먼저 온 유효 응답 채택 (기본 비활성)
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_DELAY: float = float(os.getenv("HEDGE_DELAY", "0"))
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_WINDOW: int = int(os.getenv("HEDGE_WINDOW", "500"))
+    HEDGE_INITIAL_DELAY: float = float(os.getenv("HEDGE_INITIAL_DELAY", "10"))
+    HEDGE_MIN_DELAY: float = float(os.getenv("HEDGE_MIN_DELAY", "1"))
+    # 진단 프로바이더 라우팅: 프로바이더별 EWMA 응답 시간/오류율 추적, 연속 실패·높은 오류율이면 서킷 open 후
+    # OPEN_SECONDS 뒤 시험 요청, 설정된 프로바이더가 차단되거나 LATENCY_RATIO배 느리면 다른 프로바이더로 (0이면 응답 시간 기준 이동 안 함)
+    PROVIDER_ROUTER_ENABLED: bool = os.getenv("PROVIDER_ROUTER_ENABLED", "true").lower() == "true"
+    PROVIDER_ROUTER_EWMA_ALPHA: float = float(os.getenv("PROVIDER_ROUTER_EWMA_ALPHA", "0.2"))
+    PROVIDER_ROUTER_FAILURE_THRESHOLD: int = int(os.getenv("PROVIDER_ROUTER_FAILURE_THRESHOLD", "5"))
+    PROVIDER_ROUTER_ERROR_RATE: float = float(os.getenv("PROVIDER_ROUTER_ERROR_RATE", "0.5"))
+    PROVIDER_ROUTER_MIN_SAMPLES: int = int(os.getenv("PROVIDER_ROUTER_MIN_SAMPLES", "10"))
+    PROVIDER_ROUTER_OPEN_SECONDS: float = float(os.getenv("PROVIDER_ROUTER_OPEN_SECONDS", "30"))
+    PROVIDER_ROUTER_LATENCY_RATIO: float = float(os.getenv("PROVIDER_ROUTER_LATENCY_RATIO", "3.0"))
+    PROVIDER_ROUTER_PROBE_RATIO: float = float(os.getenv("PROVIDER_ROUTER_PROBE_RATIO", "0.1"))
+    # 프로바이더별 동시 LLM 호출 상한(0이면 제한 없음)과 대기열: 대기열이 가득 차거나
+    # PROVIDER_QUEUE_TIMEOUT초 안에 차례가 오지 않으면 즉시 503 + Retry-After
+    PROVIDER_CONCURRENCY_RUNPOD: int = int(os.getenv("PROVIDER_CONCURRENCY_RUNPOD", "16"))
+    PROVIDER_CONCURRENCY_OPENAI: int = int(os.getenv("PROVIDER_CONCURRENCY_OPENAI", "32"))
+    PROVIDER_QUEUE_SIZE: int = int(os.getenv("PROVIDER_QUEUE_SIZE", "64"))
+    PROVIDER_QUEUE_TIMEOUT: float = float(os.getenv("PROVIDER_QUEUE_TIMEOUT", "10"))
+    # OpenAI 분당 요청/토큰 한도 스케줄러: 요청 비용을 미리 추정해 RPM/TPM 버킷이 찰 때까지 대기 후 전송
+    # (0이면 응답의 x-ratelimit-* 헤더에서 한도 학습), 대기는 최대 OPENAI_RATE_MAX_WAIT초
+    OPENAI_RATE_LIMIT_ENABLED: bool = os.getenv("OPENAI_RATE_LIMIT_ENABLED", "true").lower() == "true"
+    OPENAI_RPM: int = int(os.getenv("OPENAI_RPM", "0"))
+    OPENAI_TPM: int = int(os.getenv("OPENAI_TPM", "0"))
+    OPENAI_RATE_MAX_WAIT: float = float(os.getenv("OPENAI_RATE_MAX_WAIT", "20"))
+    # 진단 사용자 프롬프트 컴파일: 시스템 프롬프트와 중복되는 XML 스키마 생략 여부, 로컬 토큰 수 계산 인코딩
+    PROMPT_DROP_SCHEMA: bool = os.getenv("PROMPT_DROP_SCHEMA", "false").lower() == "true"
+    PROMPT_TOKENIZER: str = os.getenv("PROMPT_TOKENIZER", "o200k_base")
+    # 기동 워밍업: none | connect(프로바이더 커넥션 미리 열기) | request(프로바이더별 짧은 진단 1회, 스텁용)
+    WARMUP_MODE: str = os.getenv("WARMUP_MODE", "connect")
+    WARMUP_TIMEOUT: float = float(os.getenv("WARMUP_TIMEOUT", "10"))
+    # 이미지 업로드 최대 크기 (바이트)
+    IMAGE_MAX_UPLOAD_BYTES: int = int(os.getenv("IMAGE_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+    # 이미지 전처리: 디코딩 전 픽셀 수 상한 (decompression bomb 방지)
+    IMAGE_MAX_PIXELS: int = int(os.getenv("IMAGE_MAX_PIXELS", "60000000"))
+    # 이미지 인코딩 바이트 예산 (0이면 프로파일 고정 품질 사용)
+    IMAGE_BYTE_BUDGET: int = int(os.getenv("IMAGE_BYTE_BUDGET", "0"))
+    IMAGE_ENCODER_TRY_WEBP: bool = os.getenv("IMAGE_ENCODER_TRY_WEBP", "false").lower() == "true"
+    # 이미지 전처리 프로세스 풀 (0이면 스레드풀 사용)
+    IMAGE_WORKER_PROCESSES: int = int(os.getenv("IMAGE_WORKER_PROCESSES", "2"))
+    IMAGE_WORKER_QUEUE_SIZE: int = int(os.getenv("IMAGE_WORKER_QUEUE_SIZE", "16"))
+    IMAGE_WORKER_TIMEOUT: float = float(os.getenv("IMAGE_WORKER_TIMEOUT", "10"))
+    IMAGE_WORKER_MAX_TASKS_PER_CHILD: int = int(os.getenv("IMAGE_WORKER_MAX_TASKS_PER_CHILD", "200"))
+    # 이미지 진단 결과 캐시 (LRU + TTL)
+    DIAGNOSIS_CACHE_ENABLED: bool = os.getenv("DIAGNOSIS_CACHE_ENABLED", "true").lower() == "true"
+    DIAGNOSIS_CACHE_MAX_ENTRIES: int = int(os.getenv("DIAGNOSIS_CACHE_MAX_ENTRIES", "512"))
+    DIAGNOSIS_CACHE_TTL: float = float(os.getenv("DIAGNOSIS_CACHE_TTL", "1800"))
+    # 근접 중복 이미지 재사용 (perceptual hash 해밍 거리 기준, 기본 비활성)
+    IMAGE_NEAR_DUPLICATE_ENABLED: bool = os.getenv("IMAGE_NEAR_DUPLICATE_ENABLED", "false").lower() == "true"
+    IMAGE_NEAR_DUPLICATE_MAX_DISTANCE: int = int(os.getenv("IMAGE_NEAR_DUPLICATE_MAX_DISTANCE", "6"))
+    # 병변 영역(ROI) 자동 크롭 (기본 비활성, margin은 박스 긴 변 대비 여백 비율)
+    IMAGE_ROI_CROP_ENABLED: bool = os.getenv("IMAGE_ROI_CROP_ENABLED", "false").lower() == "true"
+    IMAGE_ROI_MARGIN: float = float(os.getenv("IMAGE_ROI_MARGIN", "0.25"))
+    # 이미지 품질 게이트: off | annotate(메타데이터에 점수 기록) | reject(품질 미달 시 422)
+    IMAGE_QUALITY_GATE: str = os.getenv("IMAGE_QUALITY_GATE", "annotate")
+    IMAGE_QUALITY_MIN_SHARPNESS: float = float(os.getenv("IMAGE_QUALITY_MIN_SHARPNESS", "5.0"))
+    IMAGE_QUALITY_MAX_CLIPPED_RATIO: float = float(os.getenv("IMAGE_QUALITY_MAX_CLIPPED_RATIO", "0.3"))
+    IMAGE_QUALITY_MIN_LESION_PX: int = int(os.getenv("IMAGE_QUALITY_MIN_LESION_PX", "64"))
     # CORS 추가 허용(콤마구분)
     ALLOWED_ORIGINS: str = os.getenv("ALLOWED_ORIGINS", "")
 
@@ -1,10 +1,15 @@
 import logging
 import re
 import xml.etree.ElementTree as ET
-from typing import Dict, Optional
+from html import unescape
+from typing import Any, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 XML_ROOT_PATTERN = re.compile(r'<root>.*?</root>', re.DOTALL)
+# 스트리밍 파서: 완결된 label/similar_label 요소 또는 summary 시작 태그
+STREAM_ELEMENT_PATTERN = re.compile(r'<(label|similar_label)\b([^>]*)>(.*?)</\1\s*>|<summary\s*>', re.DOTALL)
+XML_ATTR_PATTERN = re.compile(r'([\w:-]+)\s*=\s*"([^"]*)"')
+SUMMARY_END = "</summary>"
 
 
 def parse_diagnosis_xml(xml_response: str) -> Dict[str, Optional[str]]:
@@ -69,3 +74,102 @@ def parse_diagnosis_xml(xml_response: str) -> Dict[str, Optional[str]]:
             "similar_conditions": None,
         }
 
+
+
+def is_valid_diagnosis_xml(xml_response: Any) -> bool:
+    """<root> 문서가 있고 XML로 파싱되며 label 요소가 있는 응답인지"""
+    if not isinstance(xml_response, str):
+        return False
+    xml_match = XML_ROOT_PATTERN.search(xml_response)
+    if not xml_match:
+        return False
+    try:
+        return ET.fromstring(xml_match.group(0)).find('label') is not None
+    except ET.ParseError:
+        return False
+
+
+def _score(attrib: Dict[str, str]) -> Optional[float]:
+    try:
+        return float(attrib["score"])
+    except (KeyError, ValueError):
+        return None
+
+
+class IncrementalDiagnosisParser:
+    """토큰 단위로 들어오는 진단 XML을 점진적으로 파싱 (SSE 스트리밍용)
+
+    feed()마다 새로 확정된 이벤트 목록을 반환:
+    - ("label", {"diagnosis", "id_code", "score", "confidence_score"}): 주 진단 (</label> 수신 시)
+    - ("summary", {"text"}): 진단소견 텍스트 조각 (태그/엔티티가 잘리지 않은 부분까지만)
+    - ("similar_label", {"name", "id_code", "score"}): 유사 질병 (</similar_label> 수신 시)
+    최종 결과는 기존과 같이 전체 텍스트를 parse_diagnosis_xml로 파싱 (스트리밍 이벤트는 미리보기)
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._in_summary = False
+        self._label_seen = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Dict[str, Any]]]:
+        self._buffer += chunk
+        events: List[Tuple[str, Dict[str, Any]]] = []
+        pos = 0
+        while True:
+            if self._in_summary:
+                end = self._buffer.find(SUMMARY_END, pos)
+                if end == -1:
+                    pos = self._summary_text(pos, events)
+                    break
+                self._emit_summary(self._buffer[pos:end], events)
+                pos = end + len(SUMMARY_END)
+                self._in_summary = False
+                continue
+
+            match = STREAM_ELEMENT_PATTERN.search(self._buffer, pos)
+            if match is None:
+                # 아직 닫히지 않은 요소(또는 잘린 태그) 시작부터만 보관
+                start = max(self._buffer.rfind("<label", pos), self._buffer.rfind("<similar_label", pos))
+                if start == -1:
+                    start = self._buffer.rfind("<", pos)
+                pos = start if start != -1 else len(self._buffer)
+                break
+            pos = match.end()
+            tag = match.group(1)
+            if tag is None:
+                self._in_summary = True
+                continue
+
+            attrib = dict(XML_ATTR_PATTERN.findall(match.group(2)))
+            text = unescape(match.group(3)).strip()
+            score = _score(attrib)
+            if tag == "label" and not self._label_seen:
+                self._label_seen = True
+                events.append(("label", {
+                    "diagnosis": text,
+                    "id_code": attrib.get("id_code"),
+                    "score": score,
+                    "confidence_score": score / 100.0 if score is not None else None,
+                }))
+            elif tag == "similar_label" and text:
+                events.append(("similar_label", {"name": text, "id_code": attrib.get("id_code"), "score": score}))
+
+        self._buffer = self._buffer[pos:]
+        return events
+
+    def _summary_text(self, pos: int, events: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """닫는 태그/엔티티 일부일 수 있는 꼬리를 남기고 summary 텍스트 방출, 새 위치 반환"""
+        safe = len(self._buffer)
+        lt = self._buffer.rfind("<", pos)
+        if lt != -1:
+            safe = lt
+        amp = self._buffer.rfind("&", pos, safe)
+        if amp != -1 and ";" not in self._buffer[amp:safe]:
+            safe = amp
+        self._emit_summary(self._buffer[pos:safe], events)
+        return safe
+
+    @staticmethod
+    def _emit_summary(text: str, events: List[Tuple[str, Dict[str, Any]]]) -> None:
+        if text:
+            events.append(("summary", {"text": unescape(text)}))
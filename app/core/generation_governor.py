@@ -0,0 +1,243 @@
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator, Deque, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+    from langchain_openai import ChatOpenAI
+
+logger = logging.getLogger(__name__)
+
+ROOT_OPEN = "<root>"
+ROOT_CLOSE = "</root>"
+
+
+@dataclass
+class GenerationRecord:
+    """현재 요청의 생성 정보 (서비스가 track()으로 열고 프로바이더가 채움)"""
+
+    endpoint: str
+    max_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    finish_reason: Optional[str] = None
+    prompt_tokens: Optional[Dict[str, Any]] = None
+    coalesced: bool = False
+    hedge: Optional[Dict[str, Any]] = None
+
+    @property
+    def truncated(self) -> bool:
+        return self.finish_reason == "length"
+
+    def as_metadata(self) -> Dict[str, Any]:
+        """응답 메타데이터용 {"prompt_tokens": {...}, "generation": {...}} (캐시 히트 등 생성이 없었으면 빈 dict)"""
+        metadata: Dict[str, Any] = {"coalesced": True} if self.coalesced else {}
+        if self.hedge is not None:
+            metadata["hedge"] = self.hedge
+        if self.prompt_tokens is not None:
+            metadata["prompt_tokens"] = self.prompt_tokens
+        if self.finish_reason is not None or self.output_tokens is not None:
+            metadata["generation"] = {
+                "endpoint": self.endpoint,
+                "max_tokens": self.max_tokens,
+                "output_tokens": self.output_tokens,
+                "finish_reason": self.finish_reason,
+                "truncated": self.truncated,
+            }
+        return metadata
+
+
+_current_record: ContextVar[Optional[GenerationRecord]] = ContextVar("generation_record", default=None)
+
+
+class GenerationGovernor:
+    """진단 생성 출력 토큰 관리
+
+    - `</root>` 중단 시퀀스: 문서가 끝난 뒤 모델이 계속 쓰는 토큰의 디코딩 비용 제거
+      (API는 중단 시퀀스를 응답에서 빼므로 finish()에서 닫는 태그를 복원)
+    - 엔드포인트별 출력 토큰 수 분포 기록, 표본이 충분하면 p99 × 여유율로 max_tokens 예산 산정
+      (프로바이더 기본값을 넘지 않음)
+    - 예산에 걸려 잘린 응답(finish_reason=length)은 메타데이터 truncated 플래그로 노출
+    """
+
+    def __init__(
+        self,
+        stop_at_root: bool,
+        adaptive: bool,
+        headroom: float,
+        min_samples: int,
+        window: int,
+        floor: int,
+        percentile: float = 0.99,
+    ):
+        self.stop_at_root = stop_at_root
+        self.adaptive = adaptive
+        self.headroom = headroom
+        self.min_samples = max(1, min_samples)
+        self.window = max(self.min_samples, window)
+        self.floor = floor
+        self.percentile = percentile
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[int]] = {}
+        self._truncated: Dict[str, int] = {}
+        self._budgets: Dict[str, Optional[int]] = {}
+
+    @contextmanager
+    def track(self, endpoint: str) -> Iterator[GenerationRecord]:
+        """이 블록 안의 프로바이더 호출을 endpoint 예산/분포로 집계"""
+        record = GenerationRecord(endpoint=endpoint)
+        token = _current_record.set(record)
+        try:
+            yield record
+        finally:
+            _current_record.reset(token)
+
+    def stop_sequences(self) -> Optional[List[str]]:
+        return [ROOT_CLOSE] if self.stop_at_root else None
+
+    def _percentile_budget(self, endpoint: str) -> Optional[int]:
+        samples = self._samples.get(endpoint)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        observed = ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+        return max(self.floor, int(observed * self.headroom) + 1)
+
+    def budget(self, endpoint: str, default: int) -> int:
+        """엔드포인트 max_tokens 예산 (표본 부족/비활성 시 프로바이더 기본값)"""
+        if not self.adaptive:
+            return default
+        with self._lock:
+            if endpoint not in self._budgets:
+                self._budgets[endpoint] = self._percentile_budget(endpoint)
+            derived = self._budgets[endpoint]
+        return default if derived is None else min(default, derived)
+
+    def max_tokens(self, default: int) -> int:
+        """현재 요청에 적용할 max_tokens (track 밖의 호출은 기본값)"""
+        record = _current_record.get()
+        if record is None:
+            return default
+        record.max_tokens = self.budget(record.endpoint, default)
+        return record.max_tokens
+
+    def current(self) -> Optional[GenerationRecord]:
+        return _current_record.get()
+
+    def adopt(self, source: GenerationRecord) -> None:
+        """합쳐진 호출의 생성 기록을 현재 요청에 복사 (분포에는 한 번만 집계됨)"""
+        record = _current_record.get()
+        if record is not None:
+            record.max_tokens = source.max_tokens
+            record.output_tokens = source.output_tokens
+            record.finish_reason = source.finish_reason
+            record.prompt_tokens = source.prompt_tokens
+            record.hedge = source.hedge
+            record.coalesced = True
+
+    def note_prompt_tokens(self, counts: Dict[str, Any]) -> None:
+        """현재 요청의 프롬프트 토큰 수 기록 (프롬프트 컴파일러가 호출)"""
+        record = _current_record.get()
+        if record is not None:
+            record.prompt_tokens = counts
+
+    def note_hedge(self, hedge: Dict[str, Any]) -> None:
+        """현재 요청의 헤지 결과 기록 (헤지 요청 여부, 채택된 쪽)"""
+        record = _current_record.get()
+        if record is not None:
+            record.hedge = hedge
+
+    def record(self, endpoint: str, output_tokens: Optional[int], finish_reason: Optional[str]) -> None:
+        with self._lock:
+            if output_tokens is not None:
+                self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(output_tokens)
+                self._budgets.pop(endpoint, None)
+            if finish_reason == "length":
+                self._truncated[endpoint] = self._truncated.get(endpoint, 0) + 1
+
+    def closing_tag(self, text: str, finish_reason: Optional[str]) -> str:
+        """중단 시퀀스로 끝난 문서에 복원할 닫는 태그 ('' 또는 '</root>')"""
+        if finish_reason == "stop" and self.stop_at_root and ROOT_OPEN in text and ROOT_CLOSE not in text:
+            return ROOT_CLOSE
+        return ""
+
+    def finish(self, text: str, finish_reason: Optional[str], output_tokens: Optional[int]) -> str:
+        """생성 완료 처리: 분포 기록, 잘림 표시, 닫는 태그 복원"""
+        record = _current_record.get()
+        if record is not None:
+            record.finish_reason = finish_reason
+            record.output_tokens = output_tokens
+            self.record(record.endpoint, output_tokens, finish_reason)
+            if record.truncated:
+                logger.warning(
+                    f"진단 응답이 출력 예산에서 잘림 - {record.endpoint}, max_tokens={record.max_tokens}"
+                )
+        return text + self.closing_tag(text, finish_reason)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {}
+            for endpoint, samples in self._samples.items():
+                ordered = sorted(samples)
+                endpoints[endpoint] = {
+                    "samples": len(ordered),
+                    "p50": ordered[len(ordered) // 2],
+                    "p99": ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))],
+                    "max": ordered[-1],
+                    "budget": self._percentile_budget(endpoint) if self.adaptive else None,
+                    "truncated": self._truncated.get(endpoint, 0),
+                }
+        return {
+            "stop_at_root": self.stop_at_root,
+            "adaptive": self.adaptive,
+            "headroom": self.headroom,
+            "min_samples": self.min_samples,
+            "endpoints": endpoints,
+        }
+
+
+generation_governor = GenerationGovernor(
+    stop_at_root=settings.GENERATION_STOP_AT_ROOT,
+    adaptive=settings.GENERATION_BUDGET_ADAPTIVE,
+    headroom=settings.GENERATION_BUDGET_HEADROOM,
+    min_samples=settings.GENERATION_BUDGET_MIN_SAMPLES,
+    window=settings.GENERATION_BUDGET_WINDOW,
+    floor=settings.GENERATION_BUDGET_FLOOR,
+)
+
+
+async def agenerate_diagnosis(llm: "ChatOpenAI", messages: List["BaseMessage"]) -> str:
+    """LangChain 진단 호출 (중단 시퀀스/출력 예산 적용)"""
+    result = await llm.agenerate(
+        [messages],
+        stop=generation_governor.stop_sequences(),
+        max_tokens=generation_governor.max_tokens(llm.max_tokens),
+    )
+    generation = result.generations[0][0]
+    usage = (result.llm_output or {}).get("token_usage") or {}
+    finish_reason = (generation.generation_info or {}).get("finish_reason")
+    return generation_governor.finish(generation.text, finish_reason, usage.get("completion_tokens"))
+
+
+async def astream_diagnosis(llm: "ChatOpenAI", messages: List["BaseMessage"]) -> AsyncIterator[str]:
+    """LangChain 진단 스트리밍 (출력 토큰 수는 청크 수로 근사)"""
+    parts: List[str] = []
+    finish_reason = None
+    async for chunk in llm.astream(
+        messages,
+        stop=generation_governor.stop_sequences(),
+        max_tokens=generation_governor.max_tokens(llm.max_tokens),
+    ):
+        finish_reason = chunk.response_metadata.get("finish_reason") or finish_reason
+        if chunk.content:
+            parts.append(chunk.content)
+            yield chunk.content
+    text = "".join(parts)
+    tail = generation_governor.finish(text, finish_reason, len(parts))[len(text):]
+    if tail:
+        yield tail
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.diagnosis_parser import is_valid_diagnosis_xml
+from app.core.generation_governor import generation_governor
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "primary"
+SECONDARY = "secondary"
+
+
+class RequestHedger:
+    """주 프로바이더 응답이 늦을 때 보조 프로바이더로 같은 요청을 한 번 더 보내는 헤지 요청
+
+    - 헤지 지연: HEDGE_DELAY(초)가 있으면 고정, 없으면 엔드포인트/주 프로바이더별 응답 시간의 p9x
+      (표본이 min_samples 미만이면 initial_delay, runpod와 openai의 응답 시간 분포가 섞이지 않도록 분리)
+    - 먼저 도착한 응답 중 유효한 진단 XML을 채택하고 나머지 요청은 취소
+    - 주 프로바이더가 지연 전에 실패하거나 유효하지 않은 응답을 주면 즉시 보조로 요청
+    - 둘 다 유효하지 않으면 주 프로바이더 응답(없으면 보조 응답)을 그대로 반환, 둘 다 실패하면 주 프로바이더 예외
+    - 패배로 취소된 주 요청은 취소 시점까지의 경과 시간을 하한값으로 기록 (빠른 응답만 남아 지연이 줄어드는 것 방지),
+      on_lost가 있으면 같은 값을 넘겨 라우터 등도 느린 응답을 알 수 있게 함
+    - 프로바이더는 이름(runpod/openai)으로 다루고 call(name)이 실제 요청을 보냄
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        delay: float,
+        percentile: float,
+        min_samples: int,
+        window: int,
+        initial_delay: float,
+        min_delay: float,
+    ):
+        self.enabled = enabled
+        self.fixed_delay = delay
+        self.percentile = percentile
+        self.min_samples = max(1, min_samples)
+        self.window = max(self.min_samples, window)
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self._lock = threading.Lock()
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def delay(self, endpoint: str, primary: str) -> float:
+        """endpoint에서 primary 프로바이더가 주 요청일 때의 헤지 지연(초)"""
+        if self.fixed_delay > 0:
+            return self.fixed_delay
+        with self._lock:
+            samples = self._latencies.get((endpoint, primary))
+            if not samples or len(samples) < self.min_samples:
+                return self.initial_delay
+            ordered = sorted(samples)
+        observed = ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+        return max(self.min_delay, observed)
+
+    def _observe(self, endpoint: str, primary: str, latency: float) -> None:
+        with self._lock:
+            self._latencies.setdefault((endpoint, primary), deque(maxlen=self.window)).append(latency)
+
+    def _count(self, endpoint: str, name: str) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(endpoint, {"requests": 0, "hedged": 0, "primary_wins": 0, "secondary_wins": 0})
+            counts[name] += 1
+
+    async def run(
+        self,
+        endpoint: str,
+        primary: str,
+        secondary: Optional[str],
+        call: Callable[[str], Awaitable[str]],
+        on_lost: Optional[Callable[[str, float], None]] = None,
+    ) -> Tuple[str, str]:
+        """call(primary)를 실행하고 필요하면 call(secondary)로 헤지
+
+        on_lost(name, elapsed): 헤지에 져서 취소된 주 요청의 경과 시간(실제 응답 시간의 하한)
+        반환값: (응답을 채택한 프로바이더 이름, 응답) — 메타데이터/결과 캐시 키를 실제 응답한 쪽으로 기록하기 위함
+        """
+        if not self.enabled or secondary is None:
+            return primary, await call(primary)
+
+        self._count(endpoint, "requests")
+        started = time.monotonic()
+        delay = self.delay(endpoint, primary)
+        roles: Dict["asyncio.Future[str]", str] = {asyncio.ensure_future(call(primary)): PRIMARY}
+        pending = set(roles)
+        outcomes: Dict[str, Any] = {}
+        hedged = False
+        decided = False
+        try:
+            while True:
+                timeout = None if hedged else max(0.0, started + delay - time.monotonic())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    role = roles[task]
+                    if role == PRIMARY:
+                        self._observe(endpoint, primary, time.monotonic() - started)
+                    error = task.exception()
+                    outcomes[role] = error if error is not None else task.result()
+                for role in (roles[task] for task in done):
+                    if is_valid_diagnosis_xml(outcomes[role]):
+                        decided = True
+                        winner = primary if role == PRIMARY else secondary
+                        self._finish(endpoint, role, hedged, winner)
+                        return winner, outcomes[role]
+                if not hedged:
+                    # 지연 초과 또는 주 프로바이더 실패/무효 응답 → 보조 프로바이더로 같은 요청
+                    hedged = True
+                    self._count(endpoint, "hedged")
+                    logger.info(f"헤지 요청 - {endpoint}, {primary} → {secondary} ({time.monotonic() - started:.2f}s)")
+                    task = asyncio.ensure_future(call(secondary))
+                    roles[task] = SECONDARY
+                    pending.add(task)
+                elif not pending:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+                if roles[task] == PRIMARY:
+                    elapsed = time.monotonic() - started
+                    self._observe(endpoint, primary, elapsed)
+                    if decided and on_lost is not None:
+                        on_lost(primary, elapsed)
+
+        for role in (PRIMARY, SECONDARY):
+            if isinstance(outcomes.get(role), str):
+                winner = primary if role == PRIMARY else secondary
+                self._finish(endpoint, role, hedged, winner)
+                return winner, outcomes[role]
+        raise outcomes[PRIMARY]
+
+    def _finish(self, endpoint: str, role: str, hedged: bool, provider: str) -> None:
+        self._count(endpoint, f"{role}_wins")
+        generation_governor.note_hedge({"hedged": hedged, "winner": role, "provider": provider})
+
+    def stats(self) -> Dict[str, Any]:
+        endpoints = {}
+        with self._lock:
+            counts = {endpoint: dict(values) for endpoint, values in self._counts.items()}
+            primaries = list(self._latencies)
+        for endpoint, values in counts.items():
+            endpoints[endpoint] = {
+                **values,
+                "hedge_rate": round(values["hedged"] / values["requests"], 4) if values["requests"] else 0.0,
+                "delay_seconds": {
+                    primary: round(self.delay(endpoint, primary), 3) for key, primary in primaries if key == endpoint
+                },
+            }
+        return {
+            "enabled": self.enabled,
+            "fixed_delay": self.fixed_delay or None,
+            "percentile": self.percentile,
+            "min_samples": self.min_samples,
+            "endpoints": endpoints,
+        }
+
+
+request_hedger = RequestHedger(
+    enabled=settings.HEDGE_ENABLED,
+    delay=settings.HEDGE_DELAY,
+    percentile=settings.HEDGE_PERCENTILE,
+    min_samples=settings.HEDGE_MIN_SAMPLES,
+    window=settings.HEDGE_WINDOW,
+    initial_delay=settings.HEDGE_INITIAL_DELAY,
+    min_delay=settings.HEDGE_MIN_DELAY,
+)
@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class ImageProfile:
+    """프로바이더별 이미지 전처리 프로파일
+
+    max_edge: 긴 변 최대 픽셀 (종횡비 유지)
+    format: 인코딩 형식 (JPEG | WEBP)
+    quality: 인코딩 품질 (바이트 예산 모드에서는 상한)
+    detail: Vision API image_url.detail 값
+    byte_budget: 인코딩 결과 바이트 상한 (None이면 고정 품질 모드)
+    min_quality: 바이트 예산 모드의 품질 하한
+    max_search_steps: 바이트 예산 모드의 품질 탐색 최대 인코딩 횟수
+    try_webp: 선택된 품질로 WebP도 인코딩해 더 작으면 사용
+    """
+    max_edge: int = 1024
+    format: str = "JPEG"
+    quality: int = 85
+    detail: str = "low"
+    byte_budget: Optional[int] = None
+    min_quality: int = 40
+    max_search_steps: int = 5
+    try_webp: bool = False
+
+    @property
+    def target_size(self):
+        return (self.max_edge, self.max_edge)
+
+    @property
+    def mime_type(self) -> str:
+        return f"image/{self.format.lower()}"
+
+
+def mime_type_for_base64(image_base64: str) -> str:
+    """base64 페이로드 앞부분(매직 바이트)으로 data URL MIME 타입 결정"""
+    if image_base64.startswith("UklGR"):
+        return "image/webp"
+    if image_base64.startswith("iVBOR"):
+        return "image/png"
+    return "image/jpeg"
+
+
+def image_data_url(image_base64: str) -> str:
+    """프로바이더 요청용 data URL 반환 (이미 data URL이면 복사 없이 그대로 사용)"""
+    if image_base64.startswith("data:"):
+        return image_base64
+    return f"data:{mime_type_for_base64(image_base64)};base64,{image_base64}"
+
+
+# 기존 동작 (1024px, JPEG 85)
+DEFAULT_IMAGE_PROFILE = ImageProfile()
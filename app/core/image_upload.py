@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import logging
+import threading
+from dataclasses import replace
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from fastapi import UploadFile, HTTPException
+from app.core.config import settings
+from app.core.image_profile import DEFAULT_IMAGE_PROFILE, ImageProfile
+
+# 업로드 검증/워커 풀만 담당하고 Pillow·NumPy를 쓰는 전처리 함수(app.core.image_utils)는
+# 호출 시점에 import하여 app 기동 시 이미지 라이브러리 로딩을 피함
+
+logger = logging.getLogger(__name__)
+
+MOSAIC_MIN_IMAGES = 2
+MOSAIC_MAX_IMAGES = 4
+
+
+class _WorkerHTTPError(Exception):
+    """프로세스 경계를 넘길 수 있는 HTTPException 대체 (HTTPException은 pickle 불가)"""
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _call_in_worker(func: Callable[..., Any], *args: Any) -> Any:
+    try:
+        return func(*args)
+    except HTTPException as e:
+        raise _WorkerHTTPError(e.status_code, e.detail)
+
+
+def _warmup_worker() -> bool:
+    """워커 프로세스 기동 및 Pillow 플러그인 로딩"""
+    from PIL import Image
+
+    Image.init()
+    return True
+
+
+class ImageWorkerPool:
+    """CPU 바운드 이미지 전처리를 위한 프로세스 풀
+
+    - 동시 작업 수 상한(워커 수 + 대기열 크기)을 넘으면 즉시 503 반환
+    - 작업별 타임아웃 (초과 시 504)
+    - 워커는 max_tasks_per_child 작업 후 재시작되어 메모리 누적 방지
+    - processes=0 이면 같은 규칙으로 스레드에서 동작
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        queue_size: int,
+        timeout: float,
+        max_tasks_per_child: int,
+    ):
+        self.processes = max(0, processes)
+        self.queue_size = max(0, queue_size)
+        self.timeout = timeout
+        self.max_tasks_per_child = max_tasks_per_child
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @property
+    def capacity(self) -> int:
+        return max(1, self.processes) + self.queue_size
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None and self.processes == 0:
+                # 동시 작업 수는 capacity로 이미 제한되므로 대기 없이 바로 실행
+                self._executor = ThreadPoolExecutor(max_workers=self.capacity, thread_name_prefix="image-worker")
+            elif self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    max_tasks_per_child=self.max_tasks_per_child or None,
+                )
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def start(self) -> None:
+        """워커를 미리 띄워 첫 요청의 프로세스 기동 비용 제거"""
+        if self.processes == 0:
+            return
+        executor = self._get_executor()
+        for _ in range(self.processes):
+            executor.submit(_warmup_worker)
+
+    def shutdown(self) -> None:
+        self._reset_executor()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "processes": self.processes,
+            "capacity": self.capacity,
+            "in_flight": self._in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="이미지 처리 요청이 많아 잠시 후 다시 시도해주세요.",
+                    headers={"Retry-After": "1"},
+                )
+            self._in_flight += 1
+
+        try:
+            future = self._get_executor().submit(_call_in_worker, func, *args)
+        except (BrokenProcessPool, RuntimeError):
+            # 워커 비정상 종료 등으로 풀이 깨진 경우 재생성 후 1회 재시도
+            logger.warning("이미지 워커 풀 재생성")
+            self._reset_executor()
+            try:
+                future = self._get_executor().submit(_call_in_worker, func, *args)
+            except Exception:
+                self._release()
+                raise
+        # 타임아웃 후에도 워커(프로세스/스레드)가 실제로 끝날 때까지 슬롯을 점유
+        future.add_done_callback(self._release)
+
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise HTTPException(status_code=504, detail="이미지 처리 시간이 초과되었습니다.")
+        except _WorkerHTTPError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        except BrokenProcessPool:
+            self._reset_executor()
+            raise HTTPException(status_code=503, detail="이미지 처리 워커를 재시작하는 중입니다.", headers={"Retry-After": "1"})
+        self.completed += 1
+        return result
+
+
+image_worker_pool = ImageWorkerPool(
+    processes=settings.IMAGE_WORKER_PROCESSES,
+    queue_size=settings.IMAGE_WORKER_QUEUE_SIZE,
+    timeout=settings.IMAGE_WORKER_TIMEOUT,
+    max_tasks_per_child=settings.IMAGE_WORKER_MAX_TASKS_PER_CHILD,
+)
+
+
+# 업로드 스트리밍 읽기 단위
+UPLOAD_SNIFF_BYTES = 4 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+ALLOWED_IMAGE_TYPES = ['image/jpeg', 'image/png', 'image/webp']
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """매직 바이트로 실제 이미지 형식 판별 (선언된 MIME 타입은 신뢰하지 않음)"""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _upload_too_large() -> HTTPException:
+    max_mb = settings.IMAGE_MAX_UPLOAD_BYTES / (1024 * 1024)
+    return HTTPException(status_code=413, detail=f"파일 크기는 {max_mb:g}MB 이하여야 합니다.")
+
+
+async def read_image_upload(image_file: UploadFile) -> Tuple[bytearray, str, str]:
+    """업로드를 청크 단위로 한 번만 읽으면서 형식/크기 검사와 해시 계산을 함께 수행
+
+    - 첫 4KB에서 매직 바이트를 확인해 이미지가 아니면 나머지를 읽지 않고 거절
+    - 누적 크기가 IMAGE_MAX_UPLOAD_BYTES를 넘는 순간 거절
+    이 함수가 호출될 때는 Starlette가 파트 전체를 이미 수신/임시 파일에 저장한 상태이므로,
+    형식 검사로 아끼는 것은 나머지 읽기/해시/디코딩(워커 풀) 비용뿐 (수신 자체의 상한은 UploadSizeLimitMiddleware)
+    반환값: (업로드 바이트, 원본 SHA-256, 판별된 MIME 타입)
+    """
+    max_bytes = settings.IMAGE_MAX_UPLOAD_BYTES
+    if image_file.size and image_file.size > max_bytes:
+        raise _upload_too_large()
+
+    head = await image_file.read(UPLOAD_SNIFF_BYTES)
+    detected_type = sniff_image_type(head)
+    if detected_type is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"지원하지 않는 파일 형식입니다. 지원 형식: {', '.join(ALLOWED_IMAGE_TYPES)}"
+        )
+
+    buffer = bytearray(head)
+    digest = hashlib.sha256(head)
+    while True:
+        chunk = await image_file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if len(buffer) + len(chunk) > max_bytes:
+            raise _upload_too_large()
+        buffer += chunk
+        digest.update(chunk)
+    return buffer, digest.hexdigest(), detected_type
+
+
+async def preprocess_upload(
+    image_file: UploadFile,
+    profile: ImageProfile = DEFAULT_IMAGE_PROFILE,
+) -> Dict[str, Any]:
+    """업로드를 비동기 청크 읽기로 검증한 뒤 전처리를 이미지 워커 풀에서 실행"""
+    from app.core.image_utils import preprocess_image_bytes
+
+    if settings.IMAGE_BYTE_BUDGET > 0 and profile.byte_budget is None:
+        profile = replace(profile, byte_budget=settings.IMAGE_BYTE_BUDGET, try_webp=settings.IMAGE_ENCODER_TRY_WEBP)
+    image_data, upload_sha256, detected_type = await read_image_upload(image_file)
+    result = await image_worker_pool.run(
+        preprocess_image_bytes,
+        image_data,
+        image_file.filename,
+        detected_type,
+        settings.IMAGE_NEAR_DUPLICATE_ENABLED,
+        profile,
+        settings.IMAGE_ROI_CROP_ENABLED,
+        settings.IMAGE_QUALITY_GATE.lower(),
+    )
+    result["image_info"]["upload_sha256"] = upload_sha256
+    return result
+
+
+async def preprocess_mosaic_upload(
+    image_files: List[UploadFile],
+    profile: ImageProfile = DEFAULT_IMAGE_PROFILE,
+) -> Dict[str, Any]:
+    """여러 장의 업로드를 검증한 뒤 모자이크 합성/인코딩을 이미지 워커 풀에서 한 번에 실행"""
+    from app.core.image_utils import preprocess_mosaic_bytes
+
+    if not MOSAIC_MIN_IMAGES <= len(image_files) <= MOSAIC_MAX_IMAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"이미지는 {MOSAIC_MIN_IMAGES}~{MOSAIC_MAX_IMAGES}장까지 업로드할 수 있습니다.",
+        )
+    if settings.IMAGE_BYTE_BUDGET > 0 and profile.byte_budget is None:
+        profile = replace(profile, byte_budget=settings.IMAGE_BYTE_BUDGET, try_webp=settings.IMAGE_ENCODER_TRY_WEBP)
+    uploads = []
+    upload_hashes = []
+    for image_file in image_files:
+        image_data, upload_sha256, detected_type = await read_image_upload(image_file)
+        uploads.append((image_data, image_file.filename, detected_type))
+        upload_hashes.append(upload_sha256)
+    result = await image_worker_pool.run(
+        preprocess_mosaic_bytes,
+        uploads,
+        settings.IMAGE_NEAR_DUPLICATE_ENABLED,
+        profile,
+        settings.IMAGE_QUALITY_GATE.lower(),
+    )
+    for tile, upload_sha256 in zip(result["image_info"]["tiles"], upload_hashes):
+        tile["upload_sha256"] = upload_sha256
+    return result
@@ -1,76 +1,528 @@
-import base64
+import binascii
+import hashlib
 import io
-from PIL import Image
-from fastapi import UploadFile, HTTPException
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from PIL import Image, ImageDraw
+from fastapi import HTTPException
+from app.core.config import settings
+from app.core.image_profile import DEFAULT_IMAGE_PROFILE, ImageProfile
+# 업로드 검증/워커 풀은 Pillow 없이 import되도록 image_upload로 분리 (기존 경로 호환용 재노출)
+from app.core.image_upload import (  # noqa: F401
+    ALLOWED_IMAGE_TYPES,
+    MOSAIC_MAX_IMAGES,
+    MOSAIC_MIN_IMAGES,
+    ImageWorkerPool,
+    image_worker_pool,
+    preprocess_mosaic_upload,
+    preprocess_upload,
+    read_image_upload,
+    sniff_image_type,
+)
 
-def encode_image_to_base64(image_file: UploadFile) -> str:
-    """이미지 파일을 base64로 인코딩"""
-    try:
-        # 파일 내용 읽기
-        image_data = image_file.file.read()
-        
-        # PIL로 이미지 검증 및 최적화
-        image = Image.open(io.BytesIO(image_data))
-        
-        # 이미지 크기 제한 (OpenAI 권장)
-        max_size = (1024, 1024)
-        if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
-            image.thumbnail(max_size, Image.Resampling.LANCZOS)
-        
-        # RGB 변환 (RGBA나 다른 모드인 경우)
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # 최적화된 이미지를 바이트로 변환
-        buffer = io.BytesIO()
-        image.save(buffer, format='JPEG', quality=85, optimize=True)
-        buffer.seek(0)
-        
-        # base64 인코딩
-        encoded_string = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        return encoded_string
-        
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"이미지 처리 중 오류가 발생했습니다: {str(e)}")
+logger = logging.getLogger(__name__)
 
-def validate_image_file(file: UploadFile) -> bool:
-    """이미지 파일 유효성 검사"""
-    # 허용된 MIME 타입
-    allowed_types = [
-        'image/jpeg', 
-        'image/jpg', 
-        'image/png', 
-        'image/webp'
-    ]
-    
-    if file.content_type not in allowed_types:
+# 이미지 크기 제한 (OpenAI 권장)
+MAX_IMAGE_SIZE = DEFAULT_IMAGE_PROFILE.target_size
+
+
+class _BufferReader(io.RawIOBase):
+    """bytes/bytearray를 복사 없이 읽는 파일 객체 (BytesIO는 bytearray 입력을 통째로 복사함)"""
+
+    def __init__(self, data):
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        chunk = self._view[self._pos:self._pos + len(buffer)]
+        size = len(chunk)
+        buffer[:size] = chunk
+        self._pos += size
+        return size
+
+    def close(self) -> None:
+        self._view.release()
+        super().close()
+
+
+def build_data_url(encoded, mime_type: str) -> str:
+    """인코딩된 이미지를 data URL 문자열로 한 번에 변환
+
+    base64 바이트에 접두사를 붙인 뒤 ASCII 디코딩 한 번으로 최종 문자열을 만들어
+    base64 str → f-string data URL로 이어지는 중간 복사본을 만들지 않음
+    """
+    payload = bytearray(f"data:{mime_type};base64,".encode("ascii"))
+    payload += binascii.b2a_base64(encoded, newline=False)
+    return payload.decode("ascii")
+
+
+def check_pixel_limit(image: Image.Image) -> None:
+    """헤더의 해상도만으로 픽셀 수 상한 검사 (픽셀 버퍼 할당 전)"""
+    width, height = image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
         raise HTTPException(
-            status_code=400, 
-            detail=f"지원하지 않는 파일 형식입니다. 지원 형식: {', '.join(allowed_types)}"
+            status_code=400,
+            detail=f"이미지 해상도가 너무 큽니다: {width}x{height} (최대 {settings.IMAGE_MAX_PIXELS} 픽셀)",
         )
-    
-    # 파일 크기 제한 (10MB)
-    if file.size and file.size > 10 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="파일 크기는 10MB 이하여야 합니다.")
-    
-    return True
-
-def get_image_info(image_file: UploadFile) -> dict:
-    """이미지 정보 추출"""
+
+
+def decode_downscaled(image: Image.Image, target_size=MAX_IMAGE_SIZE) -> Image.Image:
+    """디코더 단계에서 축소 디코딩 후 최종 리사이즈
+
+    - JPEG: draft()로 DCT 스케일링(1/2, 1/4, 1/8) 디코딩
+    - 그 외: 정수 reduce() 박스 축소 후 남은 배율만 LANCZOS 리사이즈
+    """
+    check_pixel_limit(image)
+    width, height = image.size
+    # 종횡비를 유지한 최종 출력 크기 (thumbnail과 동일 규칙)
+    scale = min(target_size[0] / width, target_size[1] / height, 1.0)
+    out_w, out_h = max(1, round(width * scale)), max(1, round(height * scale))
+
+    if image.format == "JPEG" and scale < 1.0:
+        # 출력 크기 이상을 유지하는 가장 작은 스케일을 디코더가 선택
+        image.draft("RGB", (out_w, out_h))
+    image.load()
+
+    if image.mode in ("P", "1", "I;16"):
+        # reduce()는 팔레트/비트 모드를 지원하지 않음
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    factor = min(image.size[0] // out_w, image.size[1] // out_h)
+    if factor >= 2:
+        image = image.reduce(factor)
+
+    if image.size != (out_w, out_h):
+        image = image.resize((out_w, out_h), Image.Resampling.LANCZOS)
+    return image
+
+
+def _save(image: Image.Image, image_format: str, quality: int, optimize: bool = False) -> memoryview:
+    buffer = io.BytesIO()
+    if image_format == 'JPEG':
+        image.save(buffer, format='JPEG', quality=quality, optimize=optimize)
+    else:
+        image.save(buffer, format=image_format, quality=quality)
+    # getbuffer()는 내부 버퍼를 공유하는 뷰라 getvalue()와 달리 복사하지 않음
+    return buffer.getbuffer()
+
+
+def encode_to_budget(image: Image.Image, profile: ImageProfile) -> Tuple[memoryview, Dict[str, Any]]:
+    """바이트 예산 이하가 되는 가장 높은 품질을 이진 탐색으로 선택
+
+    최대 max_search_steps회만 인코딩하며, 예산을 만족하는 품질이 없으면 min_quality 결과를 사용.
+    JPEG Huffman 최적화(optimize)는 512px 기준 1ms 미만 비용으로 20~40% 작아지므로
+    탐색 단계에서부터 적용해 실제 전송 크기로 비교.
+    """
+    budget = profile.byte_budget
+    optimize = profile.format == 'JPEG'
+    steps = 1
+    best_quality = profile.quality
+    best = _save(image, profile.format, profile.quality, optimize)
+
+    if len(best) > budget:
+        low, high = profile.min_quality, profile.quality - 1
+        fallback: Optional[Tuple[int, memoryview]] = None
+        best = None
+        while low <= high and steps < profile.max_search_steps:
+            quality = (low + high + 1) // 2
+            encoded = _save(image, profile.format, quality, optimize)
+            steps += 1
+            if len(encoded) <= budget:
+                best_quality, best = quality, encoded
+                low = quality + 1
+            else:
+                fallback = (quality, encoded)
+                high = quality - 1
+        if best is None:
+            if fallback is not None and fallback[0] == profile.min_quality:
+                best_quality, best = fallback
+            else:
+                best_quality = profile.min_quality
+                best = _save(image, profile.format, best_quality, optimize)
+                steps += 1
+
+    chosen_format = profile.format
+    if profile.try_webp and profile.format != 'WEBP':
+        webp = _save(image, 'WEBP', best_quality)
+        steps += 1
+        if len(webp) < len(best):
+            chosen_format, best = 'WEBP', webp
+
+    return best, {
+        "format": chosen_format,
+        "quality": best_quality,
+        "bytes": len(best),
+        "byte_budget": budget,
+        "encode_steps": steps,
+    }
+
+
+def _encode_with_profile(image: Image.Image, profile: ImageProfile) -> Tuple[memoryview, Dict[str, Any]]:
+    """리사이즈된 PIL 이미지를 RGB 변환 후 프로파일 형식/품질로 인코딩"""
+    # RGB 변환 (RGBA나 다른 모드인 경우)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    if profile.byte_budget:
+        return encode_to_budget(image, profile)
+
+    encoded = _save(image, profile.format, profile.quality, optimize=True)
+    return encoded, {"format": profile.format, "quality": profile.quality, "bytes": len(encoded)}
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """정규직교 DCT-II 변환 행렬"""
+    k = np.arange(n, dtype=np.float64)[:, None]
+    i = np.arange(n, dtype=np.float64)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0, :] /= np.sqrt(2.0)
+    return matrix
+
+
+PHASH_SIZE = 32
+PHASH_LOW_FREQ = 8
+_PHASH_DCT = _dct_matrix(PHASH_SIZE)
+
+
+def compute_phash(image: Image.Image) -> int:
+    """64비트 perceptual hash (pHash)
+
+    32x32 흑백 축소 → 2D DCT(행렬곱) → 저주파 8x8 계수를 중앙값과 비교.
+    재압축/약간의 크롭·밝기 변화에는 해밍 거리가 작게 유지됨
+    """
+    gray = image.convert("L").resize((PHASH_SIZE, PHASH_SIZE), Image.Resampling.BOX)
+    pixels = np.asarray(gray, dtype=np.float64)
+    dct = _PHASH_DCT @ pixels @ _PHASH_DCT.T
+    low = dct[:PHASH_LOW_FREQ, :PHASH_LOW_FREQ].ravel()
+    # DC 성분은 전체 밝기라 중앙값 계산에서 제외
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+ROI_ANALYSIS_EDGE = 128
+# ROI 크롭 시 크롭 후에도 디테일이 남도록 프로파일 긴 변의 몇 배까지 디코딩할지
+ROI_DECODE_SCALE = 4
+ROI_MIN_CONTRAST = 18.0
+ROI_MIN_MASK_RATIO = 0.002
+ROI_MAX_MASK_RATIO = 0.6
+ROI_MIN_SIDE_RATIO = 0.2
+ROI_MAX_AREA_RATIO = 0.8
+
+
+def _otsu_threshold(values: np.ndarray, bins: int = 64) -> float:
+    """히스토그램 기반 Otsu 임계값 (클래스 간 분산 최대화)"""
+    hist, edges = np.histogram(values, bins=bins)
+    hist = hist.astype(np.float64)
+    centers = (edges[:-1] + edges[1:]) / 2
+    weight_low = np.cumsum(hist)
+    weight_high = weight_low[-1] - weight_low
+    sum_low = np.cumsum(hist * centers)
+    mean_low = sum_low / np.maximum(weight_low, 1)
+    mean_high = (sum_low[-1] - sum_low) / np.maximum(weight_high, 1)
+    between = weight_low * weight_high * (mean_low - mean_high) ** 2
+    return float(edges[int(np.argmax(between)) + 1])
+
+
+def _mass_range(profile: np.ndarray, tail: float = 0.02) -> Tuple[int, int]:
+    """1차원 투영에서 양끝 tail 비율의 질량을 제외한 구간 [start, end)"""
+    cumulative = np.cumsum(profile)
+    total = cumulative[-1]
+    start = int(np.searchsorted(cumulative, total * tail))
+    end = int(np.searchsorted(cumulative, total * (1 - tail))) + 1
+    return start, end
+
+
+def detect_lesion_roi(image: Image.Image, margin: float = 0.25) -> Optional[Tuple[int, int, int, int]]:
+    """색/명암 saliency로 병변 영역을 찾아 여백을 포함한 크롭 박스 반환
+
+    128px 축소본에서 피부 기준색(채널별 중앙값)과의 거리를 saliency로 보고 Otsu로 이진화.
+    마스크 행/열 투영의 2~98% 질량 구간을 박스로 잡아 잡티에 덜 민감하게 함.
+    대비가 낮거나 병변이 프레임 대부분을 차지하면 None (크롭 이득 없음)
+    반환값: 입력 이미지 좌표의 (left, top, right, bottom)
+    """
+    width, height = image.size
+    scale = min(ROI_ANALYSIS_EDGE / max(width, height), 1.0)
+    small_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    small = image.resize(small_size, Image.Resampling.BOX)
+    if small.mode != "RGB":
+        small = small.convert("RGB")
+    pixels = np.asarray(small, dtype=np.float32)
+
+    reference = np.median(pixels.reshape(-1, 3), axis=0)
+    saliency = np.sqrt(((pixels - reference) ** 2).sum(axis=-1))
+    threshold = _otsu_threshold(saliency)
+    if threshold < ROI_MIN_CONTRAST:
+        return None
+    mask = saliency > threshold
+    if not ROI_MIN_MASK_RATIO <= mask.mean() <= ROI_MAX_MASK_RATIO:
+        return None
+
+    weights = np.where(mask, saliency, 0.0)
+    x0, x1 = _mass_range(weights.sum(axis=0))
+    y0, y1 = _mass_range(weights.sum(axis=1))
+
+    # 여백 추가 + 최소 크기 보장 (축소본 좌표)
+    pad = margin * max(x1 - x0, y1 - y0)
+    min_side = ROI_MIN_SIDE_RATIO * min(small_size)
+    half_w = max((x1 - x0) / 2 + pad, min_side / 2)
+    half_h = max((y1 - y0) / 2 + pad, min_side / 2)
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+    left, right = max(0.0, cx - half_w), min(float(small_size[0]), cx + half_w)
+    top, bottom = max(0.0, cy - half_h), min(float(small_size[1]), cy + half_h)
+    if (right - left) * (bottom - top) > ROI_MAX_AREA_RATIO * small_size[0] * small_size[1]:
+        return None
+
+    sx, sy = width / small_size[0], height / small_size[1]
+    return (
+        int(left * sx),
+        int(top * sy),
+        min(width, int(np.ceil(right * sx))),
+        min(height, int(np.ceil(bottom * sy))),
+    )
+
+
+def _crop_to_lesion(
+    image: Image.Image, profile: ImageProfile, margin: float
+) -> Tuple[Image.Image, Optional[Dict[str, Any]]]:
+    """프로파일 해상도의 ROI_DECODE_SCALE배 근처로 축소 디코딩 → 병변 크롭 → 프로파일 해상도로 축소
+
+    반환값: (리사이즈된 이미지, 원본 좌표 기준 roi 메타데이터 또는 None)
+    """
+    original_w, original_h = image.size
+    edge = profile.max_edge * ROI_DECODE_SCALE
+    check_pixel_limit(image)
+    if image.format == "JPEG":
+        image.draft("RGB", (edge, edge))
+    image.load()
+    # 정확한 크기 맞춤(LANCZOS)은 크롭 후 한 번만 수행하고 여기서는 정수 축소만 적용
+    factor = max(image.size) // edge
+    if factor >= 2 and image.mode not in ("P", "1", "I;16"):
+        image = image.reduce(factor)
+    decoded = image
+    box = detect_lesion_roi(decoded, margin)
+    if box is None:
+        return decode_downscaled(decoded, profile.target_size), None
+
+    sx, sy = original_w / decoded.size[0], original_h / decoded.size[1]
+    original_box = [
+        round(box[0] * sx), round(box[1] * sy),
+        min(original_w, round(box[2] * sx)), min(original_h, round(box[3] * sy)),
+    ]
+    area = (original_box[2] - original_box[0]) * (original_box[3] - original_box[1])
+    roi = {"box": original_box, "area_ratio": round(area / (original_w * original_h), 4)}
+    return decode_downscaled(decoded.crop(box), profile.target_size), roi
+
+
+QUALITY_DARK_LEVEL = 8
+QUALITY_BRIGHT_LEVEL = 247
+
+
+def assess_image_quality(image: Image.Image, lesion_px: int) -> Dict[str, Any]:
+    """흐림/노출/병변 크기 기반 이미지 품질 평가
+
+    - sharpness: 흑백 4-이웃 Laplacian 분산 (낮을수록 흐림)
+    - dark_ratio/bright_ratio: 거의 검정/흰색으로 잘린 픽셀 비율 (노출 부족/과다)
+    - lesion_px: 병변(ROI 박스, 없으면 원본 프레임)의 짧은 변 픽셀 수
+    image는 프로바이더에 전달되는 해상도로 리사이즈된 이미지
+    """
+    gray = np.asarray(image.convert("L"), dtype=np.float32)
+    laplacian = (
+        gray[1:-1, :-2] + gray[1:-1, 2:] + gray[:-2, 1:-1] + gray[2:, 1:-1] - 4 * gray[1:-1, 1:-1]
+    )
+    histogram = np.bincount(gray.astype(np.uint8).ravel(), minlength=256) / gray.size
+    scores = {
+        "sharpness": round(float(laplacian.var()), 2),
+        "brightness": round(float(histogram @ np.arange(256)), 1),
+        "dark_ratio": round(float(histogram[:QUALITY_DARK_LEVEL + 1].sum()), 4),
+        "bright_ratio": round(float(histogram[QUALITY_BRIGHT_LEVEL:].sum()), 4),
+        "lesion_px": lesion_px,
+    }
+
+    issues = []
+    if scores["sharpness"] < settings.IMAGE_QUALITY_MIN_SHARPNESS:
+        issues.append("blurry")
+    if scores["bright_ratio"] > settings.IMAGE_QUALITY_MAX_CLIPPED_RATIO:
+        issues.append("overexposed")
+    if scores["dark_ratio"] > settings.IMAGE_QUALITY_MAX_CLIPPED_RATIO:
+        issues.append("underexposed")
+    if lesion_px < settings.IMAGE_QUALITY_MIN_LESION_PX:
+        issues.append("lesion_too_small")
+    return {**scores, "passed": not issues, "issues": issues}
+
+
+def _enforce_quality_gate(quality: Dict[str, Any]) -> None:
+    """품질 미달 이미지를 프로바이더 호출 전에 구조화된 422로 거절"""
+    if quality["passed"]:
+        return
+    raise HTTPException(
+        status_code=422,
+        detail={
+            "message": "이미지 품질이 진단에 적합하지 않습니다. 병변이 선명하고 크게 보이도록 다시 촬영해주세요.",
+            "issues": quality["issues"],
+            "quality": quality,
+        },
+    )
+
+
+def preprocess_image_bytes(
+    image_data: bytes,
+    filename: Optional[str] = None,
+    content_type: Optional[str] = None,
+    perceptual_hash: bool = False,
+    profile: ImageProfile = DEFAULT_IMAGE_PROFILE,
+    roi_crop: bool = False,
+    quality_gate: str = "off",
+) -> Dict[str, Any]:
+    """업로드 바이트를 한 번만 디코딩하여 메타데이터와 base64 페이로드를 함께 생성
+
+    반환값: {"image_info": dict, "image_data_url": str, "image_hash": str, "image_phash": Optional[str]}
+    image_data_url은 프로바이더에 그대로 전달되는 data URL (base64 문자열을 따로 만들지 않음)
+    bytearray 입력은 복사 없이 읽으므로 호출자가 버퍼를 재사용하면 안 됨
+    image_hash는 정규화된(리사이즈/재인코딩된) 이미지의 SHA-256으로 결과 캐시 키에 사용
+    image_phash는 perceptual_hash=True일 때만 계산 (근접 중복 탐지용, 16자리 hex)
+    profile은 요청을 처리할 프로바이더의 해상도/형식/품질 프로파일
+    roi_crop=True면 병변 영역으로 크롭 후 인코딩하고 image_info["roi"]에 원본 좌표 박스 기록
+    (병변을 찾지 못하면 전체 프레임 사용, roi는 None)
+    quality_gate: off | annotate(image_info["quality"]에 점수 기록) | reject(기록 + 품질 미달 시 422)
+    """
     try:
-        image_data = image_file.file.read()
-        image = Image.open(io.BytesIO(image_data))
-        
-        # 파일 포인터 리셋
-        image_file.file.seek(0)
-        
-        return {
-            "filename": image_file.filename,
-            "content_type": image_file.content_type,
-            "size": image_file.size,
+        image = Image.open(_BufferReader(image_data))
+        # 원본 메타데이터는 리사이즈 전에 기록
+        image_info = {
+            "filename": filename,
+            "content_type": content_type,
+            "size": len(image_data),
             "dimensions": image.size,
             "mode": image.mode,
-            "format": image.format
+            "format": image.format,
+        }
+        if roi_crop:
+            resized, image_info["roi"] = _crop_to_lesion(image, profile, settings.IMAGE_ROI_MARGIN)
+        else:
+            resized = decode_downscaled(image, profile.target_size)
+        if quality_gate in ("annotate", "reject"):
+            roi = image_info.get("roi")
+            if roi:
+                lesion_px = min(roi["box"][2] - roi["box"][0], roi["box"][3] - roi["box"][1])
+            else:
+                lesion_px = min(image_info["dimensions"])
+            image_info["quality"] = assess_image_quality(resized, lesion_px)
+            if quality_gate == "reject":
+                _enforce_quality_gate(image_info["quality"])
+        return _build_payload(resized, image_info, profile, perceptual_hash)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"이미지 처리 중 오류가 발생했습니다: {str(e)}")
+
+
+def _build_payload(
+    image: Image.Image, image_info: Dict[str, Any], profile: ImageProfile, perceptual_hash: bool
+) -> Dict[str, Any]:
+    """리사이즈된 최종 이미지를 인코딩해 프로바이더 페이로드(data URL/해시) 생성"""
+    phash = compute_phash(image) if perceptual_hash else None
+    encoded, encoding_info = _encode_with_profile(image, profile)
+    image_info["encoding"] = {"dimensions": image.size, **encoding_info}
+    return {
+        "image_info": image_info,
+        "image_data_url": build_data_url(encoded, f"image/{encoding_info['format'].lower()}"),
+        "image_hash": hashlib.sha256(encoded).hexdigest(),
+        "image_phash": f"{phash:016x}" if phash is not None else None,
+    }
+
+
+MOSAIC_BACKGROUND = (255, 255, 255)
+MOSAIC_LABEL_SIZE = 18
+
+
+def _mosaic_grid(count: int) -> Tuple[int, int]:
+    """이미지 수별 (열, 행) 배치: 2장은 가로 1x2, 3~4장은 2x2"""
+    return (2, 1) if count == 2 else (2, 2)
+
+
+def _draw_tile_label(canvas: Image.Image, origin: Tuple[int, int], label: str) -> None:
+    """타일 좌상단에 번호 라벨 (어두운 배경 + 흰 글자)"""
+    draw = ImageDraw.Draw(canvas)
+    x, y = origin
+    draw.rectangle((x, y, x + MOSAIC_LABEL_SIZE, y + MOSAIC_LABEL_SIZE), fill=(0, 0, 0))
+    draw.text((x + 5, y + 3), label, fill=(255, 255, 255))
+
+
+def preprocess_mosaic_bytes(
+    uploads: List[Tuple[bytes, Optional[str], Optional[str]]],
+    perceptual_hash: bool = False,
+    profile: ImageProfile = DEFAULT_IMAGE_PROFILE,
+    quality_gate: str = "off",
+) -> Dict[str, Any]:
+    """같은 병변의 사진 2~4장을 번호 라벨이 붙은 모자이크 한 장으로 합성
+
+    모자이크 전체가 프로파일 해상도(max_edge) 안에 들어가도록 각 사진을 셀 크기로 축소 디코딩.
+    uploads: [(업로드 바이트, 파일명, MIME 타입), ...]
+    반환값은 preprocess_image_bytes와 같은 형식이며 image_info["tiles"]에 사진별 정보 기록
+    quality_gate가 reject면 사진 중 하나라도 품질 미달일 때 422 (issues에 사진 번호 포함)
+    """
+    columns, rows = _mosaic_grid(len(uploads))
+    cell = profile.max_edge // columns
+    canvas = Image.new("RGB", (columns * cell, rows * cell), MOSAIC_BACKGROUND)
+    tiles = []
+    try:
+        for index, (data, filename, content_type) in enumerate(uploads):
+            image = Image.open(_BufferReader(data))
+            tile_info = {
+                "label": str(index + 1),
+                "filename": filename,
+                "content_type": content_type,
+                "size": len(data),
+                "dimensions": image.size,
+                "format": image.format,
+            }
+            tile = decode_downscaled(image, (cell, cell))
+            if tile.mode != "RGB":
+                tile = tile.convert("RGB")
+            if quality_gate in ("annotate", "reject"):
+                tile_info["quality"] = assess_image_quality(tile, min(tile_info["dimensions"]))
+            column, row = index % columns, index // columns
+            origin = (column * cell, row * cell)
+            canvas.paste(tile, (origin[0] + (cell - tile.size[0]) // 2, origin[1] + (cell - tile.size[1]) // 2))
+            _draw_tile_label(canvas, origin, tile_info["label"])
+            tiles.append(tile_info)
+
+        if quality_gate == "reject":
+            failed = [tile for tile in tiles if not tile["quality"]["passed"]]
+            if failed:
+                _enforce_quality_gate({
+                    "passed": False,
+                    "issues": [f"{tile['label']}:{issue}" for tile in failed for issue in tile["quality"]["issues"]],
+                    "tiles": [tile["quality"] for tile in tiles],
+                })
+
+        image_info = {
+            "mosaic": True,
+            "layout": f"{columns}x{rows}",
+            "dimensions": canvas.size,
+            "size": sum(tile["size"] for tile in tiles),
+            "tiles": tiles,
         }
+        return _build_payload(canvas, image_info, profile, perceptual_hash)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"이미지 정보 추출 실패: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"이미지 처리 중 오류가 발생했습니다: {str(e)}")
@@ -0,0 +1,124 @@
+import importlib.util
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.rate_limits import openai_rate_scheduler
+
+if TYPE_CHECKING:
+    import httpx
+    from langchain_openai import ChatOpenAI
+
+# h2 미설치 시 HTTP/1.1 keep-alive만 사용 (import 없이 설치 여부만 확인)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+logger = logging.getLogger(__name__)
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+# (base_url, api_key, model, temperature, max_tokens, timeout)
+ChatModelKey = Tuple[str, str, str, float, int, float]
+
+
+class LLMClientRegistry:
+    """프로세스 전역 LLM 클라이언트 레지스트리
+
+    - base_url마다 keep-alive 커넥션 풀을 가진 httpx.AsyncClient 하나를 공유 (HTTP/2 가능 시 사용)
+    - ChatOpenAI는 (base_url, api_key, model, 샘플링 파라미터) 키로 한 번만 생성
+    - OpenAI 클라이언트에는 RPM/TPM 스케줄러 훅 연결 (LangChain/직접 호출 경로 모두 적용)
+    요청마다 새 클라이언트를 만들면 DNS+TCP+TLS 핸드셰이크를 매번 다시 하게 됨
+    httpx/langchain_openai는 첫 클라이언트 생성 시점에 import (app 기동 시간 단축)
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        http2: bool,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("h2 패키지가 없어 LLM 클라이언트를 HTTP/1.1 keep-alive로 사용합니다.")
+        self._lock = threading.Lock()
+        self._http_clients: Dict[str, "httpx.AsyncClient"] = {}
+        self._chat_models: Dict[ChatModelKey, "ChatOpenAI"] = {}
+
+    def http_client(self, base_url: Optional[str] = None) -> "httpx.AsyncClient":
+        """base_url별 공유 비동기 HTTP 클라이언트 (커넥션 풀)"""
+        import httpx
+
+        base_url = base_url or OPENAI_BASE_URL
+        with self._lock:
+            client = self._http_clients.get(base_url)
+            if client is None or client.is_closed:
+                limits = httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                )
+                # OpenAI 요청은 RPM/TPM 스케줄러를 거쳐 전송 (요청 전 대기, 응답 헤더로 한도 보정)
+                event_hooks = openai_rate_scheduler.event_hooks() if base_url == OPENAI_BASE_URL else None
+                client = httpx.AsyncClient(limits=limits, http2=self.http2, event_hooks=event_hooks)
+                self._http_clients[base_url] = client
+            return client
+
+    def chat_model(
+        self,
+        api_key: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        timeout: float,
+        base_url: Optional[str] = None,
+    ) -> "ChatOpenAI":
+        """동일 설정의 ChatOpenAI 인스턴스를 재사용 (공유 커넥션 풀 사용)"""
+        key: ChatModelKey = (base_url or OPENAI_BASE_URL, api_key, model, temperature, max_tokens, timeout)
+        with self._lock:
+            llm = self._chat_models.get(key)
+        if llm is not None:
+            return llm
+
+        from langchain_openai import ChatOpenAI
+
+        llm = ChatOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            http_async_client=self.http_client(base_url),
+        )
+        with self._lock:
+            return self._chat_models.setdefault(key, llm)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http_clients": len(self._http_clients),
+            "chat_models": len(self._chat_models),
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+        }
+
+    async def aclose(self) -> None:
+        """공유 HTTP 클라이언트 종료 (앱 종료 시)"""
+        with self._lock:
+            clients = list(self._http_clients.values())
+            self._http_clients.clear()
+            self._chat_models.clear()
+        for client in clients:
+            await client.aclose()
+
+
+llm_client_registry = LLMClientRegistry(
+    max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+    keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+    http2=settings.LLM_HTTP2,
+)
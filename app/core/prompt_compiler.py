@@ -0,0 +1,214 @@
+import importlib.util
+import logging
+import math
+import re
+import threading
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.generation_governor import generation_governor
+
+# tiktoken 미설치 시 추정 토큰 수만 사용 (import 없이 설치 여부만 확인)
+TIKTOKEN_AVAILABLE = importlib.util.find_spec("tiktoken") is not None
+
+logger = logging.getLogger(__name__)
+
+ESTIMATE_TOKENIZER = "estimate"
+
+# 영숫자 연속 | 한글 음절 연속 | 공백 연속 | 그 외 문자 하나
+_ESTIMATE_PIECE = re.compile(r"[A-Za-z0-9]+|[가-힣]+|\s+|.", re.DOTALL)
+
+# 진단 사용자 프롬프트 템플릿 (읽기 쉬운 형태로 작성, 컴파일 시 레이아웃 공백 제거)
+# 고정 지시문/스키마를 앞에, 요청별 값을 끝에 두어 시스템 프롬프트에 이어지는 공통 접두부를 길게 유지
+TEXT_DIAGNOSIS_TEMPLATE = """
+    아래 환자의 피부 병변 정보를 바탕으로 피부 병변을 진단하고, 지정된 XML 형식으로 응답해주세요.
+    {schema}
+
+    환자의 피부 병변 정보:
+    병변 설명: {description}
+    추가 정보: {additional_info}
+"""
+
+IMAGE_DIAGNOSIS_TEMPLATE = """
+    환자의 피부 병변 이미지를 분석해주세요.
+    이미지에서 관찰되는 피부 병변의 특징을 바탕으로 진단하고,
+    {schema}
+
+    추가 정보: {additional_info}
+"""
+
+# 시스템 프롬프트에도 있는 응답 스키마 (PROMPT_DROP_SCHEMA=true면 짧은 참조 문장으로 대체)
+TEXT_SCHEMA = """
+    반드시 다음 형식을 준수해야 합니다:
+
+    <root>
+    <label id_code="코드" score="점수">진단명</label>
+    <summary>진단소견</summary>
+    <similar_labels>
+    <similar_label id_code="코드" score="점수">유사질병명</similar_label>
+    <similar_label id_code="코드" score="점수">유사질병명</similar_label>
+    </similar_labels>
+    </root>
+"""
+
+IMAGE_SCHEMA = """
+    반드시 다음 XML 형식으로 응답해주세요:
+
+    <root>
+    <label id_code="코드" score="점수">진단명</label>
+    <summary>진단소견 (이미지에서 관찰된 구체적 특징 포함)</summary>
+    <similar_labels>
+    <similar_label id_code="코드" score="점수">유사질병명</similar_label>
+    <similar_label id_code="코드" score="점수">유사질병명</similar_label>
+    </similar_labels>
+    </root>
+"""
+
+TEXT_SCHEMA_REFERENCE = "반드시 시스템 프롬프트에 지정된 <root> XML 형식으로만 응답해주세요."
+IMAGE_SCHEMA_REFERENCE = (
+    "반드시 시스템 프롬프트에 지정된 <root> XML 형식으로만 응답하고, "
+    "summary에는 이미지에서 관찰된 구체적 특징을 포함해주세요."
+)
+
+NO_ADDITIONAL_INFO = "추가 정보 없음"
+
+
+def compact_layout(template: str) -> str:
+    """템플릿의 레이아웃 공백 제거
+
+    줄 앞뒤 들여쓰기와 빈 줄을 없애고, 태그로 끝나는 줄과 태그로 시작하는 줄은
+    줄바꿈 없이 이어 붙임 (<root>\\n<label> → <root><label>)
+    """
+    lines = [line.strip() for line in template.splitlines()]
+    compact = ""
+    for line in filter(None, lines):
+        if compact and not (compact.endswith(">") and line.startswith("<")):
+            compact += "\n"
+        compact += line
+    return compact
+
+
+def estimate_tokens(text: str) -> int:
+    """tiktoken 인코딩을 쓸 수 없을 때의 결정적 토큰 수 추정
+
+    영숫자 4자, 한글 2음절당 1토큰, 기호 1토큰, 2자 이상 공백 1토큰
+    (단어 앞 공백 하나는 다음 토큰에 합쳐지는 BPE 특성 반영)
+    """
+    tokens = 0
+    for piece in _ESTIMATE_PIECE.findall(text):
+        first = piece[0]
+        if first.isascii() and first.isalnum():
+            tokens += math.ceil(len(piece) / 4)
+        elif "가" <= first <= "힣":
+            tokens += math.ceil(len(piece) / 2)
+        elif first.isspace():
+            tokens += 0 if piece == " " else 1
+        else:
+            tokens += 1
+    return tokens
+
+
+class TokenCounter:
+    """로컬 프롬프트 토큰 수 계산 (네트워크 호출 없음)
+
+    tiktoken 인코딩은 load()에서 한 번 불러옴 (최초 사용 시 어휘 파일을 내려받으므로
+    요청 경로가 아닌 기동 워밍업에서 호출). 불러오기 전이거나 실패하면 estimate_tokens 사용
+    tiktoken은 requirements에 포함되지만 미설치/오프라인(어휘 파일 다운로드 실패) 환경에서는 추정값 (estimated=True로 구분)
+    """
+
+    def __init__(self, encoding_name: str):
+        self.encoding_name = encoding_name
+        self._encoding: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.encoding_name if self._encoding is not None else ESTIMATE_TOKENIZER
+
+    @property
+    def estimated(self) -> bool:
+        """실제 토크나이저가 아닌 estimate_tokens 추정값인지 여부"""
+        return self._encoding is None
+
+    def load(self) -> bool:
+        """tiktoken 인코딩 로딩 (성공 여부 반환, 블로킹 I/O이므로 스레드에서 호출)"""
+        if self._encoding is not None:
+            return True
+        if not TIKTOKEN_AVAILABLE:
+            logger.info("tiktoken 미설치 - 프롬프트 토큰 수는 추정값 사용")
+            return False
+        with self._lock:
+            try:
+                import tiktoken
+
+                self._encoding = tiktoken.get_encoding(self.encoding_name)
+            except Exception as e:
+                logger.warning(f"토큰 인코딩 로딩 실패 ({self.encoding_name}) - 추정값 사용: {e}")
+                return False
+        return True
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return estimate_tokens(text)
+
+
+class DiagnosisPromptCompiler:
+    """진단 사용자 프롬프트 컴파일러
+
+    - 템플릿은 생성 시 한 번 컴파일 (레이아웃 공백 제거, 스키마 삽입/생략), 요청마다 값만 채움
+    - drop_schema: 시스템 프롬프트에 이미 있는 XML 스키마를 사용자 프롬프트에서 반복하지 않음
+    - 요청마다 시스템/사용자 프롬프트 토큰 수를 세어 현재 생성 기록(메타데이터 prompt_tokens)에 남김
+    """
+
+    def __init__(self, drop_schema: bool, counter: TokenCounter):
+        self.drop_schema = drop_schema
+        self.counter = counter
+        self.text_template = self.compile(TEXT_DIAGNOSIS_TEMPLATE, TEXT_SCHEMA_REFERENCE if drop_schema else TEXT_SCHEMA)
+        self.image_template = self.compile(
+            IMAGE_DIAGNOSIS_TEMPLATE, IMAGE_SCHEMA_REFERENCE if drop_schema else IMAGE_SCHEMA
+        )
+        self._system_tokens: Dict[tuple, int] = {}
+
+    @staticmethod
+    def compile(template: str, schema: str) -> str:
+        return compact_layout(template.replace("{schema}", schema))
+
+    def text_prompt(self, description: str, additional_info: Optional[str], system_prompt: str) -> str:
+        prompt = self.text_template.format(
+            description=description.strip(),
+            additional_info=(additional_info or "").strip() or NO_ADDITIONAL_INFO,
+        )
+        self._record(system_prompt, prompt)
+        return prompt
+
+    def image_prompt(self, additional_info: Optional[str], system_prompt: str) -> str:
+        """이미지 진단 사용자 메시지의 텍스트 파트 (이미지 토큰은 집계하지 않음)"""
+        prompt = self.image_template.format(additional_info=(additional_info or "").strip() or NO_ADDITIONAL_INFO)
+        self._record(system_prompt, prompt)
+        return prompt
+
+    def system_tokens(self, system_prompt: str) -> int:
+        """시스템 프롬프트 토큰 수 (고정 문자열이므로 토크나이저별로 한 번만 계산)"""
+        key = (self.counter.name, system_prompt)
+        if key not in self._system_tokens:
+            self._system_tokens[key] = self.counter.count(system_prompt)
+        return self._system_tokens[key]
+
+    def count(self, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+        system = self.system_tokens(system_prompt)
+        user = self.counter.count(user_prompt)
+        return {
+            "system": system,
+            "user": user,
+            "total": system + user,
+            "tokenizer": self.counter.name,
+            "estimated": self.counter.estimated,
+        }
+
+    def _record(self, system_prompt: str, user_prompt: str) -> None:
+        generation_governor.note_prompt_tokens(self.count(system_prompt, user_prompt))
+
+
+prompt_token_counter = TokenCounter(settings.PROMPT_TOKENIZER)
+diagnosis_prompts = DiagnosisPromptCompiler(drop_schema=settings.PROMPT_DROP_SCHEMA, counter=prompt_token_counter)
@@ -0,0 +1,78 @@
+import threading
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Tuple
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+
+# 진단 프롬프트 버전 (시스템 프롬프트/사용자 템플릿 변경 시 올려서 결과 캐시 무효화, 스키마 생략 프롬프트는 별도 버전)
+PROMPT_VERSION = "v3" + ("-noschema" if settings.PROMPT_DROP_SCHEMA else "")
+
+SKIN_DIAGNOSIS = "skin_diagnosis"
+
+# 피부 병변 진단 시스템 프롬프트 (모든 진단 프로바이더/서비스 공용, 요청별 값이 없는 정적 접두부)
+DIAGNOSIS_SYSTEM_PROMPT = """너는 피부 병변을 진단하는 전문 AI이다. 다음은 네가 진단할 수 있는 피부 병변 목록이며, 각 병변의 임상적 특징은 아래와 같다. 환자에게 나타난 병변의 이미지와 설명을 바탕으로 가장 적합한 질병을 하나 선택하여 진단하라.
+아래 진단 기준을 참조하여 이미지에서 어떤 특징이 해당 질병의 특징에 해당되는지 설명하라
+
+0: 광선각화증
+1: 기저세포암
+2: 멜라닌세포모반
+3: 보웬병
+4: 비립종
+5: 사마귀
+6: 악성흑색종
+7: 지루각화증
+8: 편평세포암
+9: 표피낭종
+10: 피부섬유종
+11: 피지샘증식증
+12: 혈관종
+13: 화농 육아종
+14: 흑색점
+
+<root><label id_code="{코드}" score="{점수}">{진단명}</label><summary>{진단소견}</summary><similar_labels><similar_label id_code="{코드}" score="{점수}">{유사질병명}</similar_label><similar_label id_code="{코드}" score="{점수}">{유사질병명}</similar_label></similar_labels></root>
+
+예시:
+<root><label id_code="0" score="67.6">광선각화증</label><summary>이미지에서는 자외선 노출이 많은 부위인 얼굴에 붉은색의 각질성 반점이 관찰됩니다. 이는 만성 자외선 노출로 인한 DNA 손상으로 발생하며, 장기간 방치할 경우 피부암, 특히 편평세포암으로의 진행 가능성이 있습니다. 병변의 진행 속도가 느릴 수 있으나, 조기 발견 시 적절한 치료를 통해 예후를 양호하게 할 수 있습니다.</summary><similar_labels><similar_label id_code="3" score="16.6">보웬병</similar_label><similar_label id_code="1" score="5.7">기저세포암</similar_label></similar_labels></root>
+
+⚠️ 의료 면책 조항: 이 진단은 참고용이며, 최종 진단은 반드시 의료진과 상담하세요."""
+
+
+class PromptRegistry:
+    """버전이 붙은 프롬프트 레지스트리
+
+    - 이름별 시스템 프롬프트를 한 곳에서 관리 (프로바이더/서비스 간 복사본 없음)
+    - 정적 접두 메시지(SystemMessage)는 프로세스당 한 번 만들어 모든 호출이 같은 튜플을 공유
+      (요청마다 메시지를 새로 만들지 않음, 공유 인스턴스이므로 수정 금지)
+    - 메시지는 항상 정적 접두부 → 요청별 사용자 메시지 순서라 프로바이더 측 프롬프트 접두 캐시가 적중
+    """
+
+    def __init__(self, version: str, system_prompts: Mapping[str, str]):
+        self.version = version
+        self._system_prompts = MappingProxyType(dict(system_prompts))
+        self._prefixes: Dict[str, Tuple["BaseMessage", ...]] = {}
+        self._lock = threading.Lock()
+
+    def system_prompt(self, name: str) -> str:
+        return self._system_prompts[name]
+
+    def prefix_messages(self, name: str) -> Tuple["BaseMessage", ...]:
+        """정적 접두 메시지 (첫 사용 시 생성, langchain은 이때 import)"""
+        prefix = self._prefixes.get(name)
+        if prefix is None:
+            from langchain_core.messages import SystemMessage
+
+            with self._lock:
+                prefix = self._prefixes.setdefault(name, (SystemMessage(content=self._system_prompts[name]),))
+        return prefix
+
+    def messages(self, name: str, user_content: Any) -> List["BaseMessage"]:
+        """정적 접두 메시지 뒤에 요청별 사용자 메시지를 붙인 LangChain 메시지 목록"""
+        from langchain_core.messages import HumanMessage
+
+        return [*self.prefix_messages(name), HumanMessage(content=user_content)]
+
+
+prompt_registry = PromptRegistry(PROMPT_VERSION, {SKIN_DIAGNOSIS: DIAGNOSIS_SYSTEM_PROMPT})
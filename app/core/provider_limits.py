@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, TypeVar
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _ProviderSlots:
+    """프로바이더 하나의 동시 호출 슬롯과 FIFO 대기열"""
+
+    __slots__ = (
+        "limit", "in_flight", "waiters", "accepted", "queued", "rejected", "timeouts",
+        "max_queued", "waits", "hold_seconds",
+    )
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiters: Deque["asyncio.Future[None]"] = deque()
+        self.accepted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.max_queued = 0
+        self.waits: Deque[float] = deque(maxlen=window)
+        self.hold_seconds = 0.0
+
+
+class ProviderConcurrencyLimiter:
+    """프로바이더(runpod/openai)별 동시 LLM 호출 상한과 대기열
+
+    - 프로바이더마다 동시 호출 limit개, 넘으면 최대 queue_size개까지 도착 순서대로 대기
+    - 대기열이 가득 차거나 queue_timeout(초) 안에 슬롯을 못 받으면 즉시 503 + Retry-After
+      (대기 코루틴이 쌓이거나 프로바이더 429/타임아웃 → 재시도로 부하가 커지는 것 방지)
+    - 끝난 호출의 슬롯은 다음 대기자에게 바로 넘김, limit이 0이면 제한 없음
+    - 이벤트 루프에 묶이는 asyncio.Semaphore 대신 요청별 Future로 대기 (ImageWorkerPool처럼 프로세스 전역)
+    """
+
+    def __init__(self, limits: Dict[str, int], queue_size: int, queue_timeout: float, window: int = 500):
+        self.limits = {name: max(0, limit) for name, limit in limits.items()}
+        self.queue_size = max(0, queue_size)
+        self.queue_timeout = queue_timeout
+        self.window = window
+        self._slots: Dict[str, _ProviderSlots] = {}
+
+    def _get(self, name: str) -> _ProviderSlots:
+        slots = self._slots.get(name)
+        if slots is None:
+            slots = self._slots[name] = _ProviderSlots(self.limits.get(name, 0), self.window)
+        return slots
+
+    def _overloaded(self, name: str, slots: _ProviderSlots, reason: str) -> HTTPException:
+        # 슬롯 하나가 비는 데 걸리는 평균 호출 시간을 재시도 간격으로 안내
+        retry_after = max(1, math.ceil(slots.hold_seconds))
+        logger.warning(f"프로바이더 동시 호출 초과 - {name}: {reason} (처리 중 {slots.in_flight}, 대기 {len(slots.waiters)})")
+        return HTTPException(
+            status_code=503,
+            detail="AI 진단 요청이 많아 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    async def acquire(self, name: str) -> None:
+        slots = self._get(name)
+        if slots.limit == 0:
+            return
+        if slots.in_flight < slots.limit and not slots.waiters:
+            slots.in_flight += 1
+            slots.accepted += 1
+            slots.waits.append(0.0)
+            return
+        if len(slots.waiters) >= self.queue_size:
+            slots.rejected += 1
+            raise self._overloaded(name, slots, "대기열 가득 참")
+
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        slots.waiters.append(future)
+        slots.queued += 1
+        slots.max_queued = max(slots.max_queued, len(slots.waiters))
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # 슬롯을 넘겨받은 직후 취소됨 → 다음 대기자에게 반환
+                self._release(slots)
+            else:
+                future.cancel()
+                try:
+                    slots.waiters.remove(future)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.TimeoutError):
+                slots.timeouts += 1
+                raise self._overloaded(name, slots, f"대기 {self.queue_timeout:g}s 초과") from None
+            raise
+        slots.accepted += 1
+        slots.waits.append(time.monotonic() - started)
+
+    def _release(self, slots: _ProviderSlots) -> None:
+        while slots.waiters:
+            future = slots.waiters.popleft()
+            if not future.done():
+                # in_flight는 그대로 두고 슬롯을 다음 대기자에게 넘김
+                future.set_result(None)
+                return
+        slots.in_flight -= 1
+
+    def release(self, name: str, held: float) -> None:
+        slots = self._get(name)
+        if slots.limit == 0:
+            return
+        slots.hold_seconds = held if not slots.hold_seconds else slots.hold_seconds + 0.2 * (held - slots.hold_seconds)
+        self._release(slots)
+
+    async def run(self, name: str, call: Callable[[], Awaitable[T]]) -> T:
+        """name 프로바이더 슬롯을 받아 call() 실행"""
+        await self.acquire(name)
+        started = time.monotonic()
+        try:
+            return await call()
+        finally:
+            self.release(name, time.monotonic() - started)
+
+    async def stream(self, name: str, chunks: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """name 프로바이더 슬롯을 받은 뒤 스트리밍 응답이 끝날 때까지 점유하는 chunks() 스트림 반환
+
+        슬롯은 응답 시작 전에 받으므로 과부하 503(Retry-After)이 SSE error 이벤트가 아닌 HTTP 오류로 전달됨
+        """
+        await self.acquire(name)
+        return self._held_stream(name, chunks())
+
+    async def _held_stream(self, name: str, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+        started = time.monotonic()
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            # 클라이언트가 중간에 끊어도 프로바이더 연결을 닫고 슬롯을 바로 반환
+            await chunks.aclose()
+            self.release(name, time.monotonic() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        providers = {}
+        for name in sorted(set(self.limits) | set(self._slots)):
+            slots = self._get(name)
+            waits = sorted(slots.waits)
+            providers[name] = {
+                "limit": slots.limit or None,
+                "in_flight": slots.in_flight,
+                "queue_depth": len(slots.waiters),
+                "max_queue_depth": slots.max_queued,
+                "accepted": slots.accepted,
+                "queued": slots.queued,
+                "rejected": slots.rejected,
+                "queue_timeouts": slots.timeouts,
+                "wait_p50": round(waits[len(waits) // 2], 3) if waits else 0.0,
+                "wait_p95": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))], 3) if waits else 0.0,
+                "wait_max": round(waits[-1], 3) if waits else 0.0,
+                "call_seconds_ewma": round(slots.hold_seconds, 3),
+            }
+        return {
+            "queue_size": self.queue_size,
+            "queue_timeout": self.queue_timeout,
+            "providers": providers,
+        }
+
+
+provider_limiter = ProviderConcurrencyLimiter(
+    limits={
+        "runpod": settings.PROVIDER_CONCURRENCY_RUNPOD,
+        "openai": settings.PROVIDER_CONCURRENCY_OPENAI,
+    },
+    queue_size=settings.PROVIDER_QUEUE_SIZE,
+    queue_timeout=settings.PROVIDER_QUEUE_TIMEOUT,
+)
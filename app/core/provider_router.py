@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TEXT_ROUTE = "text"
+IMAGE_ROUTE = "image"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_timeout(error: BaseException) -> bool:
+    """타임아웃 계열 예외 여부 (asyncio/httpx/openai 타임아웃 포함)"""
+    return isinstance(error, (asyncio.TimeoutError, TimeoutError)) or "timeout" in type(error).__name__.lower()
+
+
+class _ProviderHealth:
+    """경로(text/image)별 프로바이더 상태: EWMA 응답 시간/오류율, 서킷 브레이커"""
+
+    __slots__ = (
+        "latency", "error_rate", "samples", "requests", "failures", "timeouts",
+        "consecutive_failures", "state", "opened_at", "opens", "probe_started", "routed",
+    )
+
+    def __init__(self):
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.samples = 0
+        self.requests = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.opens = 0
+        self.probe_started: Optional[float] = None
+        self.routed = 0
+
+
+class ProviderRouter:
+    """응답 시간/오류율 기반 진단 프로바이더 라우팅 (runpod↔openai)
+
+    - 프로바이더별 응답 시간과 오류율을 EWMA로 추적 (타임아웃은 실패로 집계하고 응답 시간에도 반영)
+    - 연속 실패 failure_threshold회 또는 오류율 error_rate_threshold 이상(min_samples 이후)이면 서킷 open,
+      open_seconds 뒤 half-open에서 요청 하나만 시험(probe)으로 보내 성공하면 closed, 실패하면 다시 open
+    - 설정된 프로바이더가 open이면 다른 프로바이더로 보내고, 둘 다 정상이어도 설정된 쪽 응답 시간이
+      다른 쪽의 latency_ratio배를 넘으면 다른 쪽으로 이동 (회복 확인용으로 probe_ratio만큼은 계속 설정된 쪽)
+    - 다른 프로바이더가 설정되지 않았거나 라우터 비활성이면 항상 설정된 프로바이더
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        alpha: float,
+        failure_threshold: int,
+        error_rate_threshold: float,
+        min_samples: int,
+        open_seconds: float,
+        latency_ratio: float,
+        probe_ratio: float,
+        probe_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.enabled = enabled
+        self.alpha = alpha
+        self.failure_threshold = max(1, failure_threshold)
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = max(1, min_samples)
+        self.open_seconds = open_seconds
+        self.latency_ratio = latency_ratio
+        self.probe_ratio = probe_ratio
+        self.probe_timeout = probe_timeout
+        self._clock = clock
+        self._rng = rng
+        self._lock = threading.Lock()
+        self._health: Dict[Tuple[str, str], _ProviderHealth] = {}
+
+    def _get(self, route: str, name: str) -> _ProviderHealth:
+        return self._health.setdefault((route, name), _ProviderHealth())
+
+    def _refresh(self, health: _ProviderHealth, now: float) -> str:
+        if health.state == OPEN and now - health.opened_at >= self.open_seconds:
+            health.state = HALF_OPEN
+            health.probe_started = None
+        return health.state
+
+    def _available(self, health: _ProviderHealth, now: float) -> bool:
+        state = self._refresh(health, now)
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN:
+            # 시험 요청은 하나만, 결과가 기록되지 않은 시험은 probe_timeout 뒤 만료
+            return health.probe_started is None or now - health.probe_started >= self.probe_timeout
+        return False
+
+    def _slower(self, preferred: _ProviderHealth, alternate: _ProviderHealth) -> bool:
+        if self.latency_ratio <= 0 or preferred.latency is None or alternate.latency is None:
+            return False
+        if preferred.samples < self.min_samples or alternate.samples < self.min_samples:
+            return False
+        return alternate.state == CLOSED and preferred.latency > self.latency_ratio * alternate.latency
+
+    def choose(self, route: str, preferred: str, alternate: Optional[str], claim: bool = True) -> str:
+        """route 요청을 보낼 프로바이더 이름
+
+        claim=False는 조회만 (half-open 시험 슬롯을 차지하지 않고 라우팅 횟수도 세지 않음)
+        """
+        if not self.enabled or alternate is None:
+            return preferred
+        now = self._clock()
+        with self._lock:
+            primary, other = self._get(route, preferred), self._get(route, alternate)
+            primary_ok, other_ok = self._available(primary, now), self._available(other, now)
+            if primary_ok and other_ok and self._slower(primary, other) and self._rng() >= self.probe_ratio:
+                chosen = alternate
+            elif primary_ok or not other_ok:
+                # 둘 다 차단이면 설정된 프로바이더로
+                chosen = preferred
+            else:
+                chosen = alternate
+            if claim:
+                self._claim(primary if chosen == preferred else other, now)
+        return chosen
+
+    def _claim(self, health: _ProviderHealth, now: float) -> None:
+        # 진행 중인 시험 요청이 있으면 시작 시각을 덮어쓰지 않음 (시험 요청은 하나만)
+        if health.state == HALF_OPEN and self._available(health, now):
+            health.probe_started = now
+        health.routed += 1
+
+    def claim(self, route: str, name: str) -> bool:
+        """이미 고른 프로바이더(choose(claim=False) 결과)로 실제 요청을 보낼 때 기록 (half-open이면 시험 슬롯 차지)
+
+        그 사이 서킷이 열렸거나 half-open 시험 요청이 이미 진행 중이면 차지하지 않고 False
+        """
+        if not self.enabled:
+            return True
+        now = self._clock()
+        with self._lock:
+            health = self._get(route, name)
+            if not self._available(health, now):
+                return False
+            self._claim(health, now)
+            return True
+
+    def record_success(self, route: str, name: str, latency: float) -> None:
+        with self._lock:
+            health = self._get(route, name)
+            health.requests += 1
+            health.samples += 1
+            health.latency = latency if health.latency is None else health.latency + self.alpha * (latency - health.latency)
+            health.error_rate *= 1 - self.alpha
+            health.consecutive_failures = 0
+            health.probe_started = None
+            if health.state != CLOSED:
+                health.state = CLOSED
+                health.error_rate = 0.0
+                logger.info(f"프로바이더 회복 - {route}/{name}, 서킷 closed")
+
+    def record_failure(self, route: str, name: str, latency: float, timeout: bool = False) -> None:
+        now = self._clock()
+        with self._lock:
+            health = self._get(route, name)
+            health.requests += 1
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.error_rate += self.alpha * (1.0 - health.error_rate)
+            health.probe_started = None
+            if timeout:
+                # 타임아웃까지 걸린 시간도 응답 시간으로 반영 (느려지는 프로바이더 감지)
+                health.timeouts += 1
+                health.samples += 1
+                health.latency = latency if health.latency is None else health.latency + self.alpha * (latency - health.latency)
+            state = self._refresh(health, now)
+            tripped = health.consecutive_failures >= self.failure_threshold or (
+                health.requests >= self.min_samples and health.error_rate >= self.error_rate_threshold
+            )
+            if state == HALF_OPEN or (state == CLOSED and tripped):
+                health.state = OPEN
+                health.opened_at = now
+                health.opens += 1
+                logger.warning(
+                    f"프로바이더 서킷 open - {route}/{name}, 연속 실패 {health.consecutive_failures}회, "
+                    f"오류율 {health.error_rate:.2f}, {self.open_seconds:.0f}s 뒤 시험 요청"
+                )
+
+    def record_lower_bound(self, route: str, name: str, latency: float) -> None:
+        """응답 전에 취소된 요청(헤지 패배 등)의 경과 시간을 응답 시간 하한으로 반영
+
+        성공/실패로 세지 않고, 현재 EWMA보다 길 때만 응답 시간 표본으로 기록 (느려진 프로바이더 감지)
+        """
+        with self._lock:
+            health = self._get(route, name)
+            if health.latency is None or latency > health.latency:
+                health.samples += 1
+                health.latency = latency if health.latency is None else health.latency + self.alpha * (latency - health.latency)
+
+    def release(self, route: str, name: str) -> None:
+        """결과 없이 끝난 요청(헤지 패배 취소 등)의 시험 슬롯 반환"""
+        with self._lock:
+            self._get(route, name).probe_started = None
+
+    async def observe(self, route: str, name: str, call: Awaitable[Any]) -> Any:
+        """call을 기다리며 결과(응답 시간/실패/타임아웃)를 name 프로바이더 상태에 기록"""
+        started = time.monotonic()
+        try:
+            result = await call
+        except asyncio.CancelledError:
+            self.release(route, name)
+            raise
+        except Exception as e:
+            self.record_failure(route, name, time.monotonic() - started, timeout=is_timeout(e))
+            raise
+        self.record_success(route, name, time.monotonic() - started)
+        return result
+
+    async def observe_stream(self, route: str, name: str, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+        """observe의 스트리밍판 — 끝까지 받으면 성공, 도중 오류는 실패, 클라이언트가 끊으면 시험 슬롯만 반환"""
+        started = time.monotonic()
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            self.release(route, name)
+            raise
+        except Exception as e:
+            self.record_failure(route, name, time.monotonic() - started, timeout=is_timeout(e))
+            raise
+        finally:
+            # 중간에 닫혀도 안쪽 스트림(프로바이더 연결/동시 호출 슬롯)을 바로 정리
+            await chunks.aclose()
+        self.record_success(route, name, time.monotonic() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        now = self._clock()
+        routes: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (route, name), health in sorted(self._health.items()):
+                state = self._refresh(health, now)
+                routes.setdefault(route, {})[name] = {
+                    "state": state,
+                    "latency_ewma": round(health.latency, 3) if health.latency is not None else None,
+                    "error_rate_ewma": round(health.error_rate, 4),
+                    "requests": health.requests,
+                    "failures": health.failures,
+                    "timeouts": health.timeouts,
+                    "consecutive_failures": health.consecutive_failures,
+                    "opens": health.opens,
+                    "routed": health.routed,
+                    "retry_in_seconds": round(max(0.0, health.opened_at + self.open_seconds - now), 1) if state == OPEN else None,
+                }
+        return {
+            "enabled": self.enabled,
+            "failure_threshold": self.failure_threshold,
+            "error_rate_threshold": self.error_rate_threshold,
+            "open_seconds": self.open_seconds,
+            "latency_ratio": self.latency_ratio,
+            "routes": routes,
+        }
+
+
+provider_router = ProviderRouter(
+    enabled=settings.PROVIDER_ROUTER_ENABLED,
+    alpha=settings.PROVIDER_ROUTER_EWMA_ALPHA,
+    failure_threshold=settings.PROVIDER_ROUTER_FAILURE_THRESHOLD,
+    error_rate_threshold=settings.PROVIDER_ROUTER_ERROR_RATE,
+    min_samples=settings.PROVIDER_ROUTER_MIN_SAMPLES,
+    open_seconds=settings.PROVIDER_ROUTER_OPEN_SECONDS,
+    latency_ratio=settings.PROVIDER_ROUTER_LATENCY_RATIO,
+    probe_ratio=settings.PROVIDER_ROUTER_PROBE_RATIO,
+    probe_timeout=settings.REQUEST_TIMEOUT,
+)
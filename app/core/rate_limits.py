@@ -0,0 +1,297 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional
+
+import orjson
+
+from app.core.config import settings
+from app.core.prompt_compiler import prompt_token_counter
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# 메시지당 역할/구분 토큰, 응답 시작 토큰 (chat 형식 고정 비용)
+MESSAGE_OVERHEAD_TOKENS = 3
+REPLY_PRIMING_TOKENS = 3
+# 이미지 파트 토큰: detail=low는 고정 85, high/auto는 512px 타일 4장 기준 (85 + 170 × 4)
+LOW_DETAIL_IMAGE_TOKENS = 85
+HIGH_DETAIL_IMAGE_TOKENS = 765
+
+# 본문의 data URL 값 (토큰 추정 전에 비워서 이미지 base64를 JSON 파싱하지 않음)
+_DATA_URL_START = b'"data:'
+
+# 동시 호출 슬롯 전에 미리 받은 예산 (이 컨텍스트의 다음 chat/completions 요청 1건은 훅에서 다시 예약하지 않음)
+# 헤지 태스크 등 복사된 컨텍스트에서도 소진 여부를 공유하도록 리스트로 보관
+_prepaid: ContextVar[Optional[List[int]]] = ContextVar("openai_rate_prepaid", default=None)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _strip_data_urls(body: bytes) -> bytes:
+    """요청 본문에서 data URL 문자열 값을 빈 문자열로 바꾼 사본 (base64에는 따옴표/이스케이프가 없음)"""
+    start = body.find(_DATA_URL_START)
+    if start < 0:
+        return body
+    pieces = []
+    end = 0
+    while start >= 0:
+        close = body.find(b'"', start + 1)
+        if close < 0:
+            break
+        pieces.append(body[end:start + 1])
+        end = close
+        start = body.find(_DATA_URL_START, close + 1)
+    pieces.append(body[end:])
+    return b"".join(pieces)
+
+
+def image_tokens(detail: Optional[str]) -> int:
+    return LOW_DETAIL_IMAGE_TOKENS if detail == "low" else HIGH_DETAIL_IMAGE_TOKENS
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """x-ratelimit-reset-* / retry-after 값("20ms", "1s", "6m0s", "2")을 초로 변환"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+class TokenBucket:
+    """분당 한도 토큰 버킷 (예약 방식)
+
+    요청마다 비용을 바로 차감하고, 잔량이 음수가 되면 그만큼 채워질 때까지의 시간을 대기 시간으로 반환
+    (먼저 예약한 요청이 먼저 나가므로 대기열 없이 순서 유지). capacity가 0이면 한도 미지정 → 대기 없음
+    """
+
+    def __init__(self, capacity: float, clock: Callable[[], float]):
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / 60.0
+
+    def _refill(self, now: float) -> None:
+        if self.capacity > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """amount 차감 후 필요한 대기 시간(초)"""
+        now = self._clock()
+        self._refill(now)
+        if self.capacity <= 0:
+            return 0.0
+        self.tokens -= min(amount, self.capacity)
+        return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, amount: float) -> None:
+        if self.capacity > 0:
+            self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+    def sync(self, limit: Optional[float], remaining: Optional[float]) -> None:
+        """응답 헤더의 한도/잔량 반영 (잔량은 더 적을 때만, 아직 응답 전인 예약분은 유지)"""
+        self._refill(self._clock())
+        if limit and limit != self.capacity:
+            if self.capacity <= 0:
+                self.tokens = limit
+            self.capacity = limit
+        if remaining is not None and self.capacity > 0:
+            self.tokens = min(self.tokens, remaining)
+
+
+class OpenAIRateScheduler:
+    """OpenAI 분당 요청 수(RPM)/토큰 수(TPM) 클라이언트 측 스케줄러
+
+    - 공유 OpenAI HTTP 클라이언트의 요청 훅에서 chat/completions 요청 본문으로 비용 추정
+      (프롬프트 토큰 + 이미지 파트 + max_tokens, OpenAI가 한도 계산에 쓰는 방식과 동일하게 출력 상한을 예약,
+      이미지 data URL은 파싱하지 않고 텍스트 파트만 셈)
+    - 진단 호출은 프로바이더가 추정한 비용으로 동시 호출 슬롯을 받기 전에 prepay → 한도 대기가 슬롯 점유나
+      라우터/헤지 응답 시간에 들어가지 않음, 훅은 그 요청을 다시 예약하지 않음 (SDK 재시도는 훅에서 예약)
+    - RPM/TPM 버킷에서 차감하고 부족하면 채워질 때까지만 대기 후 전송 (429 후 재시도 왕복 제거)
+    - 응답 훅에서 x-ratelimit-limit/remaining-* 헤더로 버킷 한도/잔량 보정,
+      429면 retry-after(없으면 reset 헤더)까지 이후 요청 보류
+    - rpm/tpm이 0이면 첫 응답 헤더에서 한도를 학습
+    - 대기는 최대 max_wait초 (넘으면 그대로 전송해 서버 429/SDK 재시도에 맡김). 훅에서 예외를 내면
+      OpenAI SDK가 연결 오류로 감싸 재시도하므로 요청을 거절하지 않음
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        rpm: int,
+        tpm: int,
+        max_wait: float,
+        default_max_tokens: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.enabled = enabled
+        self.max_wait = max_wait
+        self.default_max_tokens = default_max_tokens
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.requests = TokenBucket(rpm, clock)
+        self.tokens = TokenBucket(tpm, clock)
+        self._paused_until = 0.0
+        self.scheduled = 0
+        self.delayed = 0
+        self.capped = 0
+        self.rate_limited = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def cost(
+        self,
+        prompt_tokens: int,
+        messages: int,
+        images: Iterable[Optional[str]] = (),
+        max_tokens: Optional[int] = None,
+        n: int = 1,
+    ) -> int:
+        """프롬프트 토큰 수, 메시지 수, 이미지 파트 detail 목록으로 요청 비용 계산 (출력 상한 포함)"""
+        images_total = sum(image_tokens(detail) for detail in images)
+        output = (max_tokens or self.default_max_tokens) * n
+        return REPLY_PRIMING_TOKENS + MESSAGE_OVERHEAD_TOKENS * messages + prompt_tokens + images_total + output
+
+    def estimate(self, body: bytes) -> int:
+        """chat/completions 요청 본문의 토큰 비용 추정 (이미지 data URL은 비우고 파싱)"""
+        try:
+            payload = orjson.loads(_strip_data_urls(body))
+        except orjson.JSONDecodeError:
+            return self.default_max_tokens
+        messages: List[Dict[str, Any]] = payload.get("messages") or []
+        prompt_tokens = 0
+        images: List[Optional[str]] = []
+        for message in messages:
+            content = message.get("content")
+            if isinstance(content, str):
+                prompt_tokens += prompt_token_counter.count(content)
+                continue
+            for part in content or []:
+                if part.get("type") == "text":
+                    prompt_tokens += prompt_token_counter.count(part.get("text", ""))
+                elif part.get("type") == "image_url":
+                    images.append((part.get("image_url") or {}).get("detail", "auto"))
+        max_tokens = payload.get("max_completion_tokens") or payload.get("max_tokens")
+        return self.cost(prompt_tokens, len(messages), images, max_tokens, payload.get("n", 1))
+
+    async def acquire(self, cost: int) -> float:
+        """RPM 1, TPM cost를 예약하고 필요한 만큼 대기 (대기 시간 반환)"""
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            wait = max(
+                self.requests.reserve(1),
+                self.tokens.reserve(cost),
+                self._paused_until - self._clock(),
+                0.0,
+            )
+            if wait > self.max_wait:
+                self.capped += 1
+                wait = self.max_wait
+            self.scheduled += 1
+            if wait > 0:
+                self.delayed += 1
+                self.wait_total += wait
+                self.wait_max = max(self.wait_max, wait)
+        if wait > 0:
+            logger.info(f"OpenAI 요청 한도 대기 {wait:.2f}s (추정 {cost} 토큰)")
+            await asyncio.sleep(wait)
+        return wait
+
+    async def prepay(self, cost: int) -> float:
+        """동시 호출 슬롯을 받기 전에 RPM 1, TPM cost를 예약하고 대기 (이 컨텍스트의 다음 요청은 훅에서 건너뜀)"""
+        if not self.enabled:
+            return 0.0
+        wait = await self.acquire(cost)
+        _prepaid.set([cost])
+        return wait
+
+    def observe(self, status_code: int, headers: Any) -> None:
+        """응답 헤더로 버킷 보정, 429면 이후 요청 보류"""
+        if not self.enabled:
+            return
+
+        def number(name: str) -> Optional[float]:
+            try:
+                return float(headers[name]) if name in headers else None
+            except ValueError:
+                return None
+
+        with self._lock:
+            self.requests.sync(number("x-ratelimit-limit-requests"), number("x-ratelimit-remaining-requests"))
+            self.tokens.sync(number("x-ratelimit-limit-tokens"), number("x-ratelimit-remaining-tokens"))
+            if status_code == 429:
+                self.rate_limited += 1
+                pause = parse_reset(headers.get("retry-after")) or max(
+                    parse_reset(headers.get("x-ratelimit-reset-requests")) or 0.0,
+                    parse_reset(headers.get("x-ratelimit-reset-tokens")) or 0.0,
+                ) or 1.0
+                self._paused_until = max(self._paused_until, self._clock() + pause)
+                logger.warning(f"OpenAI 429 - {pause:.2f}s 동안 요청 보류")
+
+    async def on_request(self, request: "httpx.Request") -> None:
+        if request.method == "POST" and request.url.path.endswith("/chat/completions"):
+            ticket = _prepaid.get()
+            if ticket:
+                # prepay로 이미 예약한 요청 (재시도는 다시 예약)
+                ticket.pop()
+                return
+            try:
+                body = request.content
+            except Exception:  # 스트리밍 업로드 본문 (chat/completions는 해당 없음)
+                body = b""
+            await self.acquire(self.estimate(body))
+
+    async def on_response(self, response: "httpx.Response") -> None:
+        if response.request.url.path.endswith("/chat/completions"):
+            self.observe(response.status_code, response.headers)
+
+    def event_hooks(self) -> Dict[str, List[Callable[..., Any]]]:
+        """httpx.AsyncClient event_hooks (공유 OpenAI 클라이언트에 연결)"""
+        return {"request": [self.on_request], "response": [self.on_response]}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self._clock()
+            self.requests._refill(now)
+            self.tokens._refill(now)
+            return {
+                "enabled": self.enabled,
+                "rpm_limit": self.requests.capacity or None,
+                "rpm_available": round(self.requests.tokens, 1),
+                "tpm_limit": self.tokens.capacity or None,
+                "tpm_available": round(self.tokens.tokens),
+                "paused_seconds": round(max(0.0, self._paused_until - now), 2),
+                "scheduled": self.scheduled,
+                "delayed": self.delayed,
+                "capped": self.capped,
+                "rate_limited_429": self.rate_limited,
+                "wait_avg": round(self.wait_total / self.delayed, 3) if self.delayed else 0.0,
+                "wait_max": round(self.wait_max, 3),
+            }
+
+
+openai_rate_scheduler = OpenAIRateScheduler(
+    enabled=settings.OPENAI_RATE_LIMIT_ENABLED,
+    rpm=settings.OPENAI_RPM,
+    tpm=settings.OPENAI_TPM,
+    max_wait=settings.OPENAI_RATE_MAX_WAIT,
+    default_max_tokens=settings.MAX_TOKENS,
+)
@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+
+from app.core.config import settings
+from app.core.generation_governor import GenerationRecord, generation_governor
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """키용 텍스트 정규화 (앞뒤/연속 공백 차이는 같은 요청으로 취급)"""
+    return " ".join((text or "").split())
+
+
+def model_config(llm: Any) -> Tuple[Any, ...]:
+    """ChatOpenAI 또는 직접 호출 클라이언트의 (base_url, model, temperature, max_tokens)"""
+    if llm is None:
+        return ()
+    if hasattr(llm, "openai_api_base"):
+        return llm.openai_api_base, llm.model_name, llm.temperature, llm.max_tokens
+    return llm.base_url, llm.model, llm.temperature, llm.max_tokens
+
+
+def flight_key(*parts: Any) -> str:
+    """정규화된 입력 + 모델 설정으로 single-flight 키 생성 (dict는 키 정렬)"""
+    raw = orjson.dumps(parts, option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.sha256(raw).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Future[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """동일 입력의 동시 LLM 호출 합치기 (single-flight)
+
+    - 같은 키로 진행 중인 호출이 있으면 새로 호출하지 않고 그 결과(또는 예외)를 함께 기다림
+    - 완료되면 키를 비움 (결과 캐시가 아님, 이후 요청은 새로 호출)
+    - 대기자 하나가 취소되어도 공유 호출은 계속 진행, 마지막 대기자가 취소되면 공유 호출도 취소
+    - 합류한 요청은 첫 요청의 생성 기록(프롬프트/출력 토큰 등)을 메타데이터로 물려받고 coalesced로 표시
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._flights: Dict[str, _Flight] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    def _finished(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await call()
+
+        leader_record = generation_governor.current()
+
+        async def run() -> Tuple[Any, Optional[GenerationRecord]]:
+            # 첫 요청의 컨텍스트에서 실행되므로 첫 요청의 생성 기록이 채워짐
+            return await call(), generation_governor.current()
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(run()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, key=key, flight=flight: self._finished(key, flight))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            result, record = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # 기다리는 요청이 더 없으면 공유 호출 중단, 새 요청은 새로 호출
+                flight.task.cancel()
+                self._finished(key, flight)
+                self.cancelled += 1
+            raise
+        finally:
+            flight.waiters -= 1
+
+        if record is not None and record is not leader_record:
+            generation_governor.adopt(record)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "waiters": sum(flight.waiters for flight in self._flights.values()),
+            "max_waiters": max((flight.waiters for flight in self._flights.values()), default=0),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+        }
+
+
+llm_flights = SingleFlight(enabled=settings.SINGLE_FLIGHT_ENABLED)
@@ -0,0 +1,87 @@
+import json
+from typing import Dict, Optional
+from starlette.exceptions import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+UPLOAD_TOO_LARGE_DETAIL = "업로드 크기가 허용 한도를 초과했습니다."
+
+
+class _BodyTooLarge(HTTPException):
+    """본문 수신 중 상한 초과 (FastAPI 폼 파싱 단계에서 413으로 그대로 전달됨)"""
+
+    def __init__(self):
+        super().__init__(status_code=413, detail=UPLOAD_TOO_LARGE_DETAIL)
+
+
+class UploadSizeLimitMiddleware:
+    """multipart 업로드 요청 본문 크기 상한 (ASGI 미들웨어)
+
+    - Content-Length가 상한을 넘으면 본문을 읽기 전에 413 반환
+    - chunked 등 길이를 모르는 요청은 수신 바이트를 세다가 상한을 넘는 즉시 중단
+    - route_limits로 경로별 상한 지정 (여러 파일을 받는 엔드포인트 등, 나머지는 max_body_bytes)
+    폼 파서가 전체 본문을 임시 파일에 버퍼링하기 전에 거절하기 위함
+    """
+
+    def __init__(self, app: ASGIApp, max_body_bytes: int, route_limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+        self.route_limits = {path.rstrip("/"): limit for path, limit in (route_limits or {}).items()}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._is_multipart(scope):
+            await self.app(scope, receive, send)
+            return
+
+        max_body_bytes = self.route_limits.get(scope["path"].rstrip("/"), self.max_body_bytes)
+        content_length = self._header(scope, b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_body_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_bytes:
+                    raise _BodyTooLarge()
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _BodyTooLarge:
+            if not response_started:
+                await self._reject(send)
+
+    @staticmethod
+    def _header(scope: Scope, name: bytes):
+        for key, value in scope.get("headers", []):
+            if key.lower() == name:
+                return value.decode("latin-1")
+        return None
+
+    def _is_multipart(self, scope: Scope) -> bool:
+        content_type = self._header(scope, b"content-type") or ""
+        return content_type.lower().startswith("multipart/form-data")
+
+    async def _reject(self, send: Send) -> None:
+        body = json.dumps({"detail": UPLOAD_TOO_LARGE_DETAIL}, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,3 +1,5 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,8 +8,25 @@ from app.api.skin_diagnosis import router as skin_router
 from app.core.config import settings
 from app.api.utterance import router as utterance_router
 from app.api.interpretation import router as interpretation_router
+from app.core.image_upload import MOSAIC_MAX_IMAGES, image_worker_pool
+from app.core.llm_clients import llm_client_registry
+from app.core.upload_limit import UploadSizeLimitMiddleware
+from app.services.warmup_service import warmup_service
 import logging
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 이미지 전처리 워커 프로세스 사전 기동
+    image_worker_pool.start()
+    # 프로바이더 생성/커넥션 워밍업은 백그라운드로 진행하고 끝나면 /readyz가 ready로 전환
+    warmup_task = asyncio.create_task(warmup_service.run())
+    yield
+    warmup_task.cancel()
+    image_worker_pool.shutdown()
+    await llm_client_registry.aclose()
+
+
 app = FastAPI(
     title="AI-Analysis-Backend",
     description="피부 진단, 증상 정제, 진단 해석을 위한 멀티 파이프라인 AI 백엔드",
@@ -15,7 +34,8 @@ app = FastAPI(
     default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 # CORS 설정 - 프론트엔드 연결을 위해 필수
@@ -42,6 +62,18 @@ app.add_middleware(
 # GZip 압축으로 응답 크기 최적화
 app.add_middleware(GZipMiddleware, minimum_size=500)
 
+# multipart 업로드 본문 크기 제한 (이미지 상한 + 폼 필드 여유분)
+# 다중 이미지 엔드포인트는 최대 장수만큼 허용하고, 장당 상한은 read_image_upload에서 검사
+UPLOAD_FORM_OVERHEAD_BYTES = 64 * 1024
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_body_bytes=settings.IMAGE_MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD_BYTES,
+    route_limits={
+        "/api/v1/diagnose/skin-lesion-images":
+            MOSAIC_MAX_IMAGES * settings.IMAGE_MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD_BYTES,
+    },
+)
+
 # 기본 로깅 레벨 설정
 logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO))
 
@@ -77,6 +109,11 @@ async def root():
 async def healthz():
     return {"status": "ok"}
 
+@app.get("/readyz")
+async def readyz():
+    """워밍업 완료 여부 (로드밸런서 준비 상태 확인용, 프로세스 생존은 /healthz)"""
+    return ORJSONResponse(warmup_service.status(), status_code=200 if warmup_service.ready else 503)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
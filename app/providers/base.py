@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import AsyncIterator, Optional
+from app.core.image_profile import DEFAULT_IMAGE_PROFILE, ImageProfile
 
 
 class TextRefineProvider(ABC):
@@ -10,6 +11,9 @@ class TextRefineProvider(ABC):
 
 
 class MedicalInterpretationProvider(ABC):
+    # 이 프로바이더로 보낼 이미지의 전처리 프로파일
+    image_profile: ImageProfile = DEFAULT_IMAGE_PROFILE
+
     @abstractmethod
     async def diagnose_text(self, description: Optional[str], additional_info: Optional[str] = None) -> str:
         """텍스트 기반 진단을 수행하고 XML 문자열을 반환"""
@@ -22,6 +26,33 @@ class MedicalInterpretationProvider(ABC):
         additional_info: Optional[str] = None,
         questionnaire_data: Optional[dict] = None,
     ) -> str:
-        """이미지 기반 진단을 수행하고 XML 문자열을 반환"""
+        """이미지 기반 진단을 수행하고 XML 문자열을 반환
+
+        image_base64는 순수 base64 문자열 또는 전처리 단계에서 만든 data URL
+        """
         raise NotImplementedError
 
+    async def reserve_rate_budget(
+        self, description: Optional[str] = None, additional_info: Optional[str] = None, image: bool = False
+    ) -> None:
+        """동시 호출 슬롯을 받기 전에 클라이언트 측 요청 한도 예산을 받음 (한도를 관리하지 않는 프로바이더는 없음)"""
+
+    async def stream_text(self, description: Optional[str], additional_info: Optional[str] = None) -> AsyncIterator[str]:
+        """텍스트 기반 진단 응답을 토큰(조각) 단위로 스트리밍
+
+        스트리밍을 지원하지 않는 프로바이더는 전체 응답을 한 조각으로 반환
+        """
+        yield await self.diagnose_text(description=description, additional_info=additional_info)
+
+    async def stream_image(
+        self,
+        image_base64: str,
+        additional_info: Optional[str] = None,
+        questionnaire_data: Optional[dict] = None,
+    ) -> AsyncIterator[str]:
+        """이미지 기반 진단 응답을 토큰(조각) 단위로 스트리밍"""
+        yield await self.diagnose_image(
+            image_base64=image_base64,
+            additional_info=additional_info,
+            questionnaire_data=questionnaire_data,
+        )
@@ -0,0 +1,300 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+
+import orjson
+
+from app.core.config import settings
+from app.core.generation_governor import generation_governor
+from app.core.llm_clients import OPENAI_BASE_URL, llm_client_registry
+from .base import MedicalInterpretationProvider, TextRefineProvider
+from .openai_medical import OpenAIMedicalInterpreter
+from .openai_text import REFINE_PROMPT_MESSAGES, OpenAITextRefiner
+from .runpod_medical import RunPodMedicalInterpreter
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 사용자 메시지 content: 문자열 또는 OpenAI content 파트 목록 (text/image_url)
+UserContent = Union[str, List[Dict[str, Any]]]
+
+_MESSAGES_END = b"}],"
+# data URL 자리표시자 (사설 영역 문자라 orjson이 이스케이프 없이 그대로 출력)
+_IMAGE_URL_PLACEHOLDER = "\ue000image_url\ue000"
+_IMAGE_URL_PLACEHOLDER_BYTES = orjson.dumps(_IMAGE_URL_PLACEHOLDER)
+
+
+def _serialize_content(content: UserContent) -> List[bytes]:
+    """사용자 메시지 content를 JSON 조각 목록으로 직렬화
+
+    base64 data URL은 JSON 이스케이프가 필요 없는 ASCII라 재직렬화하지 않고 바이트로 끼워 넣음
+    (orjson은 큰 문자열 직렬화 시 출력 버퍼를 크게 잡아 이미지당 수백 KB의 일시 할당이 생김)
+    """
+    if isinstance(content, str):
+        return [orjson.dumps(content)]
+
+    parts: List[Dict[str, Any]] = []
+    urls: List[str] = []
+    for part in content:
+        image_url = part.get("image_url") if part.get("type") == "image_url" else None
+        url = image_url.get("url", "") if image_url else ""
+        if url.startswith("data:") and url.isascii() and '"' not in url and "\\" not in url:
+            parts.append({**part, "image_url": {**image_url, "url": _IMAGE_URL_PLACEHOLDER}})
+            urls.append(url)
+        else:
+            parts.append(part)
+
+    chunks = orjson.dumps(parts).split(_IMAGE_URL_PLACEHOLDER_BYTES)
+    if len(chunks) != len(urls) + 1:
+        # 자리표시자 문자가 텍스트에 섞인 경우 등은 통째로 직렬화
+        return [orjson.dumps(content)]
+    serialized = [chunks[0]]
+    for url, chunk in zip(urls, chunks[1:]):
+        serialized.extend((b'"', url.encode("ascii"), b'"', chunk))
+    return serialized
+
+
+class DirectChatCompletions:
+    """OpenAI 호환 /chat/completions 직접 호출 클라이언트 (LangChain/SDK 미사용)
+
+    모델/샘플링 파라미터/시스템 프롬프트가 고정이므로 요청 본문의 앞부분을 생성 시 한 번만 직렬화해 두고,
+    호출마다 사용자 메시지만 orjson으로 직렬화해 이어 붙임 (메시지 객체 변환/검증/콜백 비용 없음)
+    max_tokens는 출력 예산(generation_governor)에 따라 호출마다 달라지므로 본문 끝에 붙임
+    HTTP는 레지스트리의 base_url별 공유 커넥션 풀 사용
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        timeout: float,
+        system_prompt: Optional[str] = None,
+        base_url: Optional[str] = None,
+        stop: Optional[List[str]] = None,
+    ):
+        self.api_key = api_key
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.base_url = base_url
+        self.timeout = timeout
+        self.url = f"{(base_url or OPENAI_BASE_URL).rstrip('/')}/chat/completions"
+        self.headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+
+        messages = [{"role": "system", "content": system_prompt}] if system_prompt is not None else []
+        params: Dict[str, Any] = {"model": model, "temperature": temperature}
+        if stop:
+            params["stop"] = stop
+        self._body_prefix = self._prefix(params, messages)
+        self._stream_body_prefix = self._prefix({**params, "stream": True}, messages)
+
+    @staticmethod
+    def _prefix(params: Dict[str, Any], messages: List[Dict[str, str]]) -> bytes:
+        # '...,"messages":[{system}' 까지 고정 → 사용자 메시지와 '}]}'만 덧붙이면 완성된 JSON
+        prefix = orjson.dumps({**params, "messages": messages})
+        return prefix[: -len(b"]}")] + (b',{"role":"user","content":' if messages else b'{"role":"user","content":')
+
+    def build_body(self, content: UserContent, stream: bool = False, max_tokens: Optional[int] = None) -> bytes:
+        """사용자 메시지만 직렬화해 미리 만든 본문 앞부분에 결합 (최종 본문 복사는 1회)"""
+        prefix = self._stream_body_prefix if stream else self._body_prefix
+        suffix = b'"max_tokens":%d}' % (max_tokens or self.max_tokens)
+        return b"".join([prefix, *_serialize_content(content), _MESSAGES_END, suffix])
+
+    async def complete(self, content: UserContent) -> str:
+        """채팅 완성 1회 호출 후 첫 번째 선택지의 텍스트 반환"""
+        body = self.build_body(content, max_tokens=generation_governor.max_tokens(self.max_tokens))
+        response = await llm_client_registry.http_client(self.base_url).post(
+            self.url, content=body, headers=self.headers, timeout=self.timeout
+        )
+        response.raise_for_status()
+        payload = orjson.loads(response.content)
+        choice = payload["choices"][0]
+        output_tokens = (payload.get("usage") or {}).get("completion_tokens")
+        return generation_governor.finish(choice["message"]["content"] or "", choice.get("finish_reason"), output_tokens)
+
+    async def stream(self, content: UserContent) -> AsyncIterator[str]:
+        """채팅 완성 스트리밍 호출 (SSE), 텍스트 델타를 도착 순서대로 반환 (출력 토큰 수는 델타 수로 근사)"""
+        body = self.build_body(content, stream=True, max_tokens=generation_governor.max_tokens(self.max_tokens))
+        parts: List[str] = []
+        finish_reason = None
+        async with llm_client_registry.http_client(self.base_url).stream(
+            "POST", self.url, content=body, headers=self.headers, timeout=self.timeout
+        ) as response:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = orjson.loads(data).get("choices") or []
+                if not choices:
+                    continue
+                finish_reason = choices[0].get("finish_reason") or finish_reason
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        text = "".join(parts)
+        tail = generation_governor.finish(text, finish_reason, len(parts))[len(text):]
+        if tail:
+            yield tail
+
+
+class DirectOpenAIMedicalInterpreter(OpenAIMedicalInterpreter):
+    """OpenAI GPT-4o-mini 직접 호출 프로바이더 (프롬프트/이미지 프로파일은 LangChain 경로와 동일)"""
+
+    def __init__(self):
+        super().__init__()
+        self._client = DirectChatCompletions(
+            api_key=self.api_key,
+            model="gpt-4o-mini",
+            temperature=settings.TEMPERATURE,
+            max_tokens=settings.MAX_TOKENS,
+            timeout=settings.REQUEST_TIMEOUT,
+            system_prompt=self._get_system_prompt(),
+            stop=generation_governor.stop_sequences(),
+        )
+
+    @property
+    def llm(self) -> DirectChatCompletions:
+        return self._client
+
+    @property
+    def vision_llm(self) -> DirectChatCompletions:
+        return self._client
+
+    async def diagnose_text(self, description: Optional[str], additional_info: Optional[str] = None) -> str:
+        """텍스트 기반 피부 병변 진단"""
+        content = self._text_user_message(description, additional_info)
+        logger.info("OpenAI 텍스트 진단 API 직접 호출")
+        return await self._client.complete(content)
+
+    async def diagnose_image(
+        self,
+        image_base64: str,
+        additional_info: Optional[str] = None,
+        questionnaire_data: Optional[dict] = None,
+    ) -> str:
+        """이미지 기반 피부 병변 진단"""
+        content = self._image_user_content(image_base64, additional_info)
+        logger.info("OpenAI Vision API 직접 호출")
+        return await self._client.complete(content)
+
+    async def stream_text(self, description: Optional[str], additional_info: Optional[str] = None) -> AsyncIterator[str]:
+        async for delta in self._client.stream(self._text_user_message(description, additional_info)):
+            yield delta
+
+    async def stream_image(
+        self,
+        image_base64: str,
+        additional_info: Optional[str] = None,
+        questionnaire_data: Optional[dict] = None,
+    ) -> AsyncIterator[str]:
+        async for delta in self._client.stream(self._image_user_content(image_base64, additional_info)):
+            yield delta
+
+
+class DirectRunPodMedicalInterpreter(RunPodMedicalInterpreter):
+    """RunPod 파인튜닝 모델 직접 호출 프로바이더 (텍스트/비전 샘플링 설정은 LangChain 경로와 동일)"""
+
+    def __init__(self):
+        super().__init__()
+        system_prompt = self._get_system_prompt()
+        self._text_client = DirectChatCompletions(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            model=settings.RUNPOD_MODEL_NAME,
+            temperature=settings.TEMPERATURE,
+            max_tokens=settings.MAX_TOKENS,
+            timeout=settings.REQUEST_TIMEOUT,
+            system_prompt=system_prompt,
+            stop=generation_governor.stop_sequences(),
+        )
+        self._vision_client = DirectChatCompletions(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            model=settings.RUNPOD_MODEL_NAME,
+            temperature=0.05,
+            max_tokens=400,
+            timeout=20,
+            system_prompt=system_prompt,
+            stop=generation_governor.stop_sequences(),
+        )
+
+    @property
+    def llm(self) -> DirectChatCompletions:
+        return self._text_client
+
+    @property
+    def vision_llm(self) -> DirectChatCompletions:
+        return self._vision_client
+
+    async def diagnose_text(self, description: Optional[str], additional_info: Optional[str] = None) -> str:
+        """텍스트 기반 피부 병변 진단"""
+        content = self._text_user_message(description, additional_info)
+        logger.info(f"RunPod 텍스트 진단 API 직접 호출 - Base URL: {self.base_url}")
+        return await self._text_client.complete(content)
+
+    async def diagnose_image(
+        self,
+        image_base64: str,
+        additional_info: Optional[str] = None,
+        questionnaire_data: Optional[dict] = None,
+    ) -> str:
+        """이미지 기반 피부 병변 진단"""
+        content = self._image_user_content(image_base64, additional_info)
+        logger.info(f"RunPod Vision API 직접 호출 - Base URL: {self.base_url}")
+        return await self._vision_client.complete(content)
+
+    async def stream_text(self, description: Optional[str], additional_info: Optional[str] = None) -> AsyncIterator[str]:
+        async for delta in self._text_client.stream(self._text_user_message(description, additional_info)):
+            yield delta
+
+    async def stream_image(
+        self,
+        image_base64: str,
+        additional_info: Optional[str] = None,
+        questionnaire_data: Optional[dict] = None,
+    ) -> AsyncIterator[str]:
+        async for delta in self._vision_client.stream(self._image_user_content(image_base64, additional_info)):
+            yield delta
+
+
+class DirectTextRefiner(TextRefineProvider):
+    """증상 정제 직접 호출 프로바이더 (OpenAITextRefiner와 같은 프롬프트/파라미터)"""
+
+    def __init__(self):
+        (_, system_prompt), (_, self._human_template) = REFINE_PROMPT_MESSAGES
+        self._client = DirectChatCompletions(
+            api_key=settings.OPENAI_API_KEY,
+            model=settings.SYMPTOM_REFINER_MODEL or "gpt-4o-mini",
+            temperature=0.2,
+            max_tokens=min(settings.MAX_TOKENS, 400),
+            timeout=settings.REQUEST_TIMEOUT,
+            system_prompt=system_prompt,
+        )
+
+    @property
+    def llm(self) -> DirectChatCompletions:
+        return self._client
+
+    async def refine(self, text: str, language: Optional[str] = None) -> str:
+        return await self._client.complete(self._human_template.format(text=text, language=language or "ko"))
+
+
+def build_medical_provider(name: str) -> MedicalInterpretationProvider:
+    """프로바이더 이름(openai|runpod)과 LLM_BACKEND 설정에 맞는 진단 프로바이더 생성"""
+    direct = settings.LLM_BACKEND.lower() == "direct"
+    if name == "runpod":
+        return DirectRunPodMedicalInterpreter() if direct else RunPodMedicalInterpreter()
+    return DirectOpenAIMedicalInterpreter() if direct else OpenAIMedicalInterpreter()
+
+
+def build_refiner_provider() -> TextRefineProvider:
+    """LLM_BACKEND 설정에 맞는 증상 정제 프로바이더 생성"""
+    if settings.LLM_BACKEND.lower() == "direct":
+        return DirectTextRefiner()
+    return OpenAITextRefiner()
@@ -1,18 +1,16 @@
-from typing import Optional
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.chains import LLMChain
+from typing import TYPE_CHECKING, Optional
 from app.core.config import settings
+from app.core.llm_clients import llm_client_registry
 from .base import TextRefineProvider
 
+if TYPE_CHECKING:
+    from langchain.prompts import ChatPromptTemplate
+    from langchain_openai import ChatOpenAI
 
-class OpenAITextRefiner(TextRefineProvider):
-    def __init__(self):
-        self._llm: Optional[ChatOpenAI] = None
-        self._prompt = ChatPromptTemplate.from_messages([
-            (
-                "system",
-                """
+REFINE_PROMPT_MESSAGES = (
+    (
+        "system",
+        """
                너는 외래 접수 간호사처럼, 환자의 자유 서술을 듣고
 의사에게 말할 때 어떤 점을 중점적으로 설명하면 좋은지
 '꿀팁' 한 줄로만 알려주는 역할을 한다.
@@ -42,30 +40,44 @@ class OpenAITextRefiner(TextRefineProvider):
 환자: 어제부터 얼굴 볼 쪽이 빨갛게 달아오르고 따끔거려요, 화장품 바르니 더 심해졌어요
 꿀팁: 얼굴 볼 붉어짐과 화장품 사용 후 따끔거림이 심해진 점을 강조하세요.
                 """.strip(),
-            ),
-            (
-                "human",
-                """
+    ),
+    (
+        "human",
+        """
                 환자 원문: {text}
                 목표 언어: {language}
                 위 원문을 의사에게 전달하기 좋게 간결히 정제해줘.
                 """.strip(),
-            ),
-        ])
+    ),
+)
+
+
+class OpenAITextRefiner(TextRefineProvider):
+    def __init__(self):
+        self._prompt: Optional["ChatPromptTemplate"] = None
 
     @property
-    def llm(self) -> ChatOpenAI:
-        if self._llm is None:
-            self._llm = ChatOpenAI(
-                openai_api_key=settings.OPENAI_API_KEY,
-                model_name=settings.SYMPTOM_REFINER_MODEL or "gpt-4o-mini",
-                temperature=0.2,
-                max_tokens=min(settings.MAX_TOKENS, 400),
-                request_timeout=settings.REQUEST_TIMEOUT,
-            )
-        return self._llm
+    def prompt(self) -> "ChatPromptTemplate":
+        """정제 프롬프트 (langchain은 첫 사용 시 import)"""
+        if self._prompt is None:
+            from langchain.prompts import ChatPromptTemplate
+
+            self._prompt = ChatPromptTemplate.from_messages(list(REFINE_PROMPT_MESSAGES))
+        return self._prompt
+
+    @property
+    def llm(self) -> "ChatOpenAI":
+        return llm_client_registry.chat_model(
+            api_key=settings.OPENAI_API_KEY,
+            model=settings.SYMPTOM_REFINER_MODEL or "gpt-4o-mini",
+            temperature=0.2,
+            max_tokens=min(settings.MAX_TOKENS, 400),
+            timeout=settings.REQUEST_TIMEOUT,
+        )
 
     async def refine(self, text: str, language: Optional[str] = None) -> str:
-        chain = LLMChain(llm=self.llm, prompt=self._prompt)
+        from langchain.chains import LLMChain
+
+        chain = LLMChain(llm=self.llm, prompt=self.prompt)
         return await chain.arun(text=text, language=language or "ko")
 
@@ -1,10 +1,16 @@
-from typing import Optional
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+from typing import TYPE_CHECKING, AsyncIterator, Any, Dict, List, Optional
 from app.core.config import settings
+from app.core.generation_governor import agenerate_diagnosis, astream_diagnosis
+from app.core.image_profile import ImageProfile, image_data_url
+from app.core.llm_clients import llm_client_registry
+from app.core.prompt_compiler import diagnosis_prompts
+from app.core.prompt_registry import SKIN_DIAGNOSIS, prompt_registry
 from .base import MedicalInterpretationProvider
 import logging
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,103 +20,63 @@ class RunPodMedicalInterpreter(MedicalInterpretationProvider):
     OpenAI 클라이언트를 그대로 사용하되 base_url과 api_key만 변경합니다.
     """
     
+    # 파인튜닝 모델의 서빙 측 이미지 처리는 OpenAI detail 규칙과 다르므로 기존 1024px 유지
+    # (해상도를 낮추려면 같은 평가셋으로 진단 정확도를 비교한 뒤 변경)
+    image_profile = ImageProfile(max_edge=1024, format="JPEG", quality=85, detail="low")
+    
     def __init__(self):
         self.api_key = settings.RUNPOD_API_KEY
         self.base_url = settings.RUNPOD_BASE_URL
-        self._llm = None
-        self._vision_llm = None
         
         if not self.api_key or not self.base_url:
             logger.warning("RunPod API 키 또는 Base URL이 설정되지 않았습니다.")
     
+    def _chat_model(self, temperature: float, max_tokens: int, timeout: float) -> "ChatOpenAI":
+        return llm_client_registry.chat_model(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            model=settings.RUNPOD_MODEL_NAME,  # 빈 문자열이 작동함
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout,
+        )
+
     @property
-    def llm(self) -> ChatOpenAI:
-        """텍스트 전용 LLM (RunPod 엔드포인트 사용)"""
-        if self._llm is None:
-            self._llm = ChatOpenAI(
-                api_key=self.api_key,
-                base_url=self.base_url,
-                model=settings.RUNPOD_MODEL_NAME,  # 빈 문자열이 작동함
-                temperature=settings.TEMPERATURE,
-                max_tokens=settings.MAX_TOKENS,
-                timeout=settings.REQUEST_TIMEOUT,
-            )
-        return self._llm
+    def llm(self) -> "ChatOpenAI":
+        """텍스트 전용 LLM (RunPod 엔드포인트, 공유 레지스트리)"""
+        return self._chat_model(settings.TEMPERATURE, settings.MAX_TOKENS, settings.REQUEST_TIMEOUT)
 
     @property
-    def vision_llm(self) -> ChatOpenAI:
-        """Vision API 지원 LLM (RunPod 엔드포인트 사용)"""
-        if self._vision_llm is None:
-            self._vision_llm = ChatOpenAI(
-                api_key=self.api_key,
-                base_url=self.base_url,
-                model=settings.RUNPOD_MODEL_NAME,  # 빈 문자열이 작동함
-                temperature=settings.TEMPERATURE,
-                max_tokens=settings.MAX_TOKENS,
-                timeout=settings.REQUEST_TIMEOUT,
-            )
-        return self._vision_llm
+    def vision_llm(self) -> "ChatOpenAI":
+        """Vision 진단용 LLM (RunPod 엔드포인트, 공유 레지스트리)
+
+        더 결정적인 응답(temperature 0.05), 토큰 절반(400), 20초 타임아웃으로 최적화
+        """
+        return self._chat_model(0.05, 400, 20)
     
     def _get_system_prompt(self) -> str:
         """의료 진단을 위한 시스템 프롬프트"""
-        return """너는 피부 병변을 진단하는 전문 AI이다. 다음은 네가 진단할 수 있는 피부 병변 목록이며, 각 병변의 임상적 특징은 아래와 같다. 환자에게 나타난 병변의 이미지와 설명을 바탕으로 가장 적합한 질병을 하나 선택하여 진단하라.
-아래 진단 기준을 참조하여 이미지에서 어떤 특징이 해당 질병의 특징에 해당되는지 설명하라
-
-0: 광선각화증
-1: 기저세포암
-2: 멜라닌세포모반
-3: 보웬병
-4: 비립종
-5: 사마귀
-6: 악성흑색종
-7: 지루각화증
-8: 편평세포암
-9: 표피낭종
-10: 피부섬유종
-11: 피지샘증식증
-12: 혈관종
-13: 화농 육아종
-14: 흑색점
-
-<root><label id_code="{코드}" score="{점수}">{진단명}</label><summary>{진단소견}</summary><similar_labels><similar_label id_code="{코드}" score="{점수}">{유사질병명}</similar_label><similar_label id_code="{코드}" score="{점수}">{유사질병명}</similar_label></similar_labels></root>
-
-예시:
-<root><label id_code="0" score="67.6">광선각화증</label><summary>이미지에서는 자외선 노출이 많은 부위인 얼굴에 붉은색의 각질성 반점이 관찰됩니다. 이는 만성 자외선 노출로 인한 DNA 손상으로 발생하며, 장기간 방치할 경우 피부암, 특히 편평세포암으로의 진행 가능성이 있습니다. 병변의 진행 속도가 느릴 수 있으나, 조기 발견 시 적절한 치료를 통해 예후를 양호하게 할 수 있습니다.</summary><similar_labels><similar_label id_code="3" score="16.6">보웬병</similar_label><similar_label id_code="1" score="5.7">기저세포암</similar_label></similar_labels></root>
-
-⚠️ 의료 면책 조항: 이 진단은 참고용이며, 최종 진단은 반드시 의료진과 상담하세요."""
+        return prompt_registry.system_prompt(SKIN_DIAGNOSIS)
 
     async def diagnose_text(self, description: Optional[str], additional_info: Optional[str] = None) -> str:
         """텍스트 기반 피부 병변 진단"""
-        if not description:
-            raise ValueError("병변 설명이 필요합니다.")
-        
-        user_message = f"""
-        환자의 피부 병변 정보:
-        
-        병변 설명: {description}
-        추가 정보: {additional_info or "추가 정보 없음"}
-        
-        위의 정보를 바탕으로 피부 병변을 진단하고, 지정된 XML 형식으로 응답해주세요.
-        반드시 다음 형식을 준수해야 합니다:
-        
-        <root>
-        <label id_code="코드" score="점수">진단명</label>
-        <summary>진단소견</summary>
-        <similar_labels>
-        <similar_label id_code="코드" score="점수">유사질병명</similar_label>
-        <similar_label id_code="코드" score="점수">유사질병명</similar_label>
-        </similar_labels>
-        </root>
-        """
-        
-        messages = [
-            SystemMessage(content=self._get_system_prompt()),
-            HumanMessage(content=user_message)
-        ]
+        messages = prompt_registry.messages(SKIN_DIAGNOSIS, self._text_user_message(description, additional_info))
         
         logger.info(f"RunPod 텍스트 진단 API 호출 - Base URL: {self.base_url}")
-        result = await self.llm.agenerate([messages])
-        return result.generations[0][0].text
+        return await agenerate_diagnosis(self.llm, messages)
+
+    async def stream_text(self, description: Optional[str], additional_info: Optional[str] = None) -> AsyncIterator[str]:
+        """텍스트 기반 피부 병변 진단 (토큰 스트리밍)"""
+        messages = prompt_registry.messages(SKIN_DIAGNOSIS, self._text_user_message(description, additional_info))
+        async for chunk in astream_diagnosis(self.llm, messages):
+            yield chunk
+
+    def _text_user_message(self, description: Optional[str], additional_info: Optional[str]) -> str:
+        """텍스트 진단 사용자 메시지 (LangChain/직접 호출 경로 공용)"""
+        if not description:
+            raise ValueError("병변 설명이 필요합니다.")
+
+        return diagnosis_prompts.text_prompt(description, additional_info, self._get_system_prompt())
 
     async def diagnose_image(
         self,
@@ -119,56 +85,40 @@ class RunPodMedicalInterpreter(MedicalInterpretationProvider):
         questionnaire_data: Optional[dict] = None,
     ) -> str:
         """이미지 기반 피부 병변 진단 (최적화됨)"""
+        messages = prompt_registry.messages(SKIN_DIAGNOSIS, self._image_user_content(image_base64, additional_info))
+        
+        logger.info(f"RunPod Vision API 호출 (최적화 모드) - Base URL: {self.base_url}")
+        return await agenerate_diagnosis(self.vision_llm, messages)
+
+    async def stream_image(
+        self,
+        image_base64: str,
+        additional_info: Optional[str] = None,
+        questionnaire_data: Optional[dict] = None,
+    ) -> AsyncIterator[str]:
+        """이미지 기반 피부 병변 진단 (토큰 스트리밍)"""
+        messages = prompt_registry.messages(SKIN_DIAGNOSIS, self._image_user_content(image_base64, additional_info))
+        async for chunk in astream_diagnosis(self.vision_llm, messages):
+            yield chunk
+
+    def _image_user_content(self, image_base64: str, additional_info: Optional[str]) -> List[Dict[str, Any]]:
+        """이미지 진단 사용자 메시지 content 파트 (LangChain/직접 호출 경로 공용)"""
         if not image_base64:
             raise ValueError("이미지 데이터가 필요합니다.")
-        
-        user_text = f"""
-        환자의 피부 병변 이미지를 분석해주세요.
-        
-        추가 정보: {additional_info or "추가 정보 없음"}
-        
-        이미지에서 관찰되는 피부 병변의 특징을 바탕으로 진단하고, 
-        반드시 다음 XML 형식으로 응답해주세요:
-        
-        <root>
-        <label id_code="코드" score="점수">진단명</label>
-        <summary>진단소견 (이미지에서 관찰된 구체적 특징 포함)</summary>
-        <similar_labels>
-        <similar_label id_code="코드" score="점수">유사질병명</similar_label>
-        <similar_label id_code="코드" score="점수">유사질병명</similar_label>
-        </similar_labels>
-        </root>
-        """
+
+        user_text = diagnosis_prompts.image_prompt(additional_info, self._get_system_prompt())
         
         # OpenAI Vision API 메시지 형식 (최적화됨)
-        messages = [
-            SystemMessage(content=self._get_system_prompt()),
-            HumanMessage(content=[
-                {
-                    "type": "text",
-                    "text": user_text
-                },
-                {
-                    "type": "image_url",
-                    "image_url": {
-                        "url": f"data:image/jpeg;base64,{image_base64}",
-                        "detail": "low"  # 낮은 해상도로 빠른 처리
-                    }
+        return [
+            {
+                "type": "text",
+                "text": user_text
+            },
+            {
+                "type": "image_url",
+                "image_url": {
+                    "url": image_data_url(image_base64),
+                    "detail": self.image_profile.detail  # 낮은 해상도로 빠른 처리
                 }
-            ])
+            }
         ]
-        
-        logger.info(f"RunPod Vision API 호출 (최적화 모드) - Base URL: {self.base_url}")
-        
-        # 최적화된 LLM 설정
-        optimized_llm = ChatOpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url,
-            model=settings.RUNPOD_MODEL_NAME,
-            temperature=0.05,  # 더 결정적인 응답
-            max_tokens=400,    # 토큰 수 절반으로 줄임
-            timeout=20,        # 20초 타임아웃
-        )
-        
-        result = await optimized_llm.agenerate([messages])
-        return result.generations[0][0].text
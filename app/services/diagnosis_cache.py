@@ -0,0 +1,277 @@
+import asyncio
+import copy
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.diagnosis_parser import XML_ROOT_PATTERN
+from app.services.near_duplicate_index import NearDuplicateIndex
+
+
+def make_cache_key(image_hash: str, provider: str, model: str, prompt_version: str, **inputs: Any) -> str:
+    """정규화된 이미지 해시 + 프로바이더/모델/프롬프트 버전(+추가 입력)으로 캐시 키 생성"""
+    extra = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str) if inputs else ""
+    raw = "|".join([image_hash, provider, model or "", prompt_version, extra])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DiagnosisResultCache:
+    """이미지 진단 결과 캐시 (LRU + TTL)
+
+    - 동일 키의 동시 요청은 하나의 프로바이더 호출을 공유 (in-flight 중복 제거)
+    - 반환값은 복사본이므로 호출자가 자유롭게 수정 가능
+    - 만료/LRU로 제거된 키는 on_evict로 알림 (근접 중복 인덱스 정리)
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        enabled: bool = True,
+        on_evict: Optional[Callable[[str], None]] = None,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.on_evict = on_evict
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, "asyncio.Future[Any]"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.near_hits = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self._evicted(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            oldest, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            self._evicted(oldest)
+
+    def _evicted(self, key: str) -> None:
+        if self.on_evict is not None:
+            self.on_evict(key)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Tuple[Any, bool]:
+        """캐시 조회 후 없으면 계산. (값, 캐시 히트 여부) 반환"""
+        if not self.enabled:
+            return await compute(), False
+
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return copy.deepcopy(value), True
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(compute())
+            self._in_flight[key] = task
+
+            def _on_done(done: "asyncio.Future[Any]") -> None:
+                self._in_flight.pop(key, None)
+                if done.cancelled() or done.exception() is not None:
+                    return
+                result = done.result()
+                if cacheable is None or cacheable(result):
+                    self.set(key, result)
+
+            task.add_done_callback(_on_done)
+
+        # 한 요청이 취소되어도 공유 작업은 계속 진행
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result), False
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.near_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "near_duplicate_hits": self.near_hits,
+            "in_flight": len(self._in_flight),
+            "hit_rate": round((self.hits + self.near_hits) / total, 4) if total else 0.0,
+        }
+
+
+# 싱글톤 인스턴스
+near_duplicate_index = NearDuplicateIndex(
+    max_distance=settings.IMAGE_NEAR_DUPLICATE_MAX_DISTANCE,
+    max_entries=settings.DIAGNOSIS_CACHE_MAX_ENTRIES,
+)
+
+# 캐시에서 빠진 결과는 근접 중복 인덱스에서도 제거
+diagnosis_cache = DiagnosisResultCache(
+    max_entries=settings.DIAGNOSIS_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.DIAGNOSIS_CACHE_TTL,
+    enabled=settings.DIAGNOSIS_CACHE_ENABLED,
+    on_evict=near_duplicate_index.remove_key,
+)
+
+
+def _is_xml_result(xml: Optional[str]) -> bool:
+    return XML_ROOT_PATTERN.search(xml or "") is not None
+
+
+def _image_cache_keys(
+    image_hash: str, provider: str, model: str, prompt_version: str, image_phash: Optional[str], inputs: Dict[str, Any]
+) -> Tuple[str, Optional[str]]:
+    """(정확 일치 캐시 키, 근접 중복 인덱스 컨텍스트) — phash가 없으면 컨텍스트 없음"""
+    cache_key = make_cache_key(image_hash, provider, model, prompt_version, **inputs)
+    context = make_cache_key("", provider, model, prompt_version, **inputs) if image_phash else None
+    return cache_key, context
+
+
+def _near_duplicate_hit(cache_key: str, context: Optional[str], image_phash: Optional[str]) -> Optional[Tuple[str, int]]:
+    """정확 일치가 없을 때 근접 중복 이미지의 캐시 결과 (XML, 해밍 거리)"""
+    if context is None or not diagnosis_cache.enabled or diagnosis_cache.get(cache_key) is not None:
+        return None
+    # 가장 가까운 항목이 만료됐으면 임계 거리 안의 다음 후보로
+    for matched_key, distance in near_duplicate_index.find(context, image_phash):
+        cached = diagnosis_cache.get(matched_key)
+        if cached is not None:
+            diagnosis_cache.near_hits += 1
+            return cached, distance
+    return None
+
+
+async def cached_image_diagnosis(
+    compute: Callable[[], Awaitable[str]],
+    image_hash: str,
+    provider: str,
+    model: str,
+    prompt_version: str,
+    image_phash: Optional[str] = None,
+    **inputs: Any,
+) -> Tuple[str, Dict[str, Any]]:
+    """이미지 진단 XML을 캐시 경유로 조회 (항상 provider/model이 응답하는 경우)
+
+    1) 정규화 이미지 해시 완전 일치 → 2) (활성화 시) perceptual hash 근접 일치 → 3) 프로바이더 호출
+    반환값: (XML, 메타데이터 {"cache_hit", "near_duplicate_distance"})
+    """
+    async def identified() -> Tuple[str, Tuple[str, str, str]]:
+        return await compute(), (provider, model, image_hash)
+
+    xml, _, meta = await cached_routed_image_diagnosis(
+        identified, image_hash, provider, model, prompt_version, image_phash=image_phash, **inputs
+    )
+    return xml, meta
+
+
+async def cached_routed_image_diagnosis(
+    compute: Callable[[], Awaitable[Tuple[str, Tuple[str, str, str]]]],
+    image_hash: str,
+    provider: str,
+    model: str,
+    prompt_version: str,
+    image_phash: Optional[str] = None,
+    **inputs: Any,
+) -> Tuple[str, Tuple[str, str, str], Dict[str, Any]]:
+    """라우팅/헤지로 실제 응답한 프로바이더가 바뀔 수 있는 이미지 진단의 캐시 경유 조회
+
+    provider/model(라우터가 고른 쪽) 키로 조회하고, compute는 (XML, (응답한 프로바이더, 모델, 이미지 해시))를 반환
+    (헤지 프로바이더는 자기 프로파일로 다시 전처리한 이미지를 받으므로 이미지 해시도 달라질 수 있음)
+    결과는 응답한 프로바이더/이미지의 키로 저장 (다른 프로바이더 결과가 고른 쪽 키에 섞이지 않도록)
+    반환값: (XML, (응답한 프로바이더, 모델, 이미지 해시), 메타데이터)
+    """
+    cache_key, context = _image_cache_keys(image_hash, provider, model, prompt_version, image_phash, inputs)
+
+    near_hit = _near_duplicate_hit(cache_key, context, image_phash)
+    if near_hit is not None:
+        cached, distance = near_hit
+        return cached, (provider, model, image_hash), {"cache_hit": True, "near_duplicate_distance": distance}
+
+    # 캐시에는 XML만 저장하므로 계산 결과는 직접 저장 (동시 요청은 같은 계산을 공유)
+    result, cache_hit = await diagnosis_cache.get_or_compute(cache_key, compute, cacheable=lambda _: False)
+    if cache_hit:
+        xml, served = result, (provider, model, image_hash)
+    else:
+        xml, served = result
+        served_provider, served_model, served_hash = served
+        store_image_diagnosis(
+            xml, served_hash, served_provider, served_model, prompt_version, image_phash=image_phash, **inputs
+        )
+    meta: Dict[str, Any] = {"cache_hit": cache_hit}
+    if context is not None:
+        meta["near_duplicate_distance"] = 0 if cache_hit else None
+    return xml, served, meta
+
+
+def lookup_image_diagnosis(
+    image_hash: str,
+    provider: str,
+    model: str,
+    prompt_version: str,
+    image_phash: Optional[str] = None,
+    **inputs: Any,
+) -> Tuple[Optional[str], Dict[str, Any]]:
+    """캐시만 조회 (스트리밍 경로용, 프로바이더 호출/in-flight 공유 없음)
+
+    반환값: (캐시된 XML 또는 None, 메타데이터) — 미스 시 응답 완료 후 store_image_diagnosis로 저장
+    """
+    cache_key, context = _image_cache_keys(image_hash, provider, model, prompt_version, image_phash, inputs)
+    meta: Dict[str, Any] = {"cache_hit": False}
+    if context is not None:
+        meta["near_duplicate_distance"] = None
+    if not diagnosis_cache.enabled:
+        return None, meta
+
+    cached = diagnosis_cache.get(cache_key)
+    if cached is not None:
+        diagnosis_cache.hits += 1
+        meta["cache_hit"] = True
+        if context is not None:
+            meta["near_duplicate_distance"] = 0
+        return cached, meta
+    near_hit = _near_duplicate_hit(cache_key, context, image_phash)
+    if near_hit is not None:
+        cached, distance = near_hit
+        return cached, {"cache_hit": True, "near_duplicate_distance": distance}
+    diagnosis_cache.misses += 1
+    return None, meta
+
+
+def store_image_diagnosis(
+    xml: str,
+    image_hash: str,
+    provider: str,
+    model: str,
+    prompt_version: str,
+    image_phash: Optional[str] = None,
+    **inputs: Any,
+) -> None:
+    """스트리밍으로 완성된 진단 XML을 캐시/근접 중복 인덱스에 저장"""
+    if not diagnosis_cache.enabled or not _is_xml_result(xml):
+        return
+    cache_key, context = _image_cache_keys(image_hash, provider, model, prompt_version, image_phash, inputs)
+    diagnosis_cache.set(cache_key, xml)
+    if context is not None:
+        near_duplicate_index.add(context, image_phash, cache_key)
@@ -1,29 +1,51 @@
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from app.core.config import settings
+from app.core.generation_governor import generation_governor
+from app.core.prompt_registry import PROMPT_VERSION
+from app.core.provider_limits import provider_limiter
+from app.core.single_flight import flight_key, llm_flights, model_config, normalize_text
 from app.providers.base import MedicalInterpretationProvider
-from app.providers.openai_medical import OpenAIMedicalInterpreter
-from app.providers.runpod_medical import RunPodMedicalInterpreter
+from app.providers.direct_chat import build_medical_provider
+from app.services.diagnosis_cache import cached_image_diagnosis
 
 
 def _build_medical_provider() -> MedicalInterpretationProvider:
     provider = (settings.INTERPRETATION_PROVIDER or "openai").lower()
-    if provider == "runpod":
-        return RunPodMedicalInterpreter()
-    return OpenAIMedicalInterpreter()
+    return build_medical_provider("runpod" if provider == "runpod" else "openai")
 
 
 class InterpretationService:
     def __init__(self):
         self.provider = _build_medical_provider()
 
+    @property
+    def provider_name(self) -> str:
+        """동시 호출 제한용 프로바이더 이름 (runpod 외에는 openai)"""
+        return "runpod" if (settings.INTERPRETATION_PROVIDER or "openai").lower() == "runpod" else "openai"
+
+    def provider_identity(self) -> Tuple[str, str]:
+        """프로바이더/모델 식별자 (결과 캐시 키용, runpod는 실제 서빙 모델명이라 진단 엔드포인트와 캐시 공유)"""
+        name = self.provider_name
+        return name, settings.RUNPOD_MODEL_NAME if name == "runpod" else settings.INTERPRETATION_MODEL
+
     async def diagnose_text(self, description: Optional[str], additional_info: Optional[str] = None) -> Dict[str, Any]:
-        xml = await self.provider.diagnose_text(description=description, additional_info=additional_info)
+        key = flight_key(
+            "interpretation_text", type(self.provider).__name__, model_config(self.provider.llm),
+            PROMPT_VERSION, normalize_text(description), normalize_text(additional_info),
+        )
+        with generation_governor.track("interpretation_text") as generation:
+            xml = await llm_flights.do(key, lambda: provider_limiter.run(
+                self.provider_name,
+                lambda: self.provider.diagnose_text(description=description, additional_info=additional_info),
+            ))
         return {
             "result_xml": xml,
             "metadata": {
                 "provider": (settings.INTERPRETATION_PROVIDER or "openai").lower(),
                 "model": settings.INTERPRETATION_MODEL,
+                "prompt_version": PROMPT_VERSION,
+                **generation.as_metadata(),
             },
             "created_at": datetime.now(),
         }
@@ -33,18 +55,45 @@ class InterpretationService:
         image_base64: str,
         additional_info: Optional[str] = None,
         questionnaire_data: Optional[dict] = None,
+        image_hash: Optional[str] = None,
+        image_phash: Optional[str] = None,
     ) -> Dict[str, Any]:
-        xml = await self.provider.diagnose_image(
-            image_base64=image_base64,
-            additional_info=additional_info,
-            questionnaire_data=questionnaire_data,
+        key = flight_key(
+            "interpretation_image", type(self.provider).__name__, model_config(self.provider.vision_llm),
+            PROMPT_VERSION, image_hash or image_base64, normalize_text(additional_info), questionnaire_data,
         )
+
+        def diagnose():
+            return self.provider.diagnose_image(
+                image_base64=image_base64,
+                additional_info=additional_info,
+                questionnaire_data=questionnaire_data,
+            )
+
+        async def run_diagnosis() -> str:
+            return await llm_flights.do(key, lambda: provider_limiter.run(self.provider_name, diagnose))
+
+        cache_meta = {"cache_hit": False}
+        with generation_governor.track("interpretation_image") as generation:
+            if image_hash:
+                provider_name, model_name = self.provider_identity()
+                xml, cache_meta = await cached_image_diagnosis(
+                    run_diagnosis,
+                    image_hash, provider_name, model_name, PROMPT_VERSION,
+                    image_phash=image_phash,
+                    additional_info=additional_info, questionnaire=questionnaire_data,
+                )
+            else:
+                xml = await run_diagnosis()
         return {
             "result_xml": xml,
             "metadata": {
                 "provider": (settings.INTERPRETATION_PROVIDER or "openai").lower(),
                 "model": settings.INTERPRETATION_MODEL,
+                "prompt_version": PROMPT_VERSION,
                 "questionnaire_included": bool(questionnaire_data),
+                **cache_meta,
+                **generation.as_metadata(),
             },
             "created_at": datetime.now(),
         }
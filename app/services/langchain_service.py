@@ -1,24 +1,62 @@
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.chains import LLMChain
-from langchain_core.messages import HumanMessage, SystemMessage
 from app.core.config import settings
-from app.providers.openai_medical import OpenAIMedicalInterpreter
-from app.providers.runpod_medical import RunPodMedicalInterpreter
-from typing import Dict, Any, Optional
+from app.core.generation_governor import generation_governor
+from app.core.llm_clients import llm_client_registry
+from app.providers.direct_chat import build_medical_provider
+from app.core.prompt_registry import PROMPT_VERSION, SKIN_DIAGNOSIS, prompt_registry
+from app.core.hedging import request_hedger
+from app.core.image_profile import ImageProfile
+from app.core.provider_limits import provider_limiter
+from app.core.provider_router import IMAGE_ROUTE, TEXT_ROUTE, provider_router
+from app.core.single_flight import flight_key, llm_flights, model_config, normalize_text
+from fastapi import HTTPException
+from app.services.diagnosis_cache import cached_routed_image_diagnosis, lookup_image_diagnosis, store_image_diagnosis
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, Any, Optional, Tuple
 import uuid
 from datetime import datetime
+from functools import partial
 import logging
 import asyncio
-import httpx
-try:
-    from openai import OpenAIError  # type: ignore
-except Exception:  # pragma: no cover - 안전장치
-    class OpenAIError(Exception):
-        pass
+
+if TYPE_CHECKING:
+    from langchain.prompts import ChatPromptTemplate
+    from langchain_openai import ChatOpenAI
 
 logger = logging.getLogger(__name__)
 
+
+class DiagnosisStream:
+    """진단 응답 토큰 스트림
+
+    async for로 프로바이더 응답 조각을 받고, 끝까지 소비하면 result에
+    diagnose_skin_lesion* 과 같은 형식의 분석 결과(dict)가 채워짐
+    생성 예산/분포는 소비하는 동안 endpoint로 집계
+    """
+
+    def __init__(
+        self,
+        chunks: AsyncIterator[str],
+        finalize: Callable[[str], Awaitable[Dict[str, Any]]],
+        endpoint: str,
+    ):
+        self._chunks = chunks
+        self._finalize = finalize
+        self.endpoint = endpoint
+        self.result: Optional[Dict[str, Any]] = None
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        parts = []
+        with generation_governor.track(self.endpoint) as generation:
+            async for chunk in self._chunks:
+                parts.append(chunk)
+                yield chunk
+        self.result = await self._finalize("".join(parts))
+        self.result["metadata"].update(generation.as_metadata())
+
+
+async def _single_chunk(text: str) -> AsyncIterator[str]:
+    yield text
+
+
 class LangChainService:
     """통일된 LangChain 기반 피부 병변 진단 서비스
     
@@ -26,109 +64,139 @@ class LangChainService:
     """
     
     def __init__(self):
-        # 통일된 LLM 인스턴스는 지연 생성
-        self._llm: Optional[ChatOpenAI] = None
-        # Vision 지원 LLM (필요시에만 생성)
-        self._vision_llm: Optional[ChatOpenAI] = None
-        
         # 의료 진단 프로바이더는 지연 초기화
         self._skin_diagnosis_provider = None
         self._skin_diagnosis_image_provider = None
+        # 라우팅/헤지 요청용 다른 프로바이더 (이름별, 지연 초기화)
+        self._alternate_providers: Dict[str, Any] = {}
         
         # 중앙화된 시스템 프롬프트
         self.system_prompt = self._get_system_prompt()
         
-        # 통일된 프롬프트 템플릿들
-        self.prompt_templates = self._initialize_prompt_templates()
+        # 통일된 프롬프트 템플릿들 (langchain은 첫 사용 시 import)
+        self._prompt_templates: Optional[Dict[str, "ChatPromptTemplate"]] = None
     
     @property
     def skin_diagnosis_provider(self):
-        """피부 진단 프로바이더 (지연 로딩)"""
+        """피부 진단 프로바이더 (라우터가 고른 쪽, 지연 로딩)"""
+        return self.route(TEXT_ROUTE, claim=False)[1]
+    
+    @property
+    def skin_diagnosis_image_provider(self):
+        """이미지 진단 프로바이더 (라우터가 고른 쪽, 지연 로딩)"""
+        return self.route(IMAGE_ROUTE, claim=False)[1]
+    
+    def _configured_provider(self, route: str):
+        """설정된 피부 진단 프로바이더 (지연 로딩)"""
+        if route == IMAGE_ROUTE:
+            if self._skin_diagnosis_image_provider is None:
+                image_provider = settings.SKIN_DIAGNOSIS_IMAGE_PROVIDER.lower()
+                if image_provider == "openai":
+                    logger.info("OpenAI 프로바이더를 사용합니다 (이미지).")
+                    self._skin_diagnosis_image_provider = build_medical_provider("openai")
+                elif image_provider == "runpod":
+                    logger.info("RunPod 프로바이더를 사용합니다 (이미지).")
+                    self._skin_diagnosis_image_provider = build_medical_provider("runpod")
+                else:
+                    logger.warning(f"알 수 없는 이미지 프로바이더: {image_provider}, OpenAI를 기본값으로 사용합니다.")
+                    self._skin_diagnosis_image_provider = build_medical_provider("openai")
+            return self._skin_diagnosis_image_provider
         if self._skin_diagnosis_provider is None:
             skin_provider = settings.SKIN_DIAGNOSIS_PROVIDER.lower()
             if skin_provider == "runpod":
                 logger.info("RunPod 프로바이더를 사용합니다 (텍스트).")
-                self._skin_diagnosis_provider = RunPodMedicalInterpreter()
+                self._skin_diagnosis_provider = build_medical_provider("runpod")
             elif skin_provider == "openai":
                 logger.info("OpenAI 프로바이더를 사용합니다 (텍스트).")
-                self._skin_diagnosis_provider = OpenAIMedicalInterpreter()
+                self._skin_diagnosis_provider = build_medical_provider("openai")
             else:
                 logger.warning(f"알 수 없는 프로바이더: {skin_provider}, OpenAI를 기본값으로 사용합니다.")
-                self._skin_diagnosis_provider = OpenAIMedicalInterpreter()
+                self._skin_diagnosis_provider = build_medical_provider("openai")
         return self._skin_diagnosis_provider
     
-    @property
-    def skin_diagnosis_image_provider(self):
-        """이미지 진단 프로바이더 (지연 로딩)"""
-        if self._skin_diagnosis_image_provider is None:
-            image_provider = settings.SKIN_DIAGNOSIS_IMAGE_PROVIDER.lower()
-            if image_provider == "openai":
-                logger.info("OpenAI 프로바이더를 사용합니다 (이미지).")
-                self._skin_diagnosis_image_provider = OpenAIMedicalInterpreter()
-            elif image_provider == "runpod":
-                logger.info("RunPod 프로바이더를 사용합니다 (이미지).")
-                self._skin_diagnosis_image_provider = RunPodMedicalInterpreter()
-            else:
-                logger.warning(f"알 수 없는 이미지 프로바이더: {image_provider}, OpenAI를 기본값으로 사용합니다.")
-                self._skin_diagnosis_image_provider = OpenAIMedicalInterpreter()
-        return self._skin_diagnosis_image_provider
+    def configured_provider_name(self, route: str) -> str:
+        """설정된 프로바이더 이름 (runpod 외에는 openai)"""
+        value = settings.SKIN_DIAGNOSIS_IMAGE_PROVIDER if route == IMAGE_ROUTE else settings.SKIN_DIAGNOSIS_PROVIDER
+        return "runpod" if value.lower() == "runpod" else "openai"
+    
+    def alternate_provider_name(self, name: str) -> Optional[str]:
+        """name의 반대편 프로바이더 이름 (runpod↔openai, 키가 설정되지 않았으면 None)"""
+        other = "openai" if name == "runpod" else "runpod"
+        configured = settings.OPENAI_API_KEY if other == "openai" else settings.RUNPOD_API_KEY and settings.RUNPOD_BASE_URL
+        return other if configured else None
+    
+    def provider(self, route: str, name: str):
+        """route의 name 프로바이더 (설정된 쪽은 기존 인스턴스, 다른 쪽은 이름별 지연 생성)"""
+        if name == self.configured_provider_name(route):
+            return self._configured_provider(route)
+        if name not in self._alternate_providers:
+            logger.info(f"다른 프로바이더 생성 (라우팅/헤지): {name}")
+            self._alternate_providers[name] = build_medical_provider(name)
+        return self._alternate_providers[name]
+    
+    def route(self, route: str, claim: bool = True, name: Optional[str] = None) -> Tuple[str, Any]:
+        """route 요청을 보낼 (프로바이더 이름, 프로바이더), 서킷/응답 시간 기준 라우터 결정
+
+        name이 주어지면 앞서 내린 결정(이미지 전처리 프로파일 선택 등)을 그대로 사용하되, claim 시점에
+        그 프로바이더의 서킷이 열렸거나 half-open 시험 요청이 이미 진행 중이면 다시 라우팅
+        """
+        if name is None:
+            preferred = self.configured_provider_name(route)
+            alternate = self.alternate_provider_name(preferred) if provider_router.enabled else None
+            name = provider_router.choose(route, preferred, alternate, claim=claim)
+        elif claim and not provider_router.claim(route, name):
+            return self.route(route)
+        return name, self.provider(route, name)
+    
+    def hedge_provider(self, route: str, primary_name: str) -> Tuple[Optional[str], Any]:
+        """헤지 요청용 보조 (이름, 프로바이더) — 주 프로바이더의 반대편, 헤지 비활성/미설정이면 (None, None)"""
+        if not request_hedger.enabled:
+            return None, None
+        name = self.alternate_provider_name(primary_name)
+        if name is None:
+            return None, None
+        return name, self.provider(route, name)
     
+    def image_provider_identity(self, name: str) -> Tuple[str, str]:
+        """name 프로바이더의 이미지 진단 프로바이더/모델 식별자 (결과 캐시 키용)"""
+        model = settings.RUNPOD_MODEL_NAME if name == "runpod" else "gpt-4o-mini"
+        return name, model
+    
+    @staticmethod
+    def provider_model(name: str) -> str:
+        """응답 메타데이터의 모델 표기"""
+        return "runpod-finetuned-model" if name == "runpod" else "gpt-4o-mini"
+
     @property
-    def llm(self) -> ChatOpenAI:
-        """OpenAI 텍스트 모델 (증상 다듬기 등에 사용)"""
-        if self._llm is None:
-            self._llm = ChatOpenAI(
-                openai_api_key=settings.OPENAI_API_KEY,
-                model_name="gpt-4o-mini",
-                temperature=settings.TEMPERATURE,
-                max_tokens=settings.MAX_TOKENS,
-                request_timeout=settings.REQUEST_TIMEOUT,
-            )
-        return self._llm
+    def llm(self) -> "ChatOpenAI":
+        """OpenAI 텍스트 모델 (증상 다듬기 등에 사용, 공유 레지스트리)"""
+        return llm_client_registry.chat_model(
+            api_key=settings.OPENAI_API_KEY,
+            model="gpt-4o-mini",
+            temperature=settings.TEMPERATURE,
+            max_tokens=settings.MAX_TOKENS,
+            timeout=settings.REQUEST_TIMEOUT,
+        )
 
     @property
-    def vision_llm(self) -> ChatOpenAI:
+    def vision_llm(self) -> "ChatOpenAI":
         """OpenAI Vision API 지원 LLM (백업용, 현재는 사용하지 않음)"""
-        if self._vision_llm is None:
-            self._vision_llm = ChatOpenAI(
-                openai_api_key=settings.OPENAI_API_KEY,
-                model_name="gpt-4o-mini",  # Vision 지원
-                temperature=settings.TEMPERATURE,
-                max_tokens=settings.MAX_TOKENS,
-                request_timeout=settings.REQUEST_TIMEOUT,
-            )
-        return self._vision_llm
+        return self.llm
     
     def _get_system_prompt(self) -> str:
         """중앙화된 시스템 프롬프트"""
-        return """너는 피부 병변을 진단하는 전문 AI이다. 다음은 네가 진단할 수 있는 피부 병변 목록이며, 각 병변의 임상적 특징은 아래와 같다. 환자에게 나타난 병변의 이미지와 설명을 바탕으로 가장 적합한 질병을 하나 선택하여 진단하라.
-아래 진단 기준을 참조하여 이미지에서 어떤 특징이 해당 질병의 특징에 해당되는지 설명하라
-
-0: 광선각화증
-1: 기저세포암
-2: 멜라닌세포모반
-3: 보웬병
-4: 비립종
-5: 사마귀
-6: 악성흑색종
-7: 지루각화증
-8: 편평세포암
-9: 표피낭종
-10: 피부섬유종
-11: 피지샘증식증
-12: 혈관종
-13: 화농 육아종
-14: 흑색점
-
-<root><label id_code="{코드}" score="{점수}">{진단명}</label><summary>{진단소견}</summary><similar_labels><similar_label id_code="{코드}" score="{점수}">{유사질병명}</similar_label><similar_label id_code="{코드}" score="{점수}">{유사질병명}</similar_label></similar_labels></root>
-
-예시:
-<root><label id_code="0" score="67.6">광선각화증</label><summary>이미지에서는 자외선 노출이 많은 부위인 얼굴에 붉은색의 각질성 반점이 관찰됩니다. 이는 만성 자외선 노출로 인한 DNA 손상으로 발생하며, 장기간 방치할 경우 피부암, 특히 편평세포암으로의 진행 가능성이 있습니다. 병변의 진행 속도가 느릴 수 있으나, 조기 발견 시 적절한 치료를 통해 예후를 양호하게 할 수 있습니다.</summary><similar_labels><similar_label id_code="3" score="16.6">보웬병</similar_label><similar_label id_code="1" score="5.7">기저세포암</similar_label></similar_labels></root>
-
-⚠️ 의료 면책 조항: 이 진단은 참고용이며, 최종 진단은 반드시 의료진과 상담하세요."""
+        return prompt_registry.system_prompt(SKIN_DIAGNOSIS)
     
-    def _initialize_prompt_templates(self) -> Dict[str, ChatPromptTemplate]:
+    @property
+    def prompt_templates(self) -> Dict[str, "ChatPromptTemplate"]:
+        if self._prompt_templates is None:
+            self._prompt_templates = self._initialize_prompt_templates()
+        return self._prompt_templates
+
+    def _initialize_prompt_templates(self) -> Dict[str, "ChatPromptTemplate"]:
         """중앙화된 프롬프트 템플릿 초기화 (OpenAI 텍스트 모델용)"""
+        from langchain.prompts import ChatPromptTemplate
+
         return {
             "custom_analysis": ChatPromptTemplate.from_messages([
                 ("system", "{system_message}"),
@@ -143,7 +211,10 @@ class LangChainService:
         while True:
             try:
                 return await func(*args, **kwargs)
-            except (OpenAIError, httpx.HTTPError, TimeoutError, Exception) as e:  # type: ignore
+            except HTTPException:
+                # 동시 호출 초과(503)는 재시도하지 않음 (재시도가 부하를 더 키움)
+                raise
+            except Exception as e:  # OpenAIError, httpx.HTTPError, TimeoutError 포함
                 if attempt >= retries:
                     raise
                 backoff = delay_base * (2 ** attempt)
@@ -157,21 +228,22 @@ class LangChainService:
         result: str, 
         analysis_type: str, 
         additional_info: Optional[str] = None,
+        provider_name: Optional[str] = None,
         **metadata_kwargs
     ) -> Dict[str, Any]:
-        """통일된 분석 결과 생성"""
+        """통일된 분석 결과 생성 (provider_name: 실제로 응답한 프로바이더, 없으면 설정값)"""
         analysis_id = str(uuid.uuid4())
         
         # 사용된 프로바이더 정보 추가
-        provider_info = "runpod" if settings.SKIN_DIAGNOSIS_PROVIDER.lower() == "runpod" else "openai"
-        model_info = "runpod-finetuned-model" if provider_info == "runpod" else "gpt-4o-mini"
+        provider_info = provider_name or self.configured_provider_name(TEXT_ROUTE)
         
         base_metadata = {
-            "model": model_info,
+            "model": self.provider_model(provider_info),
             "provider": provider_info,
             "analysis_type": analysis_type,
             "additional_info_provided": bool(additional_info),
-            "diagnosis_format": "xml_structured"
+            "diagnosis_format": "xml_structured",
+            "prompt_version": PROMPT_VERSION,
         }
         base_metadata.update(metadata_kwargs)
         
@@ -184,7 +256,9 @@ class LangChainService:
         }
     
     async def _handle_analysis_error(self, error: Exception, context: str) -> Exception:
-        """통일된 에러 처리"""
+        """통일된 에러 처리 (HTTPException은 상태 코드 유지를 위해 그대로 반환)"""
+        if isinstance(error, HTTPException):
+            return error
         error_message = f"{context} 중 오류가 발생했습니다: {str(error)}"
         logger.error(error_message, exc_info=True)
         return Exception(error_message)
@@ -196,21 +270,50 @@ class LangChainService:
     ) -> Dict[str, Any]:
         """텍스트 기반 피부 병변 진단 (프로바이더 시스템 사용)"""
         try:
-            logger.info(f"텍스트 기반 진단 시작 - 프로바이더: {settings.SKIN_DIAGNOSIS_PROVIDER}")
+            async def diagnose(target_name: str, reserved: bool) -> str:
+                # 요청 한도 예산 → 프로바이더별 동시 호출 슬롯 순서로 받은 뒤 호출 (두 대기 모두 라우터 응답 시간에서 제외)
+                target = self.provider(TEXT_ROUTE, target_name)
+                if not reserved:
+                    await target.reserve_rate_budget(lesion_description, additional_info)
+                return await provider_limiter.run(target_name, lambda: provider_router.observe(
+                    TEXT_ROUTE, target_name,
+                    target.diagnose_text(description=lesion_description, additional_info=additional_info),
+                ))
             
-            async def run_diagnosis():
-                return await self.skin_diagnosis_provider.diagnose_text(
-                    description=lesion_description,
-                    additional_info=additional_info
+            async def run_diagnosis() -> Tuple[str, str]:
+                # 시도마다 라우터가 프로바이더 선택 (서킷이 열리면 재시도부터 다른 프로바이더로)
+                name, provider = self.route(TEXT_ROUTE, claim=False)
+                logger.info(f"텍스트 기반 진단 시작 - 프로바이더: {name}")
+                key = flight_key(
+                    "skin_lesion_text", type(provider).__name__, model_config(getattr(provider, "llm", None)),
+                    PROMPT_VERSION, normalize_text(lesion_description), normalize_text(additional_info),
                 )
+                
+                async def lead() -> Tuple[str, str]:
+                    # 실제로 호출하는 리더만 라우터 슬롯(half-open 시험 요청 포함)을 차지, 합류한 요청은 결과만 공유
+                    # 주 프로바이더가 헤지 지연 안에 응답하지 않으면 보조 프로바이더로도 요청, (채택된 쪽 이름, 결과) 반환
+                    primary_name = self.route(TEXT_ROUTE, name=name)[0]
+                    # 주 요청의 한도 대기는 헤지 지연/응답 시간 측정 전에 끝냄
+                    await self.provider(TEXT_ROUTE, primary_name).reserve_rate_budget(lesion_description, additional_info)
+                    return await request_hedger.run(
+                        "skin_lesion_text", primary_name, self.hedge_provider(TEXT_ROUTE, primary_name)[0],
+                        lambda target_name: diagnose(target_name, reserved=target_name == primary_name),
+                        on_lost=partial(provider_router.record_lower_bound, TEXT_ROUTE),
+                    )
+                
+                # 같은 입력으로 진행 중인 호출(재시도/중복 제출)이 있으면 그 결과를 함께 기다림
+                return await llm_flights.do(key, lead)
             
-            result = await self._retry_async(run_diagnosis)
+            with generation_governor.track("skin_lesion_text") as generation:
+                served_name, result = await self._retry_async(run_diagnosis)
             
             return await self._create_analysis_result(
                 prompt=lesion_description,
                 result=result,
                 analysis_type="skin_lesion_text_diagnosis",
-                additional_info=additional_info
+                additional_info=additional_info,
+                provider_name=served_name,
+                **generation.as_metadata()
             )
             
         except Exception as e:
@@ -220,45 +323,218 @@ class LangChainService:
         self, 
         image_base64: str, 
         additional_info: Optional[str] = None,
-        questionnaire_data: Optional[dict] = None
+        questionnaire_data: Optional[dict] = None,
+        image_hash: Optional[str] = None,
+        image_phash: Optional[str] = None,
+        provider_name: Optional[str] = None,
+        image_for_profile: Optional[Callable[[ImageProfile], Awaitable[Dict[str, Any]]]] = None
     ) -> Dict[str, Any]:
-        """이미지 기반 피부 병변 진단 (별도 프로바이더 시스템 사용)"""
+        """이미지 기반 피부 병변 진단 (별도 프로바이더 시스템 사용)
+
+        image_hash가 주어지면 동일 이미지/프로바이더/모델/프롬프트 결과를 캐시에서 재사용하고,
+        image_phash가 주어지면 근접 중복 이미지의 결과도 재사용합니다.
+        provider_name은 전처리 프로파일을 고를 때 라우터가 정한 프로바이더로, 캐시 조회와 첫 시도에 사용
+        (재시도는 다시 라우팅). 메타데이터와 캐시 저장 키는 실제로 응답한 프로바이더 기준입니다.
+        image_for_profile(profile)은 다른 해상도 프로파일로 다시 전처리한 업로드({"image_data_url", "image_hash"})를
+        반환하며, 헤지 프로바이더의 프로파일이 주 프로바이더와 다를 때 헤지 요청 입력으로 사용
+        """
         try:
-            image_provider_name = settings.SKIN_DIAGNOSIS_IMAGE_PROVIDER.lower()
-            logger.info(f"이미지 기반 진단 시작 - 프로바이더: {image_provider_name}")
+            routed_name = provider_name or self.route(IMAGE_ROUTE, claim=False)[0]
+            pinned = [routed_name]
+            # image_base64는 routed_name 프로파일로 전처리된 이미지
+            prepared_profile = self.provider(IMAGE_ROUTE, routed_name).image_profile
+            
+            async def diagnose(target_name: str, sent_hashes: Dict[str, Optional[str]], reserved: bool) -> str:
+                target = self.provider(IMAGE_ROUTE, target_name)
+                if not reserved:
+                    await target.reserve_rate_budget(additional_info=additional_info, image=True)
+                image = image_base64
+                if image_for_profile and target.image_profile != prepared_profile:
+                    # 헤지/재라우팅된 프로바이더는 자기 프로파일로 다시 전처리한 이미지를 받음
+                    prepared = await image_for_profile(target.image_profile)
+                    image, sent_hashes[target_name] = prepared["image_data_url"], prepared["image_hash"]
+                return await provider_limiter.run(target_name, lambda: provider_router.observe(
+                    IMAGE_ROUTE, target_name,
+                    target.diagnose_image(
+                        image_base64=image,
+                        additional_info=additional_info,
+                        questionnaire_data=questionnaire_data
+                    ),
+                ))
             
-            async def run_diagnosis():
-                return await self.skin_diagnosis_image_provider.diagnose_image(
-                    image_base64=image_base64,
-                    additional_info=additional_info,
-                    questionnaire_data=questionnaire_data
+            async def run_diagnosis() -> Tuple[str, str, Optional[str]]:
+                name, provider = self.route(IMAGE_ROUTE, claim=False, name=pinned.pop() if pinned else None)
+                logger.info(f"이미지 기반 진단 시작 - 프로바이더: {name}")
+                key = flight_key(
+                    "skin_lesion_image", type(provider).__name__, model_config(getattr(provider, "vision_llm", None)),
+                    PROMPT_VERSION, image_hash or image_base64, normalize_text(additional_info), questionnaire_data,
                 )
+                
+                async def lead() -> Tuple[str, str, Optional[str]]:
+                    # 실제로 호출하는 리더만 라우터 슬롯을 차지 (텍스트 진단과 동일)
+                    primary_name = self.route(IMAGE_ROUTE, name=name)[0]
+                    await self.provider(IMAGE_ROUTE, primary_name).reserve_rate_budget(
+                        additional_info=additional_info, image=True
+                    )
+                    # 프로바이더별로 실제 보낸 이미지의 해시
+                    sent_hashes: Dict[str, Optional[str]] = {}
+                    winner, result = await request_hedger.run(
+                        "skin_lesion_image", primary_name, self.hedge_provider(IMAGE_ROUTE, primary_name)[0],
+                        lambda target_name: diagnose(target_name, sent_hashes, reserved=target_name == primary_name),
+                        on_lost=partial(provider_router.record_lower_bound, IMAGE_ROUTE),
+                    )
+                    return winner, result, sent_hashes.get(winner, image_hash)
+                
+                return await llm_flights.do(key, lead)
             
-            result = await self._retry_async(run_diagnosis)
+            async def identified_diagnosis() -> Tuple[str, Tuple[str, str, str]]:
+                served_name, result, served_hash = await self._retry_async(run_diagnosis)
+                return result, (*self.image_provider_identity(served_name), served_hash)
             
-            # 이미지 프로바이더 정보로 메타데이터 생성
-            provider_info = image_provider_name
-            model_info = "gpt-4o-mini" if provider_info == "openai" else "runpod-finetuned-model"
+            cache_meta = {"cache_hit": False}
+            with generation_governor.track("skin_lesion_image") as generation:
+                if image_hash:
+                    result, (served_name, _, _), cache_meta = await cached_routed_image_diagnosis(
+                        identified_diagnosis,
+                        image_hash, *self.image_provider_identity(routed_name), PROMPT_VERSION,
+                        image_phash=image_phash,
+                        additional_info=additional_info, questionnaire=questionnaire_data,
+                    )
+                else:
+                    served_name, result, _ = await self._retry_async(run_diagnosis)
             
-            return {
-                "id": str(uuid.uuid4()),
-                "prompt": "피부 병변 이미지 분석",
-                "result": result,
-                "metadata": {
-                    "model": model_info,
-                    "provider": provider_info,
-                    "analysis_type": "skin_lesion_image_diagnosis",
-                    "additional_info_provided": bool(additional_info),
-                    "diagnosis_format": "xml_structured",
-                    "image_analyzed": True,
-                    "questionnaire_included": bool(questionnaire_data)
-                },
-                "created_at": datetime.now()
-            }
+            return self._image_analysis_result(
+                result, served_name, additional_info, questionnaire_data, {**cache_meta, **generation.as_metadata()}
+            )
             
         except Exception as e:
             raise await self._handle_analysis_error(e, "이미지 기반 피부 병변 진단")
     
+    def _image_analysis_result(
+        self,
+        result: str,
+        provider_name: str,
+        additional_info: Optional[str],
+        questionnaire_data: Optional[dict],
+        cache_meta: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """이미지 진단 분석 결과 생성 (실제로 응답한 이미지 프로바이더 정보로 메타데이터 구성)"""
+        return {
+            "id": str(uuid.uuid4()),
+            "prompt": "피부 병변 이미지 분석",
+            "result": result,
+            "metadata": {
+                "model": self.provider_model(provider_name),
+                "provider": provider_name,
+                "analysis_type": "skin_lesion_image_diagnosis",
+                "additional_info_provided": bool(additional_info),
+                "diagnosis_format": "xml_structured",
+                "prompt_version": PROMPT_VERSION,
+                "image_analyzed": True,
+                "questionnaire_included": bool(questionnaire_data),
+                **cache_meta
+            },
+            "created_at": datetime.now()
+        }
+    
+    async def _hold_stream(
+        self, route: str, name: str, budget: Awaitable[None], chunks: Callable[[], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """라우터 슬롯을 차지한 name 프로바이더의 요청 한도 예산(budget) → 동시 호출 슬롯을 받음
+
+        한도 대기 중에는 동시 호출 슬롯을 점유하지 않음, 과부하 503이면 라우터 슬롯 반환
+        """
+        try:
+            await budget
+            return await provider_limiter.stream(name, chunks)
+        except BaseException:
+            provider_router.release(route, name)
+            raise
+    
+    async def stream_skin_lesion_diagnosis(
+        self,
+        lesion_description: str,
+        additional_info: Optional[str] = None
+    ) -> DiagnosisStream:
+        """텍스트 기반 피부 병변 진단 (토큰 스트리밍)
+
+        라우팅/동시 호출 슬롯은 응답 시작 전에 받으므로 여기서 난 오류(과부하 503 등)는 일반 HTTP 오류로 반환
+        응답 도중 실패는 재시도하지 않음 (이미 전송한 토큰을 되돌릴 수 없음)
+        """
+        name, provider = self.route(TEXT_ROUTE)
+        logger.info(f"텍스트 기반 스트리밍 진단 시작 - 프로바이더: {name}")
+        budget = provider.reserve_rate_budget(lesion_description, additional_info)
+        held = await self._hold_stream(TEXT_ROUTE, name, budget, lambda: provider.stream_text(
+            description=lesion_description,
+            additional_info=additional_info
+        ))
+        chunks = provider_router.observe_stream(TEXT_ROUTE, name, held)
+        
+        async def finalize(result: str) -> Dict[str, Any]:
+            return await self._create_analysis_result(
+                prompt=lesion_description,
+                result=result,
+                analysis_type="skin_lesion_text_diagnosis",
+                additional_info=additional_info,
+                provider_name=name,
+                streamed=True
+            )
+        
+        return DiagnosisStream(chunks, finalize, "skin_lesion_text")
+    
+    async def stream_skin_lesion_diagnosis_with_image(
+        self,
+        image_base64: str,
+        additional_info: Optional[str] = None,
+        questionnaire_data: Optional[dict] = None,
+        image_hash: Optional[str] = None,
+        image_phash: Optional[str] = None,
+        provider_name: Optional[str] = None
+    ) -> DiagnosisStream:
+        """이미지 기반 피부 병변 진단 (토큰 스트리밍)
+
+        캐시 히트 시 저장된 XML을 한 조각으로 즉시 반환하고, 미스 시 완성된 응답을 캐시에 저장
+        provider_name은 전처리 프로파일을 고를 때 라우터가 정한 프로바이더 (없으면 여기서 라우팅)
+        라우팅/캐시 조회/동시 호출 슬롯은 응답 시작 전에 처리하므로 여기서 난 오류(과부하 503 등)는 일반 HTTP 오류로 반환
+        """
+        name, provider = self.route(IMAGE_ROUTE, claim=False, name=provider_name)
+        logger.info(f"이미지 기반 스트리밍 진단 시작 - 프로바이더: {name}")
+        
+        cache_args: Optional[Tuple[Any, ...]] = None
+        cached, cache_meta = None, {"cache_hit": False}
+        if image_hash:
+            cache_args = (image_hash, *self.image_provider_identity(name), PROMPT_VERSION)
+            cached, cache_meta = lookup_image_diagnosis(
+                *cache_args, image_phash=image_phash,
+                additional_info=additional_info, questionnaire=questionnaire_data,
+            )
+        
+        if cached is not None:
+            chunks = _single_chunk(cached)
+        else:
+            name, provider = self.route(IMAGE_ROUTE, name=name)
+            if cache_args is not None:
+                cache_args = (image_hash, *self.image_provider_identity(name), PROMPT_VERSION)
+            budget = provider.reserve_rate_budget(additional_info=additional_info, image=True)
+            held = await self._hold_stream(IMAGE_ROUTE, name, budget, lambda: provider.stream_image(
+                image_base64=image_base64,
+                additional_info=additional_info,
+                questionnaire_data=questionnaire_data
+            ))
+            chunks = provider_router.observe_stream(IMAGE_ROUTE, name, held)
+        
+        async def finalize(result: str) -> Dict[str, Any]:
+            if cached is None and cache_args is not None:
+                store_image_diagnosis(
+                    result, *cache_args, image_phash=image_phash,
+                    additional_info=additional_info, questionnaire=questionnaire_data,
+                )
+            analysis = self._image_analysis_result(result, name, additional_info, questionnaire_data, cache_meta)
+            analysis["metadata"]["streamed"] = True
+            return analysis
+        
+        return DiagnosisStream(chunks, finalize, "skin_lesion_image")
+    
     async def analyze_text(self, prompt: str, context: Optional[str] = None) -> Dict[str, Any]:
         """일반 텍스트 분석 (하위 호환성)"""
         return await self.diagnose_skin_lesion(prompt, context)
@@ -270,6 +546,8 @@ class LangChainService:
     ) -> Dict[str, Any]:
         """커스텀 프롬프트 분석 (OpenAI 텍스트 모델 사용)"""
         try:
+            from langchain.chains import LLMChain
+
             template = self.prompt_templates["custom_analysis"]
             chain = LLMChain(llm=self.llm, prompt=template)
             async def run_chain():
@@ -283,6 +561,7 @@ class LangChainService:
                 prompt=prompt,
                 result=result,
                 analysis_type="custom_skin_diagnosis",
+                provider_name="openai",
                 custom_system_message=bool(system_message)
             )
             
@@ -3,6 +3,7 @@ from langchain.prompts import ChatPromptTemplate
 from langchain.chains import LLMChain
 from langchain_core.messages import HumanMessage, SystemMessage, BaseMessage
 from app.core.config import settings
+from app.core.prompt_registry import DIAGNOSIS_SYSTEM_PROMPT
 from typing import Dict, Any, Optional, List
 import uuid
 from datetime import datetime
@@ -17,29 +18,7 @@ class LangChainService:
         )
         
         # 피부 병변 진단 전용 시스템 프롬프트
-        self.system_prompt = """너는 피부 병변을 진단하는 전문 AI이다. 다음은 네가 진단할 수 있는 피부 병변 목록이며, 각 병변의 임상적 특징은 아래와 같다. 환자에게 나타난 병변의 이미지와 설명을 바탕으로 가장 적합한 질병을 하나 선택하여 진단하라.
-아래 진단 기준을 참조하여 이미지에서 어떤 특징이 해당 질병의 특징에 해당되는지 설명하라
-
-0: 광선각화증
-1: 기저세포암
-2: 멜라닌세포모반
-3: 보웬병
-4: 비립종
-5: 사마귀
-6: 악성흑색종
-7: 지루각화증
-8: 편평세포암
-9: 표피낭종
-10: 피부섬유종
-11: 피지샘증식증
-12: 혈관종
-13: 화농 육아종
-14: 흑색점
-
-<root><label id_code="{코드}" score="{점수}">{진단명}</label><summary>{진단소견}</summary><similar_labels><similar_label id_code="{코드}" score="{점수}">{유사질병명}</similar_label><similar_label id_code="{코드}" score="{점수}">{유사질병명}</similar_label></similar_labels></root>
-
-예시:
-<root><label id_code="0" score="67.6">광선각화증</label><summary>이미지에서는 자외선 노출이 많은 부위인 얼굴에 붉은색의 각질성 반점이 관찰됩니다. 이는 만성 자외선 노출로 인한 DNA 손상으로 발생하며, 장기간 방치할 경우 피부암, 특히 편평세포암으로의 진행 가능성이 있습니다. 병변의 진행 속도가 느릴 수 있으나, 조기 발견 시 적절한 치료를 통해 예후를 양호하게 할 수 있습니다.</summary><similar_labels><similar_label id_code="3" score="16.6">보웬병</similar_label><similar_label id_code="1" score="5.7">기저세포암</similar_label></similar_labels></root>"""
+        self.system_prompt = DIAGNOSIS_SYSTEM_PROMPT
         
         # 피부 병변 진단 프롬프트 템플릿
         self.analysis_template = ChatPromptTemplate.from_messages([
@@ -0,0 +1,146 @@
+from collections import OrderedDict
+from itertools import combinations
+from typing import Dict, List, Optional, Set, Tuple
+
+HASH_BITS = 64
+
+
+class MultiIndexHammingIndex:
+    """64비트 해시의 해밍 거리 근접 검색 (multi-index hashing)
+
+    해시를 chunks개의 조각으로 나눠 조각별 해시 테이블에 저장합니다.
+    비둘기집 원리로 거리 max_distance 이내의 해시는 적어도 한 조각이
+    max_distance // chunks 이내로 일치하므로, 그 범위의 비트 변형만 조회한 뒤
+    후보를 전체 거리로 검증합니다. 오래된 항목은 LRU로 제거됩니다.
+    """
+
+    def __init__(self, max_distance: int, max_entries: int, chunks: int = 4):
+        self.max_distance = max_distance
+        self.max_entries = max(1, max_entries)
+        self.chunks = chunks
+        self.chunk_bits = HASH_BITS // chunks
+        self._chunk_mask = (1 << self.chunk_bits) - 1
+        self._sub_radius = max_distance // chunks
+        # 각 조각에서 뒤집어 볼 비트 마스크 목록 (0 포함)
+        self._flip_masks = [0]
+        for radius in range(1, self._sub_radius + 1):
+            for positions in combinations(range(self.chunk_bits), radius):
+                mask = 0
+                for position in positions:
+                    mask |= 1 << position
+                self._flip_masks.append(mask)
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in range(chunks)]
+        self._entries: "OrderedDict[int, str]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _split(self, value: int) -> List[int]:
+        return [(value >> (i * self.chunk_bits)) & self._chunk_mask for i in range(self.chunks)]
+
+    def add(self, value: int, payload: str) -> None:
+        if value in self._entries:
+            self._entries[value] = payload
+            self._entries.move_to_end(value)
+            return
+        self._entries[value] = payload
+        for table, chunk in zip(self._tables, self._split(value)):
+            table.setdefault(chunk, set()).add(value)
+        while len(self._entries) > self.max_entries:
+            oldest, _ = self._entries.popitem(last=False)
+            self._remove_from_tables(oldest)
+
+    def _remove_from_tables(self, value: int) -> None:
+        for table, chunk in zip(self._tables, self._split(value)):
+            bucket = table.get(chunk)
+            if bucket is not None:
+                bucket.discard(value)
+                if not bucket:
+                    del table[chunk]
+
+    def remove(self, value: int, payload: Optional[str] = None) -> None:
+        """value 항목 제거 (payload가 주어지면 그 payload를 가진 항목일 때만)"""
+        if payload is not None and self._entries.get(value) != payload:
+            return
+        if self._entries.pop(value, None) is not None:
+            self._remove_from_tables(value)
+
+    def within(self, value: int) -> List[Tuple[str, int]]:
+        """max_distance 이내의 모든 항목 (payload, 거리)을 가까운 순으로 반환"""
+        matches: Dict[int, int] = {}
+        for table, chunk in zip(self._tables, self._split(value)):
+            for mask in self._flip_masks:
+                for candidate in table.get(chunk ^ mask, ()):
+                    if candidate not in matches:
+                        matches[candidate] = (candidate ^ value).bit_count()
+        ordered = sorted((distance, candidate) for candidate, distance in matches.items() if distance <= self.max_distance)
+        return [(self._entries[candidate], distance) for distance, candidate in ordered]
+
+    def nearest(self, value: int) -> Optional[Tuple[str, int]]:
+        """max_distance 이내에서 가장 가까운 항목의 (payload, 거리) 반환"""
+        best: Optional[Tuple[int, int]] = None
+        seen: Set[int] = set()
+        for table, chunk in zip(self._tables, self._split(value)):
+            for mask in self._flip_masks:
+                bucket = table.get(chunk ^ mask)
+                if not bucket:
+                    continue
+                for candidate in bucket:
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    distance = (candidate ^ value).bit_count()
+                    if distance <= self.max_distance and (best is None or distance < best[1]):
+                        best = (candidate, distance)
+                        if distance == 0:
+                            return self._entries[candidate], 0
+        if best is None:
+            return None
+        return self._entries[best[0]], best[1]
+
+
+class NearDuplicateIndex:
+    """컨텍스트(프로바이더/모델/프롬프트/추가 입력)별 perceptual hash 인덱스
+
+    항목의 payload는 결과 캐시 키이며, 캐시에서 만료/LRU로 빠진 키는 remove_key로 함께 제거합니다.
+    """
+
+    def __init__(self, max_distance: int, max_entries: int):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self._indexes: Dict[str, MultiIndexHammingIndex] = {}
+        # 캐시 키 → (컨텍스트, 해시), 캐시 제거 시 인덱스 항목을 찾기 위함
+        self._keys: Dict[str, Tuple[str, int]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self._indexes.values())
+
+    def add(self, context: str, phash: str, cache_key: str) -> None:
+        index = self._indexes.get(context)
+        if index is None:
+            index = MultiIndexHammingIndex(self.max_distance, self.max_entries)
+            self._indexes[context] = index
+        self.remove_key(cache_key)
+        value = int(phash, 16)
+        index.add(value, cache_key)
+        self._keys[cache_key] = (context, value)
+
+    def remove_key(self, cache_key: str) -> None:
+        """결과 캐시에서 제거된 키의 인덱스 항목 제거 (같은 해시를 다른 키가 덮어쓴 경우는 유지)"""
+        location = self._keys.pop(cache_key, None)
+        if location is None:
+            return
+        context, value = location
+        index = self._indexes.get(context)
+        if index is None:
+            return
+        index.remove(value, cache_key)
+        if not len(index):
+            del self._indexes[context]
+
+    def find(self, context: str, phash: str) -> List[Tuple[str, int]]:
+        """max_distance 이내 항목 (캐시 키, 거리) 목록, 가까운 순"""
+        index = self._indexes.get(context)
+        if index is None:
+            return []
+        return index.within(int(phash, 16))
@@ -1,14 +1,16 @@
 from datetime import datetime
 from typing import Optional
 from app.core.config import settings
+from app.core.provider_limits import provider_limiter
+from app.core.single_flight import flight_key, llm_flights, model_config, normalize_text
 from app.providers.base import TextRefineProvider
-from app.providers.openai_text import OpenAITextRefiner
+from app.providers.direct_chat import build_refiner_provider
 
 
 def _build_refiner_provider() -> TextRefineProvider:
     provider = (settings.SYMPTOM_REFINER_PROVIDER or "openai").lower()
     # 현재는 OpenAI만 지원. 이후 필요 시 분기 추가
-    return OpenAITextRefiner()
+    return build_refiner_provider()
 
 
 class RefinerService:
@@ -26,7 +28,14 @@ class RefinerService:
             }
         
         # 텍스트가 있으면 기존 로직 수행
-        refined = await self.provider.refine(text=text, language=language)
+        # 같은 원문의 동시 정제 요청(중복 제출 등)은 한 번만 호출
+        key = flight_key(
+            "refine", type(self.provider).__name__, model_config(self.provider.llm),
+            normalize_text(text), language or "ko",
+        )
+        refined = await llm_flights.do(
+            key, lambda: provider_limiter.run("openai", lambda: self.provider.refine(text=text, language=language))
+        )
         return {
             "refined_text": refined.strip(),
             "style": "doctor-visit",
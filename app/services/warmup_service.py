@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+WARMUP_MODES = ("none", "connect", "request")
+
+
+class WarmupService:
+    """기동 직후 지연 초기화 비용을 미리 치르고 준비 상태(readiness)를 관리
+
+    - 프로바이더/LLM 클라이언트 생성(LangChain/OpenAI SDK import 포함), Pillow 플러그인 로딩,
+      프롬프트 토큰 인코딩 로딩 (모든 모드 공통)
+    - connect: 프로바이더 base_url마다 GET /models로 DNS+TCP+TLS 커넥션을 미리 열어 풀에 보관
+    - request: 프로바이더마다 짧은 텍스트 진단을 실제로 1회 호출 (로컬 스텁 등 비용 없는 엔드포인트용)
+    워밍업 실패는 기록만 하고 준비 상태 전환을 막지 않음 (첫 요청이 느릴 뿐 처리는 가능)
+    """
+
+    def __init__(self, mode: str, timeout: float):
+        self.mode = mode if mode in WARMUP_MODES else "connect"
+        self.timeout = timeout
+        self.ready = False
+        self.report: Dict[str, Any] = {}
+
+    def _providers(self) -> Dict[str, Any]:
+        """워밍업 대상 프로바이더 (싱글톤 생성 포함)"""
+        from app.services.interpretation_service import interpretation_service
+        from app.services.langchain_service import langchain_service
+
+        return {
+            "skin_diagnosis": langchain_service.skin_diagnosis_provider,
+            "skin_diagnosis_image": langchain_service.skin_diagnosis_image_provider,
+            "interpretation": interpretation_service.provider,
+        }
+
+    def _chat_models(self, providers: Dict[str, Any]) -> List[Any]:
+        """프로바이더/서비스가 사용할 LLM 클라이언트(ChatOpenAI 또는 직접 호출)를 미리 생성"""
+        from app.services.refiner_service import refiner_service
+
+        models = []
+        for provider in providers.values():
+            models.extend([provider.llm, provider.vision_llm])
+        models.append(refiner_service.provider.llm)
+        return models
+
+    @staticmethod
+    def _endpoint(llm: Any) -> Tuple[Optional[str], str]:
+        """ChatOpenAI 또는 직접 호출 클라이언트의 (base_url, api_key)"""
+        if hasattr(llm, "openai_api_base"):
+            return llm.openai_api_base, llm.openai_api_key.get_secret_value() if llm.openai_api_key else ""
+        return llm.base_url, llm.api_key
+
+    async def _open_connection(self, llm: Any) -> Dict[str, Any]:
+        from app.core.llm_clients import OPENAI_BASE_URL, llm_client_registry
+
+        base_url, api_key = self._endpoint(llm)
+        response = await llm_client_registry.http_client(base_url).get(
+            f"{(base_url or OPENAI_BASE_URL).rstrip('/')}/models",
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=self.timeout,
+        )
+        # 인증 실패(401 등)여도 커넥션은 열렸으므로 상태 코드만 기록
+        return {"status_code": response.status_code}
+
+    async def _warm_request(self, provider: Any) -> Dict[str, Any]:
+        await asyncio.wait_for(provider.diagnose_text("워밍업 요청입니다. 짧게 응답하세요."), self.timeout)
+        return {}
+
+    async def _timed(self, target: str, coro) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result: Dict[str, Any] = {"target": target}
+        try:
+            result.update(await coro)
+            result["ok"] = True
+        except Exception as e:
+            logger.warning(f"워밍업 요청 실패 ({target}): {e}")
+            result.update({"ok": False, "error": str(e)})
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    async def run(self) -> Dict[str, Any]:
+        """워밍업 수행 후 준비 상태로 전환"""
+        started = time.perf_counter()
+        report: Dict[str, Any] = {"mode": self.mode, "requests": []}
+        try:
+            # 스레드풀 모드에서 첫 요청이 Pillow/NumPy import 비용을 치르지 않도록 미리 로딩
+            from PIL import Image
+            import app.core.image_utils  # noqa: F401
+
+            Image.init()
+            # 토큰 인코딩은 최초 로딩 시 어휘 파일을 내려받을 수 있으므로 요청 경로가 아닌 여기서 로딩
+            from app.core.prompt_compiler import prompt_token_counter
+
+            await asyncio.to_thread(prompt_token_counter.load)
+            report["tokenizer"] = prompt_token_counter.name
+            providers = self._providers()
+            models = self._chat_models(providers)
+            report["providers"] = {name: type(provider).__name__ for name, provider in providers.items()}
+
+            if self.mode == "connect":
+                # 같은 base_url은 커넥션 풀을 공유하므로 한 번만 연결
+                targets = {self._endpoint(llm)[0]: llm for llm in models}
+                report["requests"] = await asyncio.gather(
+                    *(self._timed(base_url or "openai", self._open_connection(llm)) for base_url, llm in targets.items())
+                )
+            elif self.mode == "request":
+                report["requests"] = await asyncio.gather(
+                    *(self._timed(name, self._warm_request(provider)) for name, provider in providers.items())
+                )
+        except Exception as e:
+            logger.error(f"워밍업 중 오류: {e}", exc_info=True)
+            report["error"] = str(e)
+
+        report["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self.report = report
+        self.ready = True
+        logger.info(f"워밍업 완료 ({report['elapsed_ms']}ms), 요청 수신 준비됨")
+        return report
+
+    def status(self) -> Dict[str, Any]:
+        return {"status": "ready" if self.ready else "starting", "warmup": self.report}
+
+
+warmup_service = WarmupService(mode=settings.WARMUP_MODE.lower(), timeout=settings.WARMUP_TIMEOUT)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+축소 디코딩 벤치마크
+draft()/reduce() 경로와 전체 디코딩 + LANCZOS의 CPU 시간, 디코딩 픽셀 수 비교
+(결정적인 회귀 검사는 test_decode_downscale.py)
+"""
+
+import io
+import sys
+import os
+import time
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from app.core.image_utils import MAX_IMAGE_SIZE, decode_downscaled
+from bench_image_preprocess import make_sample_image
+
+REPEAT = 3
+
+
+def full_decode(data: bytes) -> Image.Image:
+    """기준 경로: 전체 해상도 디코딩 후 LANCZOS 축소"""
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    image.thumbnail(MAX_IMAGE_SIZE, Image.Resampling.LANCZOS, reducing_gap=None)
+    return image
+
+
+def downscaled_decode(data: bytes) -> Image.Image:
+    return decode_downscaled(Image.open(io.BytesIO(data)))
+
+
+def cpu_time_ms(func, data: bytes) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.process_time()
+        func(data)
+        best = min(best, time.process_time() - start)
+    return best * 1000
+
+
+def decoded_pixels(data: bytes) -> int:
+    """draft 적용 후 디코더가 실제로 할당하는 픽셀 수"""
+    image = Image.open(io.BytesIO(data))
+    image.draft("RGB", MAX_IMAGE_SIZE)
+    return image.size[0] * image.size[1]
+
+
+def main():
+    print("=" * 70)
+    print("🧪 축소 디코딩 CPU 시간 (ms) / 디코딩 픽셀 수")
+    print("=" * 70)
+    for size in [(4000, 3000), (8000, 6000)]:
+        for fmt in ["JPEG", "PNG", "WEBP"]:
+            data = make_sample_image(size, fmt)
+            before = cpu_time_ms(full_decode, data)
+            after = cpu_time_ms(downscaled_decode, data)
+            pixels = decoded_pixels(data) if fmt == "JPEG" else size[0] * size[1]
+            label = f"{size[0] * size[1] // 1_000_000}MP {fmt}"
+            print(f"{label:<12}{before:>10.1f}{after:>10.1f}{before / after:>8.2f}x  decoded={pixels}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
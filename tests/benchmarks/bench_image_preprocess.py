@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+이미지 전처리 벤치마크
+기존 경로(get_image_info + encode_image_to_base64, 2회 디코딩)와
+단일 디코딩 경로(preprocess_image_bytes)의 이미지당 CPU 시간 비교
+기존 경로는 개선 전 구현을 그대로 고정해 두고 비교 (현재 코드끼리 비교하지 않도록)
+"""
+
+import base64
+import io
+import sys
+import os
+import time
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+from PIL import Image
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from app.core.image_utils import preprocess_image_bytes
+
+# 메가픽셀별 해상도 (4:3)
+RESOLUTIONS = {
+    "1MP": (1152, 864),
+    "4MP": (2304, 1728),
+    "12MP": (4000, 3000),
+}
+FORMATS = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+}
+REPEAT = 3
+
+
+def make_sample_image(size, fmt: str) -> bytes:
+    """피부 사진과 비슷하게 부드러운 그라디언트 + 노이즈 이미지 생성"""
+    w, h = size
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:h, 0:w]
+    base = np.stack([
+        180 + 40 * np.sin(xx / 97.0),
+        140 + 30 * np.cos(yy / 83.0),
+        120 + 20 * np.sin((xx + yy) / 131.0),
+    ], axis=-1)
+    noise = rng.normal(0, 6, size=base.shape)
+    pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, "RGB").save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def make_upload(data: bytes, content_type: str) -> UploadFile:
+    return UploadFile(
+        file=io.BytesIO(data),
+        filename="sample",
+        size=len(data),
+        headers=Headers({"content-type": content_type}),
+    )
+
+
+def legacy_get_image_info(image_file: UploadFile) -> dict:
+    """개선 전 get_image_info (전체 디코딩 없이 헤더만 읽지만 파일을 한 번 더 읽음)"""
+    image_data = image_file.file.read()
+    image = Image.open(io.BytesIO(image_data))
+    image_file.file.seek(0)
+    return {
+        "filename": image_file.filename,
+        "content_type": image_file.content_type,
+        "size": image_file.size,
+        "dimensions": image.size,
+        "mode": image.mode,
+        "format": image.format
+    }
+
+
+def legacy_encode_image_to_base64(image_file: UploadFile) -> str:
+    """개선 전 encode_image_to_base64 (원본 해상도 전체 디코딩 후 LANCZOS 축소, JPEG q85 optimize)"""
+    image_data = image_file.file.read()
+    image = Image.open(io.BytesIO(image_data))
+    max_size = (1024, 1024)
+    if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
+        image.thumbnail(max_size, Image.Resampling.LANCZOS)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=85, optimize=True)
+    buffer.seek(0)
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+
+def legacy_path(data: bytes, content_type: str):
+    upload = make_upload(data, content_type)
+    info = legacy_get_image_info(upload)
+    encoded = legacy_encode_image_to_base64(upload)
+    return info, encoded
+
+
+def single_decode_path(data: bytes, content_type: str):
+    return preprocess_image_bytes(data, filename="sample", content_type=content_type)
+
+
+def cpu_time_ms(func, *args) -> float:
+    """REPEAT회 실행한 뒤 이미지당 최소 CPU 시간(ms) 반환"""
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.process_time()
+        func(*args)
+        best = min(best, time.process_time() - start)
+    return best * 1000
+
+
+def main():
+    print("=" * 70)
+    print("🧪 이미지 전처리 CPU 시간 (이미지당, ms)")
+    print("=" * 70)
+    print(f"{'입력':<12}{'기존(2회 디코딩)':>18}{'단일 디코딩':>14}{'개선':>10}")
+    for res_name, size in RESOLUTIONS.items():
+        for fmt, content_type in FORMATS.items():
+            data = make_sample_image(size, fmt)
+            before = cpu_time_ms(legacy_path, data, content_type)
+            after = cpu_time_ms(single_decode_path, data, content_type)
+            label = f"{res_name} {fmt}"
+            print(f"{label:<12}{before:>18.1f}{after:>14.1f}{before / after:>9.2f}x")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
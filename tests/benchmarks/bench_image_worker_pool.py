@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+이미지 워커 풀 벤치마크
+포화 시 503 거절까지 걸리는 시간, 프로세스/스레드 모드의 작업당 분배 지연 비교
+(거절/타임아웃/슬롯 점유 동작 검사는 tests/core/test_image_worker_pool.py)
+"""
+
+import asyncio
+import statistics
+import sys
+import os
+import time
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from fastapi import HTTPException
+
+from app.core.image_utils import ImageWorkerPool
+
+REJECTS = 200
+JOBS = 100
+
+
+def _pool(processes: int) -> ImageWorkerPool:
+    return ImageWorkerPool(processes=processes, queue_size=0, timeout=10.0, max_tasks_per_child=0)
+
+
+def rejection_ms(pool: ImageWorkerPool) -> list:
+    """워커가 모두 바쁠 때 요청마다 503을 받기까지의 시간 (ms)"""
+
+    async def scenario():
+        busy = [asyncio.ensure_future(pool.run(time.sleep, 0.5)) for _ in range(pool.capacity)]
+        await asyncio.sleep(0.05)
+        samples = []
+        for _ in range(REJECTS):
+            started = time.perf_counter()
+            try:
+                await pool.run(time.sleep, 0)
+            except HTTPException:
+                samples.append((time.perf_counter() - started) * 1000)
+        await asyncio.gather(*busy)
+        return samples
+
+    return asyncio.run(scenario())
+
+
+def dispatch_ms(pool: ImageWorkerPool) -> float:
+    """빈 작업 하나를 보내고 결과를 받기까지의 평균 시간 (ms, 워커 기동 제외)"""
+
+    async def scenario():
+        await pool.run(sum, [0])
+        started = time.perf_counter()
+        for _ in range(JOBS):
+            await pool.run(sum, [1, 2])
+        return (time.perf_counter() - started) * 1000 / JOBS
+
+    return asyncio.run(scenario())
+
+
+def main():
+    print("=" * 70)
+    print("🧪 이미지 워커 풀: 포화 시 거절 시간 / 작업당 분배 지연 (ms)")
+    print("=" * 70)
+    for label, processes in (("process", 1), ("thread", 0)):
+        pool = _pool(processes)
+        try:
+            rejects = rejection_ms(pool)
+            dispatch = dispatch_ms(pool)
+        finally:
+            pool.shutdown()
+        print(
+            f"{label:<8} reject p50={statistics.median(rejects):.3f} max={max(rejects):.3f}  "
+            f"dispatch={dispatch:.3f}"
+        )
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+LLM 호출 경로 벤치마크 (LangChain vs 직접 호출)
+로컬 OpenAI 호환 스텁 서버로 호출당/요청 본문 구성당 CPU 시간과 메모리 할당량 비교 (외부 API 호출 없음)
+(요청 본문 동등성/백엔드 선택 검사는 test_llm_backend.py)
+"""
+
+import asyncio
+import base64
+import json
+import sys
+import os
+import time
+import tracemalloc
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core.config import settings
+from app.core.llm_clients import llm_client_registry
+from app.providers.direct_chat import DirectRunPodMedicalInterpreter
+from app.providers.runpod_medical import RunPodMedicalInterpreter
+from tests.chat_stub import ChatStub
+
+CALLS = 200
+IMAGE_BASE64 = base64.b64encode(b"\xff\xd8\xff" + b"\x00" * 24 * 1024).decode()
+
+
+def _run(coro_factory):
+    async def scenario():
+        try:
+            return await coro_factory()
+        finally:
+            await llm_client_registry.aclose()
+
+    return asyncio.run(scenario())
+
+
+def measure(provider, calls: int = CALLS) -> dict:
+    """이미지 진단 호출당 CPU 시간(ms)과 호출 중 최대 추가 할당량(KB, 스텁 서버 스레드 포함)"""
+
+    async def scenario():
+        # 첫 호출(커넥션/지연 import)은 측정에서 제외
+        await provider.diagnose_image(IMAGE_BASE64)
+        cpu_started = time.process_time()
+        for _ in range(calls):
+            await provider.diagnose_image(IMAGE_BASE64)
+        cpu_ms = (time.process_time() - cpu_started) * 1000 / calls
+
+        tracemalloc.start()
+        peaks = []
+        for _ in range(min(calls, 20)):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            await provider.diagnose_image(IMAGE_BASE64)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        tracemalloc.stop()
+        return {"cpu_ms_per_call": cpu_ms, "peak_kb_per_call": sum(peaks) / len(peaks) / 1024}
+
+    return _run(scenario)
+
+
+def measure_body(provider, calls: int = CALLS) -> dict:
+    """네트워크를 제외한 요청 본문 구성 비용 (LangChain: 메시지 변환+SDK 직렬화, 직접: build_body)"""
+    content = provider._image_user_content(IMAGE_BASE64, None)
+    if isinstance(provider, DirectRunPodMedicalInterpreter):
+        build = lambda: provider.vision_llm.build_body(content)  # noqa: E731
+    else:
+        from langchain_core.messages import HumanMessage, SystemMessage
+
+        llm = provider.vision_llm
+
+        def build():
+            messages = [SystemMessage(content=provider._get_system_prompt()), HumanMessage(content=content)]
+            return json.dumps(llm._get_request_payload(messages)).encode()
+
+    cpu_started = time.process_time()
+    for _ in range(calls):
+        build()
+    cpu_ms = (time.process_time() - cpu_started) * 1000 / calls
+    tracemalloc.start()
+    build()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"cpu_ms_per_call": cpu_ms, "peak_kb_per_call": peak / 1024}
+
+
+def main():
+    stub = ChatStub(record=False)
+    settings.RUNPOD_BASE_URL = stub.url
+    settings.RUNPOD_API_KEY = "rp-test"
+
+    print(f"=== LLM 호출 경로 벤치마크 (RunPod 이미지 진단, {CALLS}회, 로컬 스텁) ===")
+    for name, provider in (("langchain", RunPodMedicalInterpreter()), ("direct", DirectRunPodMedicalInterpreter())):
+        for stage, result in (("call", measure(provider)), ("body", measure_body(provider))):
+            print(
+                f"{name:>9} {stage}: CPU {result['cpu_ms_per_call']:.3f}ms/call, "
+                f"peak alloc {result['peak_kb_per_call']:.0f}KB/call"
+            )
+    stub.shutdown()
+
+
+
+if __name__ == "__main__":
+    main()
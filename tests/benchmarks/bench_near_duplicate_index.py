@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+근접 중복 인덱스 벤치마크
+저장된 perceptual hash 100k개에서 조회 시간 비교
+(multi-index hashing vs NumPy 전수 비교)
+"""
+
+import sys
+import os
+import time
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+
+from app.services.near_duplicate_index import MultiIndexHammingIndex
+
+STORED = 100_000
+QUERIES = 2_000
+MAX_DISTANCE = 6
+
+
+def flip_bits(value: int, count: int, rng) -> int:
+    for position in rng.choice(64, size=count, replace=False):
+        value ^= 1 << int(position)
+    return value
+
+
+def main():
+    rng = np.random.default_rng(0)
+    stored = [int(v) for v in rng.integers(0, 2**63, size=STORED, dtype=np.int64)]
+    stored = [v | (int(rng.integers(0, 2)) << 63) for v in stored]
+
+    started = time.perf_counter()
+    index = MultiIndexHammingIndex(MAX_DISTANCE, max_entries=STORED)
+    for i, value in enumerate(stored):
+        index.add(value, f"key-{i}")
+    build_ms = (time.perf_counter() - started) * 1000
+
+    # 절반은 근접 중복(거리 0~MAX_DISTANCE), 절반은 무작위 미스
+    queries = []
+    for i in range(QUERIES):
+        if i % 2 == 0:
+            base = stored[int(rng.integers(0, STORED))]
+            queries.append(flip_bits(base, int(rng.integers(0, MAX_DISTANCE + 1)), rng))
+        else:
+            queries.append(int(rng.integers(0, 2**63)))
+
+    started = time.perf_counter()
+    index_results = [index.nearest(q) for q in queries]
+    index_us = (time.perf_counter() - started) / QUERIES * 1e6
+
+    stored_array = np.array(stored, dtype=np.uint64)
+    started = time.perf_counter()
+    brute_results = []
+    for q in queries:
+        distances = np.bitwise_count(stored_array ^ np.uint64(q))
+        best = int(distances.argmin())
+        brute_results.append(int(distances[best]) if distances[best] <= MAX_DISTANCE else None)
+    brute_us = (time.perf_counter() - started) / QUERIES * 1e6
+
+    agree = all(
+        (r is None and b is None) or (r is not None and r[1] == b)
+        for r, b in zip(index_results, brute_results)
+    )
+
+    print("=" * 70)
+    print(f"🧪 근접 중복 조회 (저장 {STORED:,}개, 최대 거리 {MAX_DISTANCE})")
+    print("=" * 70)
+    print(f"인덱스 구축: {build_ms:.0f} ms")
+    print(f"multi-index hashing: {index_us:.1f} µs/query")
+    print(f"NumPy 전수 비교:     {brute_us:.1f} µs/query")
+    print(f"결과 일치: {'✅' if agree else '❌'}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
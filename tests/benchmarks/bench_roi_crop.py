@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+병변 영역(ROI) 크롭 벤치마크
+이미지당 ROI 검출 CPU 시간과 전처리 전체(크롭 없음/있음) 대비 비용 비교
+(결정적인 회귀 검사는 test_roi_crop.py)
+"""
+
+import io
+import sys
+import os
+import time
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from app.core.image_profile import ImageProfile
+from app.core.image_utils import detect_lesion_roi, preprocess_image_bytes
+from bench_image_preprocess import make_sample_image
+from tests.sample_images import lesion_image
+
+REPEAT = 5
+# 요청 경로에서 허용하는 2048x1536 이미지당 ROI 검출 CPU 시간 (ms)
+DETECT_BUDGET_MS = 50
+
+
+def _jpeg(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def cpu_time_ms(func, *args) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.process_time()
+        func(*args)
+        best = min(best, time.process_time() - start)
+    return best * 1000
+
+
+def main():
+    print("=" * 70)
+    print("🧪 ROI 검출 CPU 시간 (이미지당, ms) / 전처리 전체 대비")
+    print("=" * 70)
+    profile = ImageProfile(max_edge=512)
+    for size in [(1152, 864), (2048, 1536), (4000, 3000)]:
+        lesion = lesion_image((300, 250), 90).resize(size)
+        data = _jpeg(lesion)
+        detect = cpu_time_ms(detect_lesion_roi, lesion)
+        plain = cpu_time_ms(preprocess_image_bytes, data, None, None, False, profile)
+        cropped = cpu_time_ms(preprocess_image_bytes, data, None, None, False, profile, True)
+        label = f"{size[0]}x{size[1]}"
+        print(f"{label:<12}detect={detect:>7.1f}  preprocess={plain:>7.1f}  +roi={cropped:>7.1f}")
+
+    sample = Image.open(io.BytesIO(make_sample_image((2048, 1536), "JPEG")))
+    sample.load()
+    detect = cpu_time_ms(detect_lesion_roi, sample)
+    verdict = "OK" if detect < DETECT_BUDGET_MS else "초과"
+    print(f"2048x1536 샘플 검출 {detect:.1f}ms (예산 {DETECT_BUDGET_MS}ms) {verdict}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
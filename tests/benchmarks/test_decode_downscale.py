@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+축소 디코딩 회귀 테스트
+JPEG draft() 디코딩 크기/모드, reduce() 적용, 출력 크기, 픽셀 상한 확인
+(시간 비교는 bench_decode_downscale.py)
+"""
+
+import io
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from PIL import Image
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.image_utils import MAX_IMAGE_SIZE, decode_downscaled
+from bench_image_preprocess import make_sample_image
+
+
+def full_decode(data: bytes) -> Image.Image:
+    """기준 경로: 전체 해상도 디코딩 후 LANCZOS 축소"""
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    image.thumbnail(MAX_IMAGE_SIZE, Image.Resampling.LANCZOS, reducing_gap=None)
+    return image
+
+
+def test_jpeg_draft_decodes_fewer_pixels():
+    source = Image.open(io.BytesIO(make_sample_image((4000, 3000), "JPEG")))
+    output = decode_downscaled(source)
+
+    # 1024x768 출력 이상을 유지하는 가장 작은 DCT 스케일(1/2)로 디코딩됨
+    assert source.mode == "RGB"
+    assert source.size == (2000, 1500)
+    assert source.size[0] * source.size[1] * 4 <= 4000 * 3000
+    assert output.size == (1024, 768)
+
+
+def test_non_jpeg_uses_integer_reduce(monkeypatch):
+    factors = []
+    reduce = Image.Image.reduce
+
+    def spy(self, factor, *args, **kwargs):
+        factors.append(factor)
+        return reduce(self, factor, *args, **kwargs)
+
+    monkeypatch.setattr(Image.Image, "reduce", spy)
+    output = decode_downscaled(Image.open(io.BytesIO(make_sample_image((2304, 1728), "PNG"))))
+    assert factors == [2] and output.size == (1024, 768)
+
+
+def test_output_matches_thumbnail_size():
+    for size, fmt in [((4000, 3000), "JPEG"), ((2304, 1728), "PNG"), ((800, 600), "WEBP")]:
+        data = make_sample_image(size, fmt)
+        assert decode_downscaled(Image.open(io.BytesIO(data))).size == full_decode(data).size
+
+
+def test_pixel_limit_rejects_before_decode(monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_MAX_PIXELS", 500 * 1000)
+    data = make_sample_image((1152, 864), "PNG")
+    with pytest.raises(HTTPException) as exc_info:
+        decode_downscaled(Image.open(io.BytesIO(data)))
+    assert exc_info.value.status_code == 400
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+LLM 호출 경로 회귀 테스트 (LangChain vs 직접 호출)
+로컬 OpenAI 호환 스텁 서버로 두 경로의 요청 본문 동등성, 백엔드 선택 확인 (외부 API 호출 없음)
+(CPU 시간/메모리 할당량 비교는 bench_llm_backend.py)
+"""
+
+import asyncio
+import base64
+import json
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+
+from app.core.config import settings
+from app.core.llm_clients import llm_client_registry
+from app.providers.direct_chat import (
+    DirectRunPodMedicalInterpreter,
+    DirectTextRefiner,
+    build_medical_provider,
+    build_refiner_provider,
+)
+from app.providers.openai_text import OpenAITextRefiner
+from app.providers.runpod_medical import RunPodMedicalInterpreter
+from tests.chat_stub import DEFAULT_CONTENT as REPLY
+IMAGE_BASE64 = base64.b64encode(b"\xff\xd8\xff" + b"\x00" * 24 * 1024).decode()
+
+
+@pytest.fixture
+def stub(chat_stub, monkeypatch):
+    monkeypatch.setattr(settings, "RUNPOD_BASE_URL", chat_stub.url)
+    monkeypatch.setattr(settings, "RUNPOD_API_KEY", "rp-test")
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    return chat_stub
+
+
+def _run(coro_factory):
+    async def scenario():
+        try:
+            return await coro_factory()
+        finally:
+            await llm_client_registry.aclose()
+
+    return asyncio.run(scenario())
+
+
+def _request_fields(body: dict) -> dict:
+    return {key: body.get(key) for key in ("model", "temperature", "max_tokens", "stop", "messages")}
+
+
+def test_direct_request_matches_langchain(stub):
+    langchain_provider = RunPodMedicalInterpreter()
+    direct_provider = DirectRunPodMedicalInterpreter()
+
+    async def calls():
+        results = []
+        for provider in (langchain_provider, direct_provider):
+            results.append(await provider.diagnose_image(IMAGE_BASE64, additional_info="왼쪽 뺨"))
+            results.append(await provider.diagnose_text("갈색 반점", additional_info="2주 전부터"))
+        return results
+
+    assert _run(calls) == [REPLY] * 4
+    langchain_image, langchain_text, direct_image, direct_text = stub.bodies
+    assert _request_fields(direct_image) == _request_fields(langchain_image)
+    assert _request_fields(direct_text) == _request_fields(langchain_text)
+    assert direct_image["temperature"] == 0.05 and direct_image["max_tokens"] == 400
+
+
+def test_direct_refiner_body_matches_langchain_prompt(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    roles = {"system": "system", "human": "user"}
+    expected = [
+        {"role": roles[message.type], "content": message.content}
+        for message in OpenAITextRefiner().prompt.format_messages(text="손등이 가렵고 빨개요", language="ko")
+    ]
+    refiner = DirectTextRefiner()
+    body = json.loads(refiner.llm.build_body(refiner._human_template.format(text="손등이 가렵고 빨개요", language="ko")))
+    assert body["messages"] == expected
+    assert body["temperature"] == 0.2
+
+
+def test_backend_selected_by_settings(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(settings, "LLM_BACKEND", "direct")
+    assert type(build_medical_provider("runpod")).__name__ == "DirectRunPodMedicalInterpreter"
+    assert type(build_medical_provider("openai")).__name__ == "DirectOpenAIMedicalInterpreter"
+    assert isinstance(build_refiner_provider(), DirectTextRefiner)
+
+    monkeypatch.setattr(settings, "LLM_BACKEND", "langchain")
+    assert type(build_medical_provider("runpod")) is RunPodMedicalInterpreter
+    assert isinstance(build_refiner_provider(), OpenAITextRefiner)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+병변 영역(ROI) 크롭 회귀 테스트
+합성 병변 위치 검출, 크롭 생략 조건, 원본 좌표 기준 ROI 보고 확인
+(CPU 시간 비교는 bench_roi_crop.py)
+"""
+
+import io
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+from PIL import Image
+
+from app.core.image_profile import ImageProfile
+from app.core.image_utils import detect_lesion_roi, preprocess_image_bytes
+from tests.sample_images import lesion_image
+
+
+def _jpeg(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def test_box_contains_lesion_with_margin():
+    # 병변: 중심 (300, 250), 가로 반경 90, 세로 반경 72 (1152x864 프레임)
+    box = detect_lesion_roi(lesion_image((300, 250), 90), margin=0.25)
+    assert box is not None
+    left, top, right, bottom = box
+    assert left <= 300 - 90 and right >= 300 + 90
+    assert top <= 250 - 72 and bottom >= 250 + 72
+    assert (right - left) * (bottom - top) < 0.25 * 1152 * 864
+
+
+def test_no_crop_without_distinct_lesion():
+    assert detect_lesion_roi(Image.new("RGB", (800, 600), (224, 172, 150))) is None
+    # 프레임 대부분이 병변이면 크롭 이득이 없음
+    assert detect_lesion_roi(lesion_image((576, 432), 700)) is None
+
+
+def test_preprocess_reports_roi_in_original_coordinates():
+    data = _jpeg(lesion_image((300, 250), 90))
+    profile = ImageProfile(max_edge=512)
+    result = preprocess_image_bytes(data, profile=profile, roi_crop=True)
+    roi = result["image_info"]["roi"]
+    left, top, right, bottom = roi["box"]
+    assert left <= 210 and right >= 390 and top <= 178 and bottom >= 322
+    assert 0 < roi["area_ratio"] < 0.25
+    # 크롭 영역이 512px보다 작으면 원본 해상도 그대로 인코딩 (업스케일 없음)
+    assert result["image_info"]["encoding"]["dimensions"] == (right - left, bottom - top)
+
+    plain = preprocess_image_bytes(data, profile=profile)
+    assert "roi" not in plain["image_info"]
+    assert plain["image_info"]["encoding"]["dimensions"] == (512, 384)
+
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
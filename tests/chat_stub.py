@@ -0,0 +1,102 @@
+"""
+테스트/벤치마크 공용 OpenAI 호환 chat/completions 스텁 서버 (로컬 스레드, 외부 호출 없음)
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+DEFAULT_CONTENT = '<root><label id_code="7" score="81.2">지루각화증</label><summary>스텁 응답</summary></root>'
+
+
+class ChatStub:
+    """POST chat/completions에 content를 돌려주는 스텁 (stream 요청이면 chunk_size 글자씩 SSE)
+
+    - bodies: 받은 요청 본문 (record=False면 기록하지 않음, 벤치마크용)
+    - paths: GET 요청 경로 (워밍업 확인용, 항상 get_status로 응답)
+    - content/finish_reason/completion_tokens는 서버 실행 중에도 바꿀 수 있음
+    """
+
+    def __init__(
+        self,
+        content: str = DEFAULT_CONTENT,
+        finish_reason: Optional[str] = "stop",
+        completion_tokens: int = 42,
+        chunk_size: int = 8,
+        get_status: int = 401,
+        record: bool = True,
+    ):
+        self.content = content
+        self.finish_reason = finish_reason
+        self.completion_tokens = completion_tokens
+        self.chunk_size = chunk_size
+        self.get_status = get_status
+        self.record = record
+        self.bodies: List[Dict[str, Any]] = []
+        self.paths: List[str] = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def shutdown(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _completion(self) -> bytes:
+        return json.dumps({
+            "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": "stub",
+            "choices": [{"index": 0, "finish_reason": self.finish_reason,
+                         "message": {"role": "assistant", "content": self.content}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": self.completion_tokens,
+                      "total_tokens": 10 + self.completion_tokens},
+        }).encode()
+
+    def _events(self) -> List[bytes]:
+        content, size = self.content, self.chunk_size
+        events = [{"choices": [{"index": 0, "delta": {"role": "assistant"}, "finish_reason": None}]}]
+        events += [{"choices": [{"index": 0, "delta": {"content": content[i:i + size]}, "finish_reason": None}]}
+                   for i in range(0, len(content), size)]
+        events.append({"choices": [{"index": 0, "delta": {}, "finish_reason": self.finish_reason}]})
+        payloads = [json.dumps(event, ensure_ascii=False) for event in events] + ["[DONE]"]
+        return [f"data: {payload}\n\n".encode() for payload in payloads]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if stub.record:
+                    stub.bodies.append(body)
+                self.send_response(200)
+                if body.get("stream"):
+                    # 조각마다 chunked로 바로 전송 (점진 수신 확인)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for data in stub._events():
+                        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.write(b"0\r\n\r\n")
+                    return
+                reply = stub._completion()
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(reply)))
+                self.end_headers()
+                self.wfile.write(reply)
+
+            def do_GET(self):
+                stub.paths.append(self.path)
+                self.send_response(stub.get_status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,21 @@
+"""
+테스트 공용 픽스처
+"""
+
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tests.chat_stub import ChatStub
+
+
+@pytest.fixture
+def chat_stub(request):
+    """로컬 chat/completions 스텁 서버 (응답은 indirect 파라미터 dict로 지정, 기본은 ChatStub 기본값)"""
+    stub = ChatStub(**getattr(request, "param", {}))
+    yield stub
+    stub.shutdown()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+이미지 진단 결과 캐시 테스트
+LRU 축출, TTL 만료, 동시 요청 중복 제거, 실패 결과 미저장,
+해석 서비스와 진단 서비스의 캐시 식별자(프로바이더/모델) 일치 확인
+"""
+
+import asyncio
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+
+from app.core.config import settings
+from app.services.diagnosis_cache import DiagnosisResultCache, make_cache_key
+from app.services.interpretation_service import interpretation_service
+from app.services.langchain_service import langchain_service
+
+
+def test_cache_key_depends_on_all_inputs():
+    base = make_cache_key("abc", "openai", "gpt-4o-mini", "v1")
+    assert base == make_cache_key("abc", "openai", "gpt-4o-mini", "v1")
+    assert base != make_cache_key("abc", "runpod", "gpt-4o-mini", "v1")
+    assert base != make_cache_key("abc", "openai", "gpt-4o-mini", "v2")
+    assert base != make_cache_key("abc", "openai", "gpt-4o-mini", "v1", additional_info="50세")
+
+
+def test_lru_eviction_and_ttl():
+    cache = DiagnosisResultCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+    expired = DiagnosisResultCache(max_entries=2, ttl_seconds=-1)
+    expired.set("a", 1)
+    assert expired.get("a") is None
+
+
+def test_concurrent_requests_share_one_call():
+    cache = DiagnosisResultCache(max_entries=8, ttl_seconds=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "<root></root>"
+
+    async def scenario():
+        results = await asyncio.gather(*[cache.get_or_compute("k", compute) for _ in range(5)])
+        hit = await cache.get_or_compute("k", compute)
+        return results, hit
+
+    results, hit = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(value == "<root></root>" and not cache_hit for value, cache_hit in results)
+    assert hit == ("<root></root>", True)
+    assert cache.stats()["coalesced"] == 4
+    assert cache.stats()["hits"] == 1
+
+
+def test_failures_and_uncacheable_results_are_not_stored():
+    cache = DiagnosisResultCache(max_entries=8, ttl_seconds=60)
+
+    async def fail():
+        raise RuntimeError("provider down")
+
+    async def not_xml():
+        return "plain text"
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("k", fail)
+        await cache.get_or_compute("k", not_xml, cacheable=lambda value: value.startswith("<root>"))
+
+    asyncio.run(scenario())
+    assert cache.get("k") is None
+    assert cache.stats()["in_flight"] == 0
+
+
+@pytest.mark.parametrize("provider", ["runpod", "openai"])
+def test_interpretation_identity_matches_diagnosis_service(provider, monkeypatch):
+    monkeypatch.setattr(settings, "INTERPRETATION_PROVIDER", provider)
+    monkeypatch.setattr(settings, "RUNPOD_MODEL_NAME", "derm-ft-v3")
+    # runpod 해석은 INTERPRETATION_MODEL이 아닌 실제 서빙 모델 기준
+    assert interpretation_service.provider_identity() == langchain_service.image_provider_identity(provider)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
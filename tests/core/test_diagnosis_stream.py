@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+스트리밍 진단(SSE) 테스트
+점진 XML 파싱, 이벤트 순서/최종 결과, 스트림 시작 전/후 오류 전달(HTTP 오류/SSE error 이벤트),
+이미지 스트림 캐시, 직접 호출 경로의 SSE 델타 파싱 확인
+"""
+
+import asyncio
+import json
+import sys
+import os
+import time
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.diagnosis_parser import IncrementalDiagnosisParser, parse_diagnosis_xml
+from app.core.llm_clients import llm_client_registry
+from app.providers.direct_chat import DirectChatCompletions
+from app.services.diagnosis_cache import diagnosis_cache
+from app.services.langchain_service import langchain_service
+from tests.fake_providers import FakeProvider, install_provider, silence_followups, tokens
+
+XML = (
+    '<root><label id_code="0" score="67.6">광선각화증</label>'
+    "<summary>얼굴에 붉은색의 각질성 반점이 관찰됩니다. 자외선 노출 &amp; 연령과 관련됩니다.</summary>"
+    '<similar_labels><similar_label id_code="3" score="16.6">보웬병</similar_label>'
+    '<similar_label id_code="1" score="5.7">기저세포암</similar_label></similar_labels></root>'
+)
+TOKEN_DELAY = 0.01
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, len(XML)])
+def test_incremental_parser_matches_full_parse(size):
+    parser = IncrementalDiagnosisParser()
+    events = [event for token in tokens("```xml\n" + XML, size) for event in parser.feed(token)]
+    expected = parse_diagnosis_xml(XML)
+
+    assert events[0] == ("label", {"diagnosis": "광선각화증", "id_code": "0", "score": 67.6, "confidence_score": pytest.approx(0.676)})
+    assert "".join(data["text"] for name, data in events if name == "summary") == expected["recommendations"]
+    similar = [data["name"] for name, data in events if name == "similar_label"]
+    assert ", ".join(similar) == expected["similar_conditions"]
+
+
+@pytest.fixture
+def streaming_provider(monkeypatch):
+    silence_followups(monkeypatch)
+    return install_provider(monkeypatch, FakeProvider(XML, token_delay=TOKEN_DELAY))
+
+
+def _parse_sse(payload: str):
+    events = []
+    for block in payload.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_first_event_precedes_generation_end(streaming_provider):
+    from app.api.skin_diagnosis import _diagnosis_events
+
+    async def timed_events():
+        started = time.perf_counter()
+        stream = await langchain_service.stream_skin_lesion_diagnosis("갈색 반점")
+        return [(chunk, time.perf_counter() - started) async for chunk in _diagnosis_events(stream)]
+
+    events = asyncio.run(timed_events())
+    first_event, first_at = events[0]
+    assert first_event.startswith(b"event: label")
+    # 라벨 요소는 전체 생성 시간의 앞부분에서 전송됨
+    generation_time = events[-1][1]
+    assert first_at < generation_time / 2
+
+
+def test_text_stream_endpoint(streaming_provider):
+    from app.main import app
+
+    client = TestClient(app)
+    response = client.post("/api/v1/diagnose/skin-lesion/stream", json={"lesion_description": "갈색 반점"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(response.text)
+
+    names = [name for name, _ in events]
+    assert names[0] == "label" and names[-1] == "result"
+    assert names.count("similar_label") == 2 and "summary" in names
+
+    result = events[-1][1]
+    assert result["diagnosis"] == "광선각화증"
+    assert result["confidence_score"] == pytest.approx(0.676)
+    assert result["metadata"]["streamed"] is True
+    assert [item["name"] for item in result["similar_diseases"]] == ["보웬병", "기저세포암"]
+
+
+def test_error_before_stream_is_http_error(streaming_provider, monkeypatch):
+    from app.main import app
+
+    def unavailable(*args, **kwargs):
+        raise RuntimeError("라우팅 실패")
+
+    monkeypatch.setattr(langchain_service, "route", unavailable)
+    client = TestClient(app)
+    text = client.post("/api/v1/diagnose/skin-lesion/stream", json={"lesion_description": "갈색 반점"})
+    image = client.post(
+        "/api/v1/diagnose/skin-lesion-image/stream", files={"image": ("a.jpg", b"\xff\xd8\xff", "image/jpeg")}
+    )
+    # 응답 시작 전 오류는 일반 엔드포인트와 같은 HTTPException 형식
+    for response in (text, image):
+        assert response.status_code == 500 and response.json() == {"detail": "라우팅 실패"}
+    assert streaming_provider.calls == 0
+
+
+def test_error_after_stream_start_is_sse_event(monkeypatch):
+    from app.main import app
+
+    silence_followups(monkeypatch)
+    install_provider(monkeypatch, FakeProvider(ConnectionError("프로바이더 연결 끊김")))
+    response = TestClient(app).post("/api/v1/diagnose/skin-lesion/stream", json={"lesion_description": "갈색 반점"})
+    assert response.status_code == 200
+    assert _parse_sse(response.text) == [("error", {"detail": "프로바이더 연결 끊김"})]
+
+
+def test_image_stream_reuses_cache(streaming_provider, monkeypatch):
+    monkeypatch.setattr(diagnosis_cache, "enabled", True)
+
+    async def consume():
+        stream = await langchain_service.stream_skin_lesion_diagnosis_with_image(
+            "data:image/jpeg;base64,AAAA", image_hash="stream-test-hash"
+        )
+        chunks = [chunk async for chunk in stream]
+        return chunks, stream.result
+
+    first_chunks, first = asyncio.run(consume())
+    second_chunks, second = asyncio.run(consume())
+    assert len(first_chunks) > 1 and first["metadata"]["cache_hit"] is False
+    assert second_chunks == [XML] and second["metadata"]["cache_hit"] is True
+    assert streaming_provider.calls == 1
+
+
+@pytest.mark.parametrize("chat_stub", [{"content": XML, "chunk_size": 16}], indirect=True)
+def test_direct_client_streams_deltas(chat_stub):
+    client = DirectChatCompletions(
+        api_key="sk-test", model="stub", temperature=0.1, max_tokens=50, timeout=5,
+        system_prompt="sys", base_url=chat_stub.url,
+    )
+
+    async def consume():
+        try:
+            return [delta async for delta in client.stream("안녕")]
+        finally:
+            await llm_client_registry.aclose()
+
+    deltas = asyncio.run(consume())
+    assert "".join(deltas) == XML and len(deltas) > 1
+    assert chat_stub.bodies[0]["stream"] is True
+    assert chat_stub.bodies[0]["messages"][-1] == {"role": "user", "content": "안녕"}
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
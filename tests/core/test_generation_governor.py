@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+진단 생성 출력 관리 테스트
+</root> 중단 시퀀스/닫는 태그 복원, 관측 p99 기반 max_tokens 예산, 잘림 메타데이터 확인
+(LangChain/직접 호출 경로 모두 로컬 스텁 서버 사용)
+"""
+
+import asyncio
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+
+from app.core.config import settings
+from app.core.generation_governor import GenerationGovernor, generation_governor
+from app.core.llm_clients import llm_client_registry
+from app.providers.direct_chat import DirectRunPodMedicalInterpreter
+from app.providers.runpod_medical import RunPodMedicalInterpreter
+from app.services.langchain_service import langchain_service
+
+# </root> 중단 시퀀스에서 멈춘 응답 (API는 중단 시퀀스를 응답에 포함하지 않음)
+STOPPED = '<root><label id_code="7" score="81.2">지루각화증</label><summary>갈색 구진</summary>'
+TRUNCATED = '<root><label id_code="7" score="81.2">지루각화증</label><summary>갈색 구'
+
+
+@pytest.fixture
+def stub(chat_stub, monkeypatch):
+    chat_stub.content = STOPPED
+    monkeypatch.setattr(settings, "RUNPOD_BASE_URL", chat_stub.url)
+    monkeypatch.setattr(settings, "RUNPOD_API_KEY", "rp-test")
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 0)
+    monkeypatch.setattr(generation_governor, "_samples", {})
+    monkeypatch.setattr(generation_governor, "_budgets", {})
+    monkeypatch.setattr(generation_governor, "_truncated", {})
+    return chat_stub
+
+
+def _run(coro):
+    async def scenario():
+        try:
+            return await coro
+        finally:
+            await llm_client_registry.aclose()
+
+    return asyncio.run(scenario())
+
+
+def test_budget_follows_observed_p99():
+    governor = GenerationGovernor(stop_at_root=True, adaptive=True, headroom=1.25, min_samples=50, window=1000, floor=64)
+    for tokens in range(100, 149):
+        governor.record("image", tokens, "stop")
+    assert governor.budget("image", 400) == 400  # 표본 부족 → 프로바이더 기본값
+
+    governor.record("image", 149, "stop")
+    assert governor.budget("image", 400) == int(149 * 1.25) + 1
+    assert governor.budget("image", 150) == 150  # 기본값을 넘지 않음
+    assert governor.budget("text", 1000) == 1000
+
+
+@pytest.mark.parametrize("provider_class", [RunPodMedicalInterpreter, DirectRunPodMedicalInterpreter])
+def test_stop_sequence_and_closing_tag(stub, monkeypatch, provider_class):
+    monkeypatch.setattr(langchain_service, "_skin_diagnosis_provider", provider_class())
+    result = _run(langchain_service.diagnose_skin_lesion("갈색 반점"))
+
+    assert result["result"] == STOPPED + "</root>"
+    assert stub.bodies[0]["stop"] == ["</root>"]
+    generation = result["metadata"]["generation"]
+    assert generation == {
+        "endpoint": "skin_lesion_text", "max_tokens": settings.MAX_TOKENS,
+        "output_tokens": 42, "finish_reason": "stop", "truncated": False,
+    }
+
+
+@pytest.mark.parametrize("provider_class", [RunPodMedicalInterpreter, DirectRunPodMedicalInterpreter])
+def test_truncation_is_flagged_and_budget_applied(stub, monkeypatch, provider_class):
+    monkeypatch.setattr(langchain_service, "_skin_diagnosis_image_provider", provider_class())
+    monkeypatch.setattr(generation_governor, "min_samples", 3)
+    for tokens in (100, 120, 140):
+        generation_governor.record("skin_lesion_image", tokens, "stop")
+    stub.content, stub.finish_reason = TRUNCATED, "length"
+
+    result = _run(langchain_service.diagnose_skin_lesion_with_image("data:image/jpeg;base64,AAAA"))
+    budget = int(140 * generation_governor.headroom) + 1
+    assert stub.bodies[0]["max_tokens"] == budget
+    assert result["result"] == TRUNCATED
+    assert result["metadata"]["generation"]["truncated"] is True
+    assert generation_governor.stats()["endpoints"]["skin_lesion_image"]["truncated"] == 1
+
+
+@pytest.mark.parametrize("provider_class", [RunPodMedicalInterpreter, DirectRunPodMedicalInterpreter])
+def test_stream_restores_closing_tag(stub, monkeypatch, provider_class):
+    monkeypatch.setattr(langchain_service, "_skin_diagnosis_provider", provider_class())
+
+    async def consume():
+        stream = await langchain_service.stream_skin_lesion_diagnosis("갈색 반점")
+        chunks = [chunk async for chunk in stream]
+        return chunks, stream.result
+
+    chunks, result = _run(consume())
+    assert chunks[-1] == "</root>" and result["result"] == STOPPED + "</root>"
+    assert stub.bodies[0]["stream"] is True and stub.bodies[0]["stop"] == ["</root>"]
+    assert result["metadata"]["generation"]["finish_reason"] == "stop"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+헤지 요청 테스트
+주 프로바이더 지연 시 보조 프로바이더 채택/패배 요청 취소, 무효 응답 시 즉시 헤지,
+관측 응답 시간 p9x 기반 지연, 헤지 비율/채택 횟수 통계 확인 (로컬 가짜 프로바이더, 외부 호출 없음)
+"""
+
+import asyncio
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+
+from app.core.config import settings
+from app.core.generation_governor import generation_governor
+from app.core.hedging import RequestHedger, request_hedger
+from app.core.image_profile import ImageProfile
+from app.core.prompt_registry import PROMPT_VERSION
+from app.core.provider_router import ProviderRouter
+from app.services import langchain_service as langchain_module
+from app.services.diagnosis_cache import lookup_image_diagnosis
+from app.services.langchain_service import langchain_service
+from tests.fake_providers import XML, FakeProvider
+
+
+def _hedger(**overrides) -> RequestHedger:
+    options = dict(enabled=True, delay=0.05, percentile=0.95, min_samples=20, window=100, initial_delay=10, min_delay=0.01)
+    options.update(overrides)
+    return RequestHedger(**options)
+
+
+def _pair(primary=None, secondary=None):
+    """이름이 primary/secondary이고 호출 순서를 한 목록(log)에 기록하는 가짜 프로바이더 쌍"""
+    log = []
+    return (
+        FakeProvider(name="primary", log=log, **(primary or {})),
+        FakeProvider(name="secondary", log=log, **(secondary or {})),
+        log,
+    )
+
+
+def _hedged_run(hedger, primary, secondary, on_lost=None):
+    providers = {"primary": primary, "secondary": secondary}
+
+    async def scenario():
+        with generation_governor.track("skin_lesion_text") as record:
+            winner, result = await hedger.run(
+                "skin_lesion_text", "primary", "secondary", lambda name: providers[name].diagnose_text("갈색 반점"),
+                on_lost=on_lost,
+            )
+            assert winner == record.hedge["winner"] == record.hedge["provider"]
+            return result, record.hedge
+
+    return asyncio.run(scenario())
+
+
+def test_fast_primary_is_not_hedged():
+    hedger = _hedger()
+    primary, secondary, log = _pair()
+    result, hedge = _hedged_run(hedger, primary, secondary)
+    assert result == XML and log == ["primary:start", "primary:done"]
+    assert hedge == {"hedged": False, "winner": "primary", "provider": "primary"}
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    hedger = _hedger()
+    lost = []
+    # 주 요청은 헤지가 없으면 테스트가 끝나지 않을 만큼 느림
+    primary, secondary, log = _pair({"delay": 60.0})
+    result, hedge = _hedged_run(hedger, primary, secondary, on_lost=lambda *args: lost.append(args))
+
+    assert result == XML
+    assert hedge["hedged"] is True and hedge["winner"] == "secondary"
+    assert log == ["primary:start", "secondary:start", "secondary:done", "primary:cancelled"]
+    stats = hedger.stats()["endpoints"]["skin_lesion_text"]
+    assert stats["hedged"] == 1 and stats["secondary_wins"] == 1 and stats["hedge_rate"] == 1.0
+    # 취소된 주 요청의 경과 시간을 응답 시간 하한으로 전달
+    assert [name for name, _ in lost] == ["primary"] and lost[0][1] > 0
+
+
+def test_invalid_primary_response_hedges_immediately():
+    hedger = _hedger(delay=60.0)
+    primary, secondary, log = _pair({"reply": "죄송합니다. 진단할 수 없습니다."})
+    result, hedge = _hedged_run(hedger, primary, secondary)
+    # 헤지 지연(60s)을 기다리지 않고 무효 응답 직후 보조 요청
+    assert result == XML and hedge["winner"] == "secondary"
+    assert log == ["primary:start", "primary:done", "secondary:start", "secondary:done"]
+
+
+def test_falls_back_when_neither_is_valid():
+    primary, secondary = FakeProvider(delay=0.0, reply="형식 없는 응답"), FakeProvider(delay=0.0, reply=TimeoutError("timeout"))
+    assert _hedged_run(_hedger(), primary, secondary)[0] == "형식 없는 응답"
+
+    primary, secondary = FakeProvider(delay=0.0, reply=ValueError("primary")), FakeProvider(delay=0.0, reply=TimeoutError("secondary"))
+    with pytest.raises(ValueError, match="primary"):
+        _hedged_run(_hedger(), primary, secondary)
+
+
+def test_learned_delay_follows_primary_percentile():
+    hedger = _hedger(delay=0, min_samples=20, initial_delay=7.0, min_delay=0.5)
+    assert hedger.delay("skin_lesion_image", "runpod") == 7.0  # 표본 부족 → 초기 지연
+    for latency in range(1, 21):
+        hedger._observe("skin_lesion_image", "runpod", float(latency))
+    assert hedger.delay("skin_lesion_image", "runpod") == 20.0
+    for _ in range(80):
+        hedger._observe("skin_lesion_image", "runpod", 0.1)
+    assert hedger.delay("skin_lesion_image", "runpod") == 16.0  # p95 (100개 중 95번째)
+    # 주 프로바이더별로 따로 학습 (openai가 주일 때는 runpod 분포를 쓰지 않음)
+    assert hedger.delay("skin_lesion_image", "openai") == 7.0
+
+
+def test_service_hedges_to_other_provider(monkeypatch):
+    primary, secondary = FakeProvider(delay=60.0), FakeProvider()
+    router = ProviderRouter(
+        enabled=True, alpha=0.5, failure_threshold=3, error_rate_threshold=0.5, min_samples=4,
+        open_seconds=30, latency_ratio=0, probe_ratio=0.0, probe_timeout=60,
+    )
+    monkeypatch.setattr(langchain_module, "provider_router", router)
+    monkeypatch.setattr(request_hedger, "enabled", True)
+    monkeypatch.setattr(request_hedger, "fixed_delay", 0.05)
+    monkeypatch.setattr(settings, "SKIN_DIAGNOSIS_PROVIDER", "runpod")
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(langchain_service, "_skin_diagnosis_provider", primary)
+    monkeypatch.setattr(langchain_service, "_alternate_providers", {"openai": secondary})
+
+    result = asyncio.run(langchain_service.diagnose_skin_lesion("갈색 반점"))
+    assert result["result"] == XML
+    assert result["metadata"]["hedge"]["winner"] == "secondary"
+    # 메타데이터는 설정된 runpod가 아니라 실제로 응답한 openai 기준
+    assert result["metadata"]["provider"] == "openai" and result["metadata"]["model"] == "gpt-4o-mini"
+    assert primary.cancelled == 1
+    # 취소된 runpod 요청의 경과 시간이 라우터 응답 시간에 하한값으로 반영
+    assert router.stats()["routes"]["text"]["runpod"]["latency_ewma"] > 0
+
+
+def test_image_hedge_winner_owns_cache_key(monkeypatch):
+    primary, secondary = FakeProvider(delay=60.0), FakeProvider()
+    monkeypatch.setattr(request_hedger, "enabled", True)
+    monkeypatch.setattr(request_hedger, "fixed_delay", 0.05)
+    monkeypatch.setattr(settings, "SKIN_DIAGNOSIS_IMAGE_PROVIDER", "runpod")
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(langchain_service, "_skin_diagnosis_image_provider", primary)
+    monkeypatch.setattr(langchain_service, "_alternate_providers", {"openai": secondary})
+    image_hash = "e" * 64
+
+    result = asyncio.run(langchain_service.diagnose_skin_lesion_with_image(
+        "data:image/jpeg;base64,AAAA", image_hash=image_hash, provider_name="runpod",
+    ))
+    assert result["metadata"]["provider"] == "openai" and result["metadata"]["hedge"]["winner"] == "secondary"
+
+    def cached(name):
+        return lookup_image_diagnosis(
+            image_hash, *langchain_service.image_provider_identity(name), PROMPT_VERSION,
+            additional_info=None, questionnaire=None,
+        )[0]
+
+    assert cached("openai") == XML and cached("runpod") is None
+
+
+def test_hedge_provider_gets_image_in_its_own_profile(monkeypatch):
+    primary, secondary = FakeProvider(delay=60.0), FakeProvider()
+    primary.image_profile, secondary.image_profile = ImageProfile(max_edge=512), ImageProfile(max_edge=1024)
+    monkeypatch.setattr(request_hedger, "enabled", True)
+    monkeypatch.setattr(request_hedger, "fixed_delay", 0.05)
+    monkeypatch.setattr(settings, "SKIN_DIAGNOSIS_IMAGE_PROVIDER", "openai")
+    monkeypatch.setattr(settings, "RUNPOD_API_KEY", "rp-test")
+    monkeypatch.setattr(settings, "RUNPOD_BASE_URL", "http://runpod.invalid/v1")
+    monkeypatch.setattr(langchain_service, "_skin_diagnosis_image_provider", primary)
+    monkeypatch.setattr(langchain_service, "_alternate_providers", {"runpod": secondary})
+    profiles = []
+
+    async def image_for_profile(profile):
+        profiles.append(profile.max_edge)
+        return {"image_data_url": f"data:image/jpeg;base64,{profile.max_edge}", "image_hash": f"{profile.max_edge}" * 16}
+
+    result = asyncio.run(langchain_service.diagnose_skin_lesion_with_image(
+        "data:image/jpeg;base64,512", image_hash="512" * 16, provider_name="openai",
+        image_for_profile=image_for_profile,
+    ))
+    # openai(512px) 입력을 그대로 쓰지 않고 runpod 프로파일(1024px)로 다시 전처리한 이미지로 헤지
+    assert profiles == [1024]
+    assert primary.inputs[0][0].endswith(",512") and secondary.inputs[0][0].endswith(",1024")
+    assert result["metadata"]["provider"] == "runpod"
+
+    cached = lookup_image_diagnosis(
+        "1024" * 16, *langchain_service.image_provider_identity("runpod"), PROMPT_VERSION,
+        additional_info=None, questionnaire=None,
+    )[0]
+    assert cached == XML
+
+
+def test_disabled_hedging_uses_primary_only(monkeypatch):
+    monkeypatch.setattr(request_hedger, "enabled", False)
+    assert langchain_service.hedge_provider("text", "runpod") == (None, None)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+바이트 예산 인코더 테스트
+예산 준수, 탐색 횟수 상한, WebP 선택, 고정 품질 모드 유지 확인
+"""
+
+import base64
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+
+from app.core.image_profile import ImageProfile, mime_type_for_base64
+from app.core.image_utils import decode_downscaled, encode_to_budget
+from tests.sample_images import lesion_image
+
+
+@pytest.fixture(scope="module")
+def image():
+    return decode_downscaled(lesion_image((500, 400), 180), (512, 512))
+
+
+@pytest.mark.parametrize("budget", [3000, 5000, 8000])
+def test_budget_is_respected_within_bounded_steps(image, budget):
+    profile = ImageProfile(max_edge=512, byte_budget=budget, max_search_steps=5)
+    encoded, info = encode_to_budget(image, profile)
+    assert len(encoded) <= budget
+    assert info["bytes"] == len(encoded)
+    assert profile.min_quality <= info["quality"] <= profile.quality
+    assert info["encode_steps"] <= profile.max_search_steps + 1
+
+
+def test_generous_budget_keeps_profile_quality(image):
+    encoded, info = encode_to_budget(image, ImageProfile(max_edge=512, byte_budget=10**6))
+    assert info["quality"] == 85
+    assert info["encode_steps"] == 1
+
+
+def test_unreachable_budget_falls_back_to_min_quality(image):
+    _, info = encode_to_budget(image, ImageProfile(max_edge=512, byte_budget=100, min_quality=40))
+    assert info["quality"] == 40
+
+
+def test_webp_is_used_when_smaller(image):
+    encoded, info = encode_to_budget(image, ImageProfile(max_edge=512, byte_budget=10**6, try_webp=True))
+    assert info["format"] == "WEBP"
+    assert mime_type_for_base64(base64.b64encode(encoded).decode()) == "image/webp"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
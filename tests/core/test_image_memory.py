@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+이미지 페이로드 경로 메모리 테스트
+12MP 입력에서 업로드 버퍼를 다시 복사하지 않는지 tracemalloc 최대치로 확인
+(PIL 픽셀 버퍼는 C 할당이라 tracemalloc 집계 대상이 아님)
+"""
+
+import base64
+import sys
+import os
+import tracemalloc
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import pytest
+from PIL import Image
+
+from app.core.image_profile import ImageProfile, image_data_url
+from app.core.image_utils import _BufferReader, build_data_url, preprocess_image_bytes
+from bench_image_preprocess import make_sample_image
+
+
+@pytest.fixture(scope="module")
+def upload_12mp():
+    # 스트리밍 업로드(read_image_upload)와 동일하게 bytearray로 전달
+    return bytearray(make_sample_image((4000, 3000), "JPEG"))
+
+
+def test_12mp_peak_memory_excludes_upload_copy(upload_12mp):
+    profile = ImageProfile(max_edge=512)
+    preprocess_image_bytes(upload_12mp, profile=profile)  # 모듈/코덱 초기화 비용 제외
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = preprocess_image_bytes(upload_12mp, profile=profile)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+    payload = len(result["image_data_url"])
+    # 업로드 버퍼 복사본(입력 크기만큼)이 생기면 이 한도를 넘음
+    assert peak < len(upload_12mp) // 4 + 4 * payload, (peak, len(upload_12mp), payload)
+
+
+def test_data_url_matches_base64_payload(upload_12mp):
+    result = preprocess_image_bytes(upload_12mp, profile=ImageProfile(max_edge=256))
+    prefix, encoded = result["image_data_url"].split(",", 1)
+    assert prefix == "data:image/jpeg;base64"
+    assert base64.b64decode(encoded)[:2] == b"\xff\xd8"
+    assert result["image_info"]["encoding"]["bytes"] == len(base64.b64decode(encoded))
+
+
+def test_provider_data_url_passthrough():
+    url = build_data_url(b"\x89PNG\r\n", "image/png")
+    assert image_data_url(url) is url
+    raw = base64.b64encode(b"\x89PNG\r\n").decode()
+    assert image_data_url(raw) == url
+
+
+def test_buffer_reader_supports_pil_seek_and_read(upload_12mp):
+    reader = _BufferReader(upload_12mp)
+    with Image.open(reader) as image:
+        assert image.size == (4000, 3000)
+    assert reader.seek(-2, os.SEEK_END) == len(upload_12mp) - 2
+    assert reader.read() == bytes(upload_12mp[-2:])
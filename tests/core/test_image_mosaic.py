@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+다중 이미지 모자이크 테스트
+배치/해상도 예산, 사진별 메타데이터, 품질 게이트, 업로드 장수 검증,
+다중 이미지 엔드포인트의 본문 크기 상한(장당 상한 × 최대 장수) 확인
+"""
+
+import asyncio
+import base64
+import io
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from fastapi.testclient import TestClient
+from PIL import Image, ImageFilter
+from starlette.datastructures import Headers
+
+from app.core.image_profile import ImageProfile
+from app.core.image_utils import image_worker_pool, preprocess_mosaic_bytes, preprocess_mosaic_upload
+from tests.fake_providers import FakeProvider, install_provider, silence_followups
+from tests.sample_images import lesion_image
+
+PROFILE = ImageProfile(max_edge=512)
+
+
+def _jpeg(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def photos():
+    close_up = lesion_image((576, 432), 350)
+    context = lesion_image((300, 250), 90, seed=1)
+    return [_jpeg(close_up), _jpeg(context), _jpeg(close_up.rotate(90, expand=True)), _jpeg(context)]
+
+
+@pytest.mark.parametrize("count,layout,size", [(2, "2x1", (512, 256)), (3, "2x2", (512, 512)), (4, "2x2", (512, 512))])
+def test_mosaic_layout_fits_profile(photos, count, layout, size):
+    uploads = [(data, f"{i}.jpg", "image/jpeg") for i, data in enumerate(photos[:count])]
+    result = preprocess_mosaic_bytes(uploads, profile=PROFILE)
+    info = result["image_info"]
+    assert info["layout"] == layout
+    assert info["encoding"]["dimensions"] == size
+    assert [tile["label"] for tile in info["tiles"]] == [str(i + 1) for i in range(count)]
+    assert info["tiles"][0]["dimensions"] == (1152, 864)
+
+    prefix, encoded = result["image_data_url"].split(",", 1)
+    assert prefix == "data:image/jpeg;base64"
+    assert Image.open(io.BytesIO(base64.b64decode(encoded))).size == size
+
+
+def test_mosaic_quality_gate_names_failing_photo(photos):
+    blurred = _jpeg(lesion_image((576, 432), 350).filter(ImageFilter.GaussianBlur(12)))
+    uploads = [(photos[0], "a.jpg", "image/jpeg"), (blurred, "b.jpg", "image/jpeg")]
+    with pytest.raises(HTTPException) as exc_info:
+        preprocess_mosaic_bytes(uploads, profile=PROFILE, quality_gate="reject")
+    assert exc_info.value.status_code == 422
+    assert exc_info.value.detail["issues"] == ["2:blurry"]
+
+
+def _thread_mode(monkeypatch):
+    monkeypatch.setattr(image_worker_pool, "processes", 0)
+    monkeypatch.setattr(image_worker_pool, "_executor", None)
+
+
+def test_upload_count_is_validated(photos, monkeypatch):
+    _thread_mode(monkeypatch)
+
+    def uploads(count):
+        return [
+            UploadFile(file=io.BytesIO(photos[i % 4]), filename=f"{i}.jpg", headers=Headers({"content-type": "image/jpeg"}))
+            for i in range(count)
+        ]
+
+    for count in (1, 5):
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(preprocess_mosaic_upload(uploads(count), PROFILE))
+        assert exc_info.value.status_code == 400
+
+    result = asyncio.run(preprocess_mosaic_upload(uploads(2), PROFILE))
+    assert all(len(tile["upload_sha256"]) == 64 for tile in result["image_info"]["tiles"])
+
+
+def test_endpoint_accepts_several_large_photos(photos, monkeypatch):
+    from app.core.config import settings
+    from app.main import app
+
+    _thread_mode(monkeypatch)
+    install_provider(monkeypatch, FakeProvider(), text=False)
+    silence_followups(monkeypatch)
+
+    # 장당 약 5MB (JPEG 뒤 패딩은 디코더가 무시), 합계는 단일 이미지 상한(10MB)보다 큼
+    padding = b"\0" * (5 * 1024 * 1024)
+    files = [("images", (f"{i}.jpg", photos[i] + padding, "image/jpeg")) for i in range(3)]
+    assert sum(len(data) for _, (_, data, _) in files) > settings.IMAGE_MAX_UPLOAD_BYTES
+
+    client = TestClient(app)
+    response = client.post("/api/v1/diagnose/skin-lesion-images", files=files)
+    assert response.status_code == 200, response.text
+    assert response.json()["metadata"]["image_count"] == 3
+
+    # 다른 업로드 엔드포인트는 단일 이미지 상한 유지
+    single = client.post("/api/v1/diagnose/skin-lesion-image", files=[files[0], ("extra", ("x.bin", padding, "image/jpeg"))])
+    assert single.status_code == 413
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
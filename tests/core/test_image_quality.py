@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+이미지 품질 게이트 테스트
+흐림/노출/병변 크기 판정, annotate/reject 모드, 워커 프로세스 경유 422 전달 확인
+"""
+
+import asyncio
+import io
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+from PIL import Image, ImageFilter
+from fastapi import HTTPException
+
+from app.core.image_profile import ImageProfile
+from app.core.image_utils import ImageWorkerPool, assess_image_quality, preprocess_image_bytes
+from tests.sample_images import lesion_image
+
+PROFILE = ImageProfile(max_edge=512)
+
+
+def _jpeg(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def lesion():
+    return lesion_image((500, 400), 180)
+
+
+def test_sharp_well_exposed_image_passes(lesion):
+    quality = assess_image_quality(lesion.resize((512, 384)), lesion_px=864)
+    assert quality["passed"], quality
+    assert quality["issues"] == []
+
+
+def test_detects_blur_exposure_and_small_lesion(lesion):
+    blurred = lesion.resize((512, 384)).filter(ImageFilter.GaussianBlur(3))
+    assert assess_image_quality(blurred, 864)["issues"] == ["blurry"]
+
+    bright = Image.eval(lesion.resize((512, 384)), lambda v: min(255, v * 3))
+    assert "overexposed" in assess_image_quality(bright, 864)["issues"]
+
+    dark = Image.eval(lesion.resize((512, 384)), lambda v: v // 30)
+    assert "underexposed" in assess_image_quality(dark, 864)["issues"]
+
+    assert assess_image_quality(lesion.resize((512, 384)), 40)["issues"] == ["lesion_too_small"]
+
+
+def test_annotate_mode_attaches_scores_without_rejecting(lesion):
+    data = _jpeg(lesion.filter(ImageFilter.GaussianBlur(12)))
+    result = preprocess_image_bytes(data, profile=PROFILE, quality_gate="annotate")
+    quality = result["image_info"]["quality"]
+    assert not quality["passed"] and "blurry" in quality["issues"]
+
+    off = preprocess_image_bytes(data, profile=PROFILE)
+    assert "quality" not in off["image_info"]
+
+
+def test_reject_mode_raises_structured_422(lesion):
+    data = _jpeg(lesion.filter(ImageFilter.GaussianBlur(12)))
+    with pytest.raises(HTTPException) as exc_info:
+        preprocess_image_bytes(data, profile=PROFILE, quality_gate="reject")
+    assert exc_info.value.status_code == 422
+    assert exc_info.value.detail["issues"] == ["blurry"]
+    assert exc_info.value.detail["quality"]["sharpness"] < 5
+
+    passed = preprocess_image_bytes(_jpeg(lesion), profile=PROFILE, quality_gate="reject")
+    assert passed["image_info"]["quality"]["passed"]
+
+
+def test_reject_mode_through_worker_process(lesion):
+    pool = ImageWorkerPool(processes=1, queue_size=0, timeout=10.0, max_tasks_per_child=5)
+    data = _jpeg(lesion.resize((48, 36)))
+
+    async def scenario():
+        await pool.run(preprocess_image_bytes, data, "a.jpg", "image/jpeg", False, PROFILE, False, "reject")
+
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert exc_info.value.status_code == 422
+    assert "lesion_too_small" in exc_info.value.detail["issues"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
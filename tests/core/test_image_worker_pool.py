@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+이미지 워커 프로세스 풀 테스트
+정상 처리, 오류 전달, 포화 시 진행 중 작업을 기다리지 않고 거절, 작업 타임아웃,
+스레드 모드에서 타임아웃된 작업이 끝날 때까지 슬롯 점유 확인 (거절/분배 지연 측정은 benchmarks/bench_image_worker_pool.py)
+"""
+
+import asyncio
+import io
+import sys
+import os
+import time
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+from PIL import Image
+from fastapi import HTTPException
+
+from app.core.image_utils import ImageWorkerPool, preprocess_image_bytes
+
+
+def _sample_jpeg() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (2048, 1536), (200, 150, 120)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _make_pool(**overrides) -> ImageWorkerPool:
+    options = dict(processes=1, queue_size=0, timeout=10.0, max_tasks_per_child=5)
+    options.update(overrides)
+    return ImageWorkerPool(**options)
+
+
+def test_preprocess_in_worker_process():
+    pool = _make_pool()
+
+    async def scenario():
+        return await pool.run(preprocess_image_bytes, _sample_jpeg(), "a.jpg", "image/jpeg")
+
+    try:
+        result = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert result["image_info"]["dimensions"] == (2048, 1536)
+    assert result["image_data_url"].startswith("data:image/jpeg;base64,")
+    assert pool.stats()["completed"] == 1
+
+
+def test_http_error_crosses_process_boundary():
+    pool = _make_pool()
+
+    async def scenario():
+        await pool.run(preprocess_image_bytes, b"not an image", "a.jpg", "image/jpeg")
+
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert exc_info.value.status_code == 400
+
+
+def test_saturated_pool_rejects_immediately():
+    pool = _make_pool()
+
+    async def scenario():
+        slow = asyncio.ensure_future(pool.run(time.sleep, 1.0))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as exc_info:
+            await pool.run(time.sleep, 0)
+        # 앞선 작업이 끝나기를 기다리지 않고 거절
+        running = not slow.done()
+        await slow
+        return exc_info.value, running
+
+    try:
+        error, running = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "1"
+    assert running
+    assert pool.stats()["rejected"] == 1 and pool.stats()["completed"] == 1
+
+
+def test_job_timeout():
+    pool = _make_pool(timeout=0.5)
+
+    async def scenario():
+        await pool.run(time.sleep, 3.0)
+
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert exc_info.value.status_code == 504
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_thread_mode_holds_slot_until_job_finishes():
+    pool = _make_pool(processes=0, timeout=0.1)
+
+    async def scenario():
+        with pytest.raises(HTTPException) as timed_out:
+            await pool.run(time.sleep, 0.5)
+        # 타임아웃 응답 후에도 스레드는 계속 실행 중 → 슬롯 유지, 다음 요청은 503
+        assert pool.stats()["in_flight"] == 1
+        with pytest.raises(HTTPException) as rejected:
+            await pool.run(time.sleep, 0)
+        await asyncio.sleep(0.6)
+        return timed_out.value, rejected.value, await pool.run(sum, [1, 2])
+
+    try:
+        timed_out, rejected, result = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert timed_out.status_code == 504 and rejected.status_code == 503
+    assert result == 3
+    assert pool.stats()["in_flight"] == 0 and pool.stats()["timeouts"] == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
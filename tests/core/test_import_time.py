@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+기동 import 시간 예산 테스트
+`python -X importtime -c "import app.main"`의 누적 시간이 예산 이내이고
+무거운 SDK(LangChain/OpenAI/Pillow/NumPy/aiohttp)가 첫 사용 전까지 로딩되지 않는지 확인
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 기본 예산: fastapi/pydantic 자체 import(~0.3s) + 여유분, CI 머신 성능에 맞춰 환경변수로 조정
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1000"))
+LAZY_MODULES = ["langchain", "langchain_core", "langchain_openai", "openai", "aiohttp", "PIL", "numpy", "httpx"]
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _import_time_ms() -> float:
+    """importtime 출력에서 app.main의 누적(cumulative) 시간(ms)"""
+    stderr = _run("import app.main", "-X", "importtime").stderr
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and line.rsplit("|", 1)[-1].strip() == "app.main":
+            return int(line.split("|")[1]) / 1000
+    raise AssertionError(f"app.main import 기록을 찾을 수 없음:\n{stderr[-2000:]}")
+
+
+def test_heavy_sdks_are_not_imported_at_startup():
+    code = f"import sys, app.main; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    loaded = _run(code).stdout.strip()
+    assert loaded == "", f"app.main import 시 로딩된 무거운 모듈: {loaded}"
+
+
+def test_app_import_within_budget():
+    # 첫 실행은 .pyc 생성 비용이 섞이므로 최솟값 사용
+    elapsed = min(_import_time_ms() for _ in range(3))
+    assert elapsed <= IMPORT_TIME_BUDGET_MS, f"import app.main {elapsed:.0f}ms > 예산 {IMPORT_TIME_BUDGET_MS:.0f}ms"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
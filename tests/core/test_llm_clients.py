@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+LLM 클라이언트 레지스트리 테스트
+동일 설정 인스턴스 재사용, base_url별 커넥션 풀 공유, 프로바이더 간 공유, 종료 처리 확인
+"""
+
+import asyncio
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+
+from app.core.llm_clients import LLMClientRegistry
+
+
+@pytest.fixture
+def registry():
+    return LLMClientRegistry(max_connections=10, max_keepalive_connections=5, keepalive_expiry=30, http2=True)
+
+
+def _model(registry, **overrides):
+    options = dict(api_key="sk-test", model="gpt-4o-mini", temperature=0.3, max_tokens=1000, timeout=30)
+    options.update(overrides)
+    return registry.chat_model(**options)
+
+
+def test_same_settings_reuse_instance(registry):
+    assert _model(registry) is _model(registry)
+    assert _model(registry) is not _model(registry, temperature=0.05)
+    assert registry.stats()["chat_models"] == 2
+
+
+def test_models_share_pooled_client_per_base_url(registry):
+    openai_a = _model(registry)
+    openai_b = _model(registry, max_tokens=400)
+    runpod = _model(registry, base_url="https://pod.example/v1", api_key="rp-test")
+
+    assert openai_a.http_async_client is openai_b.http_async_client
+    assert runpod.http_async_client is not openai_a.http_async_client
+    assert registry.stats()["http_clients"] == 2
+
+
+def test_providers_use_registry(monkeypatch, registry):
+    from app.providers import openai_medical, runpod_medical
+
+    monkeypatch.setattr(openai_medical, "llm_client_registry", registry)
+    monkeypatch.setattr(runpod_medical, "llm_client_registry", registry)
+    monkeypatch.setattr(runpod_medical.settings, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(runpod_medical.settings, "RUNPOD_API_KEY", "rp-test")
+    monkeypatch.setattr(runpod_medical.settings, "RUNPOD_BASE_URL", "https://pod.example/v1")
+
+    openai_provider = openai_medical.OpenAIMedicalInterpreter()
+    assert openai_provider.llm is openai_provider.vision_llm
+    assert openai_medical.OpenAIMedicalInterpreter().vision_llm is openai_provider.vision_llm
+
+    runpod_provider = runpod_medical.RunPodMedicalInterpreter()
+    assert runpod_provider.vision_llm is runpod_provider.vision_llm
+    assert runpod_provider.vision_llm.max_tokens == 400
+
+
+def test_aclose_releases_clients(registry):
+    client = registry.http_client("https://pod.example/v1")
+    asyncio.run(registry.aclose())
+    assert client.is_closed
+    assert registry.stats()["http_clients"] == 0
+    assert registry.http_client("https://pod.example/v1") is not client
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
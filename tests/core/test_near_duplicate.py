@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+근접 중복 이미지 탐지 테스트
+pHash의 재압축/크롭 내성, multi-index hashing 검색 정확도,
+결과 캐시 만료/LRU 제거 시 인덱스 정리와 만료된 최근접 항목 대신 다음 후보 사용 확인
+"""
+
+import io
+import random
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+from PIL import Image
+
+from app.core.image_utils import compute_phash
+from app.services import diagnosis_cache as cache_module
+from app.services.diagnosis_cache import DiagnosisResultCache, lookup_image_diagnosis, store_image_diagnosis
+from app.services.near_duplicate_index import MultiIndexHammingIndex, NearDuplicateIndex
+from tests.sample_images import lesion_image
+
+
+def _reencode(image: Image.Image, quality: int) -> Image.Image:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return Image.open(io.BytesIO(buffer.getvalue()))
+
+
+def test_phash_tolerates_recompression_and_small_crop():
+    original = lesion_image((500, 400), 180)
+    base = compute_phash(original)
+
+    recompressed = _reencode(original, 40)
+    cropped = original.crop((20, 15, 1132, 849))
+    other = lesion_image((700, 500), 120, seed=1)
+
+    assert (compute_phash(recompressed) ^ base).bit_count() <= 2
+    assert (compute_phash(cropped) ^ base).bit_count() <= 4
+    assert (compute_phash(other) ^ base).bit_count() > 16
+
+
+@pytest.mark.parametrize("max_distance", [3, 6, 10])
+def test_multi_index_matches_brute_force(max_distance):
+    rng = random.Random(max_distance)
+    stored = [rng.getrandbits(64) for _ in range(2000)]
+    index = MultiIndexHammingIndex(max_distance, max_entries=len(stored))
+    for i, value in enumerate(stored):
+        index.add(value, str(i))
+
+    for _ in range(300):
+        query = rng.choice(stored)
+        for position in rng.sample(range(64), rng.randint(0, max_distance + 2)):
+            query ^= 1 << position
+        best = min((value ^ query).bit_count() for value in stored)
+        found = index.nearest(query)
+        if best <= max_distance:
+            assert found is not None and found[1] == best
+        else:
+            assert found is None
+
+
+def test_multi_index_evicts_oldest():
+    index = MultiIndexHammingIndex(max_distance=4, max_entries=2)
+    index.add(0, "a")
+    index.add((1 << 64) - 1, "b")
+    index.add((1 << 32) - 1, "c")
+    assert len(index) == 2
+    assert index.nearest(0) is None
+    assert index.nearest((1 << 32) - 1) == ("c", 0)
+
+
+def test_within_returns_all_matches_by_distance():
+    index = MultiIndexHammingIndex(max_distance=4, max_entries=10)
+    index.add(0b111, "three")
+    index.add(0b1, "one")
+    index.add((1 << 64) - 1, "far")
+    assert index.within(0) == [("one", 1), ("three", 3)]
+
+
+@pytest.fixture
+def image_cache(monkeypatch):
+    index = NearDuplicateIndex(max_distance=4, max_entries=10)
+    cache = DiagnosisResultCache(max_entries=2, ttl_seconds=60, on_evict=index.remove_key)
+    monkeypatch.setattr(cache_module, "near_duplicate_index", index)
+    monkeypatch.setattr(cache_module, "diagnosis_cache", cache)
+    return cache, index
+
+
+def _store(name: str, phash: int) -> None:
+    store_image_diagnosis(f"<root><label>{name}</label></root>", name, "openai", "gpt-4o-mini", "v1", f"{phash:016x}")
+
+
+def _lookup(phash: int):
+    return lookup_image_diagnosis("query", "openai", "gpt-4o-mini", "v1", f"{phash:016x}")
+
+
+def test_cache_eviction_removes_index_entries(image_cache):
+    cache, index = image_cache
+    _store("a", 0)
+    _store("b", 0b11)
+    _store("c", (1 << 64) - 1)
+    # LRU로 빠진 a는 인덱스에서도 제거, 남은 b가 근접 중복으로 매칭
+    assert len(index) == 2
+    cached, meta = _lookup(0)
+    assert cached == "<root><label>b</label></root>" and meta["near_duplicate_distance"] == 2
+
+
+def test_expired_nearest_falls_back_to_next_candidate(image_cache):
+    cache, index = image_cache
+    _store("a", 0)
+    _store("b", 0b111)
+    nearest_key, _ = cache_module._image_cache_keys("a", "openai", "gpt-4o-mini", "v1", f"{0:016x}", {})
+    cache._entries[nearest_key] = (0.0, cache._entries[nearest_key][1])
+
+    cached, meta = _lookup(0)
+    # 가장 가까운 a(거리 0)는 만료 → 임계 거리 안의 다음 후보 b(거리 3) 사용, 만료 항목은 인덱스에서 제거
+    assert cached == "<root><label>b</label></root>" and meta["near_duplicate_distance"] == 3
+    assert len(index) == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+진단 프롬프트 컴파일러 테스트
+레이아웃 공백 제거, 스키마 생략 플래그, 프롬프트 토큰 수 고정(입력 비용 회귀 방지), 메타데이터 기록,
+토큰 카운터의 tiktoken 경로와 추정값 대체 경로(미설치/로딩 실패) 확인 (가짜 tiktoken 모듈, 네트워크 없음)
+
+토큰 수는 환경에 관계없이 같은 값이 나오도록 tiktoken을 끈 추정 토크나이저 기준으로 고정
+프롬프트를 의도적으로 바꿨다면 EXPECTED_TOKENS와 PROMPT_VERSION을 함께 갱신
+"""
+
+import asyncio
+import sys
+import os
+import types
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+
+from app.core import prompt_compiler
+from app.core.config import settings
+from app.core.prompt_compiler import (
+    ESTIMATE_TOKENIZER,
+    DiagnosisPromptCompiler,
+    TokenCounter,
+    compact_layout,
+    diagnosis_prompts,
+    estimate_tokens,
+)
+from app.core.prompt_registry import DIAGNOSIS_SYSTEM_PROMPT
+from app.providers import runpod_medical
+from app.providers.runpod_medical import RunPodMedicalInterpreter
+from app.services.langchain_service import langchain_service
+
+SYSTEM_PROMPT = DIAGNOSIS_SYSTEM_PROMPT
+
+# (drop_schema, 프롬프트) → 추정 토큰 수
+EXPECTED_TOKENS = {
+    (False, "text"): 176,
+    (False, "image"): 175,
+    (True, "text"): 66,
+    (True, "image"): 69,
+}
+EXPECTED_SYSTEM_TOKENS = 537
+# 컴파일러 도입 전 f-string 텍스트 프롬프트(들여쓰기 포함)의 추정 토큰 수
+LEGACY_TEXT_TOKENS = 181
+
+
+@pytest.fixture(autouse=True)
+def no_tiktoken(monkeypatch):
+    """tiktoken 설치 여부와 관계없이 추정 토크나이저 경로로 고정 (tiktoken 경로 테스트는 가짜 모듈을 다시 켬)"""
+    monkeypatch.setattr(prompt_compiler, "TIKTOKEN_AVAILABLE", False)
+
+
+def _compiler(drop_schema: bool) -> DiagnosisPromptCompiler:
+    counter = TokenCounter("o200k_base")
+    assert counter.load() is False and counter.estimated
+    return DiagnosisPromptCompiler(drop_schema=drop_schema, counter=counter)
+
+
+def _fake_tiktoken(monkeypatch, get_encoding):
+    monkeypatch.setattr(prompt_compiler, "TIKTOKEN_AVAILABLE", True)
+    monkeypatch.setitem(sys.modules, "tiktoken", types.SimpleNamespace(get_encoding=get_encoding))
+
+
+def _prompts(compiler: DiagnosisPromptCompiler) -> dict:
+    return {
+        "text": compiler.text_prompt("  갈색 반점 ", "2주 전부터", SYSTEM_PROMPT),
+        "image": compiler.image_prompt(None, SYSTEM_PROMPT),
+    }
+
+
+def test_compact_layout():
+    assert compact_layout("\n    가나다:\n\n    <root>\n    <a>x</a>\n    </root>\n") == "가나다:\n<root><a>x</a></root>"
+
+
+@pytest.mark.parametrize("drop_schema", [False, True])
+def test_prompts_have_no_layout_whitespace(drop_schema):
+    for prompt in _prompts(_compiler(drop_schema)).values():
+        lines = prompt.split("\n")
+        assert all(line == line.strip() and line for line in lines)
+        assert ">\n<" not in prompt
+        assert ("<similar_labels>" in prompt) is not drop_schema
+    assert _prompts(_compiler(drop_schema))["text"].endswith("\n병변 설명: 갈색 반점\n추가 정보: 2주 전부터")
+
+
+@pytest.mark.parametrize("drop_schema", [False, True])
+def test_prompt_token_counts_are_pinned(drop_schema):
+    compiler = _compiler(drop_schema)
+    for name, prompt in _prompts(compiler).items():
+        counts = compiler.count(SYSTEM_PROMPT, prompt)
+        assert counts == {
+            "system": EXPECTED_SYSTEM_TOKENS,
+            "user": EXPECTED_TOKENS[(drop_schema, name)],
+            "total": EXPECTED_SYSTEM_TOKENS + EXPECTED_TOKENS[(drop_schema, name)],
+            "tokenizer": ESTIMATE_TOKENIZER,
+            "estimated": True,
+        }, f"{name} 프롬프트 토큰 수 변경 - 의도한 변경이면 기대값과 PROMPT_VERSION 갱신"
+    assert EXPECTED_TOKENS[(drop_schema, "text")] < LEGACY_TEXT_TOKENS
+
+
+def test_counter_uses_loaded_encoding(monkeypatch):
+    class ByteEncoding:
+        def encode(self, text):
+            return list(text.encode("utf-8"))
+
+    names = []
+    _fake_tiktoken(monkeypatch, lambda name: names.append(name) or ByteEncoding())
+    counter = TokenCounter("o200k_base")
+    assert counter.load() is True and counter.load() is True
+    assert names == ["o200k_base"]
+    assert counter.name == "o200k_base" and not counter.estimated
+    assert counter.count("갈색 반점") == len("갈색 반점".encode("utf-8"))
+
+
+def test_counter_falls_back_when_encoding_fails(monkeypatch):
+    def offline(name):
+        raise ConnectionError("어휘 파일 다운로드 실패")
+
+    _fake_tiktoken(monkeypatch, offline)
+    counter = TokenCounter("o200k_base")
+    assert counter.load() is False
+    assert counter.name == ESTIMATE_TOKENIZER and counter.estimated
+    assert counter.count("갈색 반점") == estimate_tokens("갈색 반점")
+
+
+def test_prompt_tokens_in_metadata(monkeypatch):
+    async def fake_generate(llm, messages):
+        return '<root><label id_code="7" score="81.2">지루각화증</label><summary>갈색 구진</summary></root>'
+
+    monkeypatch.setattr(settings, "RUNPOD_API_KEY", "rp-test")
+    monkeypatch.setattr(runpod_medical, "agenerate_diagnosis", fake_generate)
+    monkeypatch.setattr(langchain_service, "_skin_diagnosis_provider", RunPodMedicalInterpreter())
+    result = asyncio.run(langchain_service.diagnose_skin_lesion("갈색 반점", additional_info="2주 전부터"))
+
+    user_prompt = diagnosis_prompts.text_prompt("갈색 반점", "2주 전부터", SYSTEM_PROMPT)
+    assert result["metadata"]["prompt_tokens"] == diagnosis_prompts.count(SYSTEM_PROMPT, user_prompt)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
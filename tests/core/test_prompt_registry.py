@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+프롬프트 레지스트리 테스트
+시스템 프롬프트 단일 출처, 정적 접두 메시지 재사용(호출마다 새로 만들지 않음),
+요청 간 공통 접두부 유지(프로바이더 접두 캐시), 메타데이터의 프롬프트 버전 확인
+"""
+
+import asyncio
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+
+from app.core.config import settings
+from app.core.prompt_registry import DIAGNOSIS_SYSTEM_PROMPT, PROMPT_VERSION, SKIN_DIAGNOSIS, prompt_registry
+from app.providers import openai_medical, runpod_medical
+from app.providers.openai_medical import OpenAIMedicalInterpreter
+from app.providers.runpod_medical import RunPodMedicalInterpreter
+from app.services.langchain_service import langchain_service
+from tests.fake_providers import XML
+
+
+@pytest.fixture
+def sent_messages(monkeypatch):
+    """프로바이더가 LLM에 넘긴 메시지 목록 기록 (LLM 호출 없음)"""
+    sent = []
+
+    async def fake_generate(llm, messages):
+        sent.append(messages)
+        return XML
+
+    monkeypatch.setattr(settings, "RUNPOD_API_KEY", "rp-test")
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(runpod_medical, "agenerate_diagnosis", fake_generate)
+    monkeypatch.setattr(openai_medical, "agenerate_diagnosis", fake_generate)
+    return sent
+
+
+def test_single_system_prompt_source():
+    assert RunPodMedicalInterpreter()._get_system_prompt() is DIAGNOSIS_SYSTEM_PROMPT
+    assert OpenAIMedicalInterpreter()._get_system_prompt() is DIAGNOSIS_SYSTEM_PROMPT
+    assert langchain_service.system_prompt is DIAGNOSIS_SYSTEM_PROMPT
+
+
+@pytest.mark.parametrize("provider_class", [RunPodMedicalInterpreter, OpenAIMedicalInterpreter])
+def test_prefix_messages_are_shared(sent_messages, provider_class):
+    provider = provider_class()
+
+    async def calls():
+        await provider.diagnose_text("갈색 반점", additional_info="2주 전부터")
+        await provider.diagnose_text("붉은 결절")
+        await provider.diagnose_image("AAAA", additional_info="왼쪽 뺨")
+
+    asyncio.run(calls())
+    prefix = prompt_registry.prefix_messages(SKIN_DIAGNOSIS)
+    assert isinstance(prefix, tuple) and prefix[0].content is DIAGNOSIS_SYSTEM_PROMPT
+    # 모든 호출이 프로세스 전역 SystemMessage 인스턴스를 그대로 사용
+    assert all(messages[0] is prefix[0] and len(messages) == 2 for messages in sent_messages)
+
+
+def test_user_prompt_keeps_stable_prefix(sent_messages):
+    async def calls():
+        provider = RunPodMedicalInterpreter()
+        await provider.diagnose_text("갈색 반점", additional_info="2주 전부터")
+        await provider.diagnose_text("붉은 결절")
+
+    asyncio.run(calls())
+    first, second = (messages[1].content for messages in sent_messages)
+    shared = os.path.commonprefix([first, second])
+    # 요청별 값(병변 설명)은 고정 지시문/스키마 뒤에 위치
+    assert shared.endswith("병변 설명: ") and "</root>" in shared
+
+
+def test_prompt_version_in_metadata(sent_messages, monkeypatch):
+    monkeypatch.setattr(langchain_service, "_skin_diagnosis_provider", RunPodMedicalInterpreter())
+    result = asyncio.run(langchain_service.diagnose_skin_lesion("갈색 반점"))
+    assert result["metadata"]["prompt_version"] == PROMPT_VERSION == prompt_registry.version
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+프로바이더 동시 호출 제한 테스트
+동시 호출 상한/FIFO 대기열, 대기열 초과·대기 시간 초과 시 503 + Retry-After, 취소된 대기자 정리,
+과부하 응답의 재시도 없음과 API 503 전달(스트리밍 엔드포인트 포함) 확인 (로컬 가짜 프로바이더, 외부 호출 없음)
+"""
+
+import asyncio
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.provider_limits import ProviderConcurrencyLimiter
+from app.services import langchain_service as langchain_module
+from app.services import refiner_service as refiner_module
+from app.services.langchain_service import langchain_service
+from tests.fake_providers import XML, FakeProvider, FakeRefiner, install_provider, silence_followups
+
+
+def _limiter(limit=2, queue_size=1, queue_timeout=5.0) -> ProviderConcurrencyLimiter:
+    return ProviderConcurrencyLimiter({"runpod": limit, "openai": 0}, queue_size=queue_size, queue_timeout=queue_timeout)
+
+
+def test_limit_queue_and_fast_rejection():
+    limiter = _limiter()
+    order = []
+
+    async def call(tag, gate):
+        order.append(("start", tag))
+        await gate.wait()
+        return tag
+
+    async def scenario():
+        gate = asyncio.Event()
+        running = [asyncio.ensure_future(limiter.run("runpod", lambda tag=tag: call(tag, gate))) for tag in "ab"]
+        queued = asyncio.ensure_future(limiter.run("runpod", lambda: call("c", asyncio.Event())))
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["providers"]["runpod"]["queue_depth"] == 1
+
+        # 대기열이 가득 차면 기다리지 않고 즉시 503
+        with pytest.raises(HTTPException) as exc_info:
+            await limiter.run("runpod", lambda: call("d", gate))
+        assert exc_info.value.status_code == 503 and "Retry-After" in exc_info.value.headers
+
+        gate.set()
+        assert await asyncio.gather(*running) == ["a", "b"]
+        await asyncio.sleep(0.01)
+        assert ("start", "c") in order
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+
+    asyncio.run(scenario())
+    stats = limiter.stats()["providers"]["runpod"]
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+    assert stats["accepted"] == 3 and stats["queued"] == 1 and stats["rejected"] == 1 and stats["max_queue_depth"] == 1
+    assert order == [("start", "a"), ("start", "b"), ("start", "c")]
+
+
+def test_queue_deadline_returns_503():
+    limiter = _limiter(limit=1, queue_timeout=0.05)
+
+    async def scenario():
+        blocker = asyncio.ensure_future(limiter.run("runpod", lambda: asyncio.sleep(0.5)))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as exc_info:
+            await limiter.run("runpod", lambda: asyncio.sleep(0))
+        blocker.cancel()
+        await asyncio.gather(blocker, return_exceptions=True)
+        return exc_info.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    stats = limiter.stats()["providers"]["runpod"]
+    assert stats["queue_timeouts"] == 1 and stats["queue_depth"] == 0 and stats["in_flight"] == 0
+
+
+def test_cancelled_waiter_is_skipped():
+    limiter = _limiter(limit=1, queue_size=2)
+
+    async def scenario():
+        gate = asyncio.Event()
+        first = asyncio.ensure_future(limiter.run("runpod", gate.wait))
+        await asyncio.sleep(0)
+        abandoned = asyncio.ensure_future(limiter.run("runpod", lambda: asyncio.sleep(0, "abandoned")))
+        waiting = asyncio.ensure_future(limiter.run("runpod", lambda: asyncio.sleep(0, "next")))
+        await asyncio.sleep(0.01)
+        abandoned.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        await first
+        return await waiting
+
+    assert asyncio.run(scenario()) == "next"
+    assert limiter.stats()["providers"]["runpod"]["in_flight"] == 0
+
+
+def test_zero_limit_is_unbounded():
+    limiter = _limiter()
+
+    async def scenario():
+        return await asyncio.gather(*(limiter.run("openai", lambda: asyncio.sleep(0.01, 1)) for _ in range(50)))
+
+    assert sum(asyncio.run(scenario())) == 50
+    assert limiter.stats()["providers"]["openai"]["limit"] is None
+
+
+def test_overloaded_diagnosis_is_not_retried(monkeypatch):
+    provider = install_provider(monkeypatch, FakeProvider(delay=0.1), image=False)
+    monkeypatch.setattr(langchain_module, "provider_limiter", _limiter(limit=1, queue_size=0))
+    monkeypatch.setattr(langchain_module.settings, "SKIN_DIAGNOSIS_PROVIDER", "runpod")
+
+    async def scenario():
+        return await asyncio.gather(
+            langchain_service.diagnose_skin_lesion("갈색 반점 (동시 호출 1)"),
+            langchain_service.diagnose_skin_lesion("붉은 결절 (동시 호출 2)"),
+            return_exceptions=True,
+        )
+
+    served, rejected = asyncio.run(scenario())
+    assert served["result"] == XML
+    assert isinstance(rejected, HTTPException) and rejected.status_code == 503
+    assert provider.calls == 1
+
+
+def test_api_returns_503_with_retry_after(monkeypatch):
+    from app.main import app
+
+    monkeypatch.setattr(refiner_module.refiner_service, "provider", FakeRefiner())
+    limiter = ProviderConcurrencyLimiter({"openai": 1}, queue_size=0, queue_timeout=1.0)
+    limiter._get("openai").in_flight = 1  # 다른 요청이 슬롯 점유 중
+    monkeypatch.setattr(refiner_module, "provider_limiter", limiter)
+
+    response = TestClient(app).post("/api/v1/utterance/refine", json={"text": "손등이 가려워요"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+
+def test_stream_endpoint_returns_503_before_streaming(monkeypatch):
+    from app.main import app
+
+    silence_followups(monkeypatch)
+    provider = install_provider(monkeypatch, FakeProvider(), image=False)
+    limiter = _limiter(limit=1, queue_size=0)
+    limiter._get("runpod").in_flight = 1  # 다른 요청이 슬롯 점유 중
+    monkeypatch.setattr(langchain_module, "provider_limiter", limiter)
+    monkeypatch.setattr(langchain_module.provider_router, "enabled", False)
+    monkeypatch.setattr(langchain_module.settings, "SKIN_DIAGNOSIS_PROVIDER", "runpod")
+
+    response = TestClient(app).post("/api/v1/diagnose/skin-lesion/stream", json={"lesion_description": "갈색 반점"})
+    # SSE error 이벤트가 아닌 HTTP 503으로 거절, 프로바이더 호출 없음
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert not response.headers["content-type"].startswith("text/event-stream")
+    assert provider.calls == 0
+
+    # 슬롯이 비면 같은 엔드포인트가 스트리밍하고 끝난 뒤 슬롯 반환
+    limiter._get("runpod").in_flight = 0
+    response = TestClient(app).post("/api/v1/diagnose/skin-lesion/stream", json={"lesion_description": "갈색 반점"})
+    assert response.status_code == 200 and "event: result" in response.text
+    assert limiter.stats()["providers"]["runpod"]["in_flight"] == 0
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
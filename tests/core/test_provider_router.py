@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+진단 프로바이더 라우터 테스트
+연속 실패 시 서킷 open/다른 프로바이더 전환, half-open 시험 요청 하나로 복구,
+응답 시간 기준 이동, 타임아웃/취소/스트림 결과 집계, 서비스 재시도 시 전환,
+메타데이터/결과 캐시 키/이미지 전처리 프로파일이 실제로 응답한 프로바이더를 따르는지 확인
+(가짜 시계/프로바이더, 외부 호출 없음)
+"""
+
+import asyncio
+import io
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.hedging import request_hedger
+from app.core.image_profile import ImageProfile
+from app.core.prompt_registry import PROMPT_VERSION
+from app.core.provider_router import ProviderRouter
+from app.services import langchain_service as langchain_module
+from app.services.diagnosis_cache import lookup_image_diagnosis
+from app.services.langchain_service import langchain_service
+from tests.fake_providers import XML, FakeProvider, silence_followups
+from tests.sample_images import lesion_image
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _router(clock=None, **overrides) -> ProviderRouter:
+    options = dict(
+        enabled=True, alpha=0.5, failure_threshold=3, error_rate_threshold=0.5, min_samples=4,
+        open_seconds=30, latency_ratio=2.0, probe_ratio=0.0, probe_timeout=60,
+        clock=clock or _Clock(), rng=lambda: 0.5,
+    )
+    options.update(overrides)
+    return ProviderRouter(**options)
+
+
+def _fail(router, name, times, route="text"):
+    for _ in range(times):
+        router.record_failure(route, name, 0.1)
+
+
+def test_circuit_opens_after_consecutive_failures_and_recovers():
+    clock = _Clock()
+    router = _router(clock)
+    assert router.choose("text", "runpod", "openai") == "runpod"
+
+    _fail(router, "runpod", 3)
+    assert router.stats()["routes"]["text"]["runpod"]["state"] == "open"
+    assert router.choose("text", "runpod", "openai") == "openai"
+
+    # open_seconds 경과 → half-open: 시험 요청 하나만 설정된 쪽으로, 나머지는 계속 다른 쪽
+    clock.now += 30
+    assert router.choose("text", "runpod", "openai") == "runpod"
+    assert router.choose("text", "runpod", "openai") == "openai"
+
+    router.record_success("text", "runpod", 0.8)
+    stats = router.stats()["routes"]["text"]["runpod"]
+    assert stats["state"] == "closed" and stats["opens"] == 1 and stats["consecutive_failures"] == 0
+    assert router.choose("text", "runpod", "openai") == "runpod"
+
+
+def test_failed_probe_reopens_circuit():
+    clock = _Clock()
+    router = _router(clock)
+    _fail(router, "runpod", 3)
+    clock.now += 30
+    assert router.choose("text", "runpod", "openai") == "runpod"
+    _fail(router, "runpod", 1)
+
+    stats = router.stats()["routes"]["text"]["runpod"]
+    assert stats["state"] == "open" and stats["opens"] == 2 and stats["retry_in_seconds"] == 30
+    assert router.choose("text", "runpod", "openai") == "openai"
+
+
+def test_claim_admits_one_half_open_probe():
+    clock = _Clock()
+    router = _router(clock)
+    _fail(router, "runpod", 3)
+    assert router.claim("text", "runpod") is False
+    clock.now += 30
+    assert router.choose("text", "runpod", "openai", claim=False) == "runpod"
+    assert router.claim("text", "runpod") is True
+    # 시험 요청이 진행 중이면 다시 차지하지 않음 (시작 시각도 그대로)
+    clock.now += 10
+    assert router.claim("text", "runpod") is False
+    assert router.choose("text", "runpod", "openai") == "openai"
+    clock.now += 50
+    assert router.claim("text", "runpod") is True
+
+
+def test_error_rate_opens_circuit_without_consecutive_failures():
+    router = _router(failure_threshold=10)
+    for _ in range(4):
+        router.record_failure("image", "runpod", 0.1)
+        router.record_success("image", "runpod", 0.1)
+        router.record_failure("image", "runpod", 0.1)
+    assert router.stats()["routes"]["image"]["runpod"]["state"] == "open"
+    # 경로별 상태는 독립
+    assert router.choose("text", "runpod", "openai") == "runpod"
+
+
+def test_no_alternate_or_disabled_keeps_configured_provider():
+    router = _router()
+    _fail(router, "runpod", 5)
+    assert router.choose("text", "runpod", None) == "runpod"
+    router.enabled = False
+    assert router.choose("text", "runpod", "openai") == "runpod"
+
+
+def test_slow_provider_shifts_traffic_with_probes():
+    rolls = iter([0.5, 0.05])
+    router = _router(probe_ratio=0.1, rng=lambda: next(rolls))
+    for _ in range(4):
+        router.record_success("text", "runpod", 9.0)
+        router.record_success("text", "openai", 2.0)
+    assert router.choose("text", "runpod", "openai") == "openai"
+    # probe_ratio만큼은 회복 확인을 위해 설정된 쪽으로
+    assert router.choose("text", "runpod", "openai") == "runpod"
+
+
+def test_observe_counts_timeouts_and_releases_cancelled_probe():
+    clock = _Clock()
+    router = _router(clock)
+
+    async def timeout():
+        raise asyncio.TimeoutError()
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await router.observe("text", "runpod", timeout())
+        _fail(router, "runpod", 2)
+        clock.now += 30
+        assert router.choose("text", "runpod", "openai") == "runpod"
+        task = asyncio.ensure_future(router.observe("text", "runpod", slow()))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    stats = router.stats()["routes"]["text"]["runpod"]
+    assert stats["timeouts"] == 1 and stats["failures"] == 3
+    # 헤지 패배 등으로 취소된 시험 요청은 실패로 세지 않고 슬롯만 반환
+    assert stats["state"] == "half_open"
+    assert router.choose("text", "runpod", "openai") == "runpod"
+
+
+def test_observe_stream_records_outcome_and_releases_closed_probe():
+    clock = _Clock()
+    router = _router(clock)
+
+    async def chunks(error=None):
+        yield "<root>"
+        if error:
+            raise error
+        yield "</root>"
+
+    async def scenario():
+        assert [chunk async for chunk in router.observe_stream("text", "openai", chunks())] == ["<root>", "</root>"]
+        with pytest.raises(ConnectionError):
+            async for _ in router.observe_stream("text", "runpod", chunks(ConnectionError("끊김"))):
+                pass
+        _fail(router, "runpod", 2)
+        clock.now += 30
+        assert router.choose("text", "runpod", "openai") == "runpod"
+        # 클라이언트가 중간에 끊은 시험 스트림은 실패로 세지 않고 슬롯만 반환
+        stream = router.observe_stream("text", "runpod", chunks())
+        await stream.__anext__()
+        await stream.aclose()
+
+    asyncio.run(scenario())
+    stats = router.stats()["routes"]["text"]
+    assert stats["openai"]["requests"] == 1 and stats["runpod"]["failures"] == 3
+    assert stats["runpod"]["state"] == "half_open"
+    assert router.choose("text", "runpod", "openai") == "runpod"
+
+
+def test_service_retry_fails_over_to_other_provider(monkeypatch):
+    router = _router(failure_threshold=1)
+    runpod, openai = FakeProvider(ConnectionError("runpod down")), FakeProvider()
+    monkeypatch.setattr(langchain_module, "provider_router", router)
+    monkeypatch.setattr(request_hedger, "enabled", False)
+    monkeypatch.setattr(settings, "SKIN_DIAGNOSIS_PROVIDER", "runpod")
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 1)
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(langchain_service, "_skin_diagnosis_provider", runpod)
+    monkeypatch.setattr(langchain_service, "_alternate_providers", {"openai": openai})
+
+    result = asyncio.run(langchain_service.diagnose_skin_lesion("갈색 반점 (라우팅)"))
+    assert result["result"] == XML
+    assert runpod.calls == 1 and openai.calls == 1
+    assert langchain_service.skin_diagnosis_provider is openai
+
+    assert result["metadata"]["provider"] == "openai" and result["metadata"]["model"] == "gpt-4o-mini"
+
+    stats = router.stats()["routes"]["text"]
+    assert stats["runpod"]["state"] == "open" and stats["openai"]["requests"] == 1
+
+
+def test_coalesced_requests_claim_one_routed_slot(monkeypatch):
+    router = _router()
+    runpod = FakeProvider(delay=0.05)
+    monkeypatch.setattr(langchain_module, "provider_router", router)
+    monkeypatch.setattr(request_hedger, "enabled", False)
+    monkeypatch.setattr(settings, "SKIN_DIAGNOSIS_PROVIDER", "runpod")
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(langchain_service, "_skin_diagnosis_provider", runpod)
+    monkeypatch.setattr(langchain_service, "_alternate_providers", {"openai": FakeProvider()})
+
+    async def scenario():
+        return await asyncio.gather(*[
+            langchain_service.diagnose_skin_lesion("갈색 반점 (합류 라우팅)") for _ in range(4)
+        ])
+
+    assert all(result["result"] == XML for result in asyncio.run(scenario()))
+    # 합류한 요청은 라우터 슬롯을 차지하지 않음 → 실제 호출 1번 = 라우팅 1번 = 관측 1번
+    stats = router.stats()["routes"]["text"]["runpod"]
+    assert runpod.calls == 1 and stats["routed"] == 1 and stats["requests"] == 1
+
+
+@pytest.fixture
+def image_providers(monkeypatch):
+    router = _router(failure_threshold=1)
+    runpod, openai = FakeProvider(), FakeProvider()
+    openai.image_profile = ImageProfile(max_edge=512)
+    monkeypatch.setattr(langchain_module, "provider_router", router)
+    monkeypatch.setattr(request_hedger, "enabled", False)
+    monkeypatch.setattr(settings, "SKIN_DIAGNOSIS_IMAGE_PROVIDER", "runpod")
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 1)
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(langchain_service, "_skin_diagnosis_image_provider", runpod)
+    monkeypatch.setattr(langchain_service, "_alternate_providers", {"openai": openai})
+    return router, runpod, openai
+
+
+def test_image_result_is_cached_under_serving_provider(image_providers):
+    router, runpod, openai = image_providers
+    runpod.reply = ConnectionError("runpod down")
+    image_hash = "f" * 64
+
+    result = asyncio.run(langchain_service.diagnose_skin_lesion_with_image(
+        "data:image/jpeg;base64,AAAA", image_hash=image_hash, provider_name="runpod",
+    ))
+    # 전처리 때 고른 runpod가 실패 → 재시도는 openai, 메타데이터와 캐시 키는 openai 기준
+    assert runpod.calls == 1 and openai.calls == 1
+    assert result["metadata"]["provider"] == "openai" and result["metadata"]["model"] == "gpt-4o-mini"
+
+    def cached(name):
+        return lookup_image_diagnosis(
+            image_hash, *langchain_service.image_provider_identity(name), PROMPT_VERSION,
+            additional_info=None, questionnaire=None,
+        )[0]
+
+    assert cached("openai") == XML and cached("runpod") is None
+
+
+def test_image_profile_follows_routing_decision(image_providers, monkeypatch):
+    from app.main import app
+
+    router, runpod, openai = image_providers
+    silence_followups(monkeypatch)
+    _fail(router, "runpod", 1, route="image")
+
+    buffer = io.BytesIO()
+    lesion_image((400, 300), 120, seed=3).save(buffer, format="JPEG")
+    response = TestClient(app).post(
+        "/api/v1/diagnose/skin-lesion-image", files={"image": ("a.jpg", buffer.getvalue(), "image/jpeg")}
+    )
+    assert response.status_code == 200, response.text
+    metadata = response.json()["metadata"]
+    # 서킷이 열린 runpod(1024px) 대신 openai로 라우팅 → openai 프로파일(512px)로 전처리
+    assert metadata["provider"] == "openai"
+    assert max(metadata["image_info"]["encoding"]["dimensions"]) == 512
+    assert runpod.calls == 0 and openai.calls == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+OpenAI RPM/TPM 스케줄러 테스트
+요청 비용 추정(이미지 data URL 미파싱), 버킷 부족 시 대기, 응답 헤더로 한도 학습/잔량 보정, 429 보류, 최대 대기,
+공유 OpenAI HTTP 클라이언트 훅 연결, 슬롯 전 예약(prepay)한 요청을 훅이 다시 예약하지 않는지 확인
+(httpx MockTransport, 외부 호출 없음)
+"""
+
+import asyncio
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import httpx
+import orjson
+import pytest
+
+from app.core.llm_clients import OPENAI_BASE_URL, LLMClientRegistry
+from app.core.config import settings
+from app.core.prompt_compiler import diagnosis_prompts, prompt_token_counter
+from app.core.provider_limits import ProviderConcurrencyLimiter
+from app.core.rate_limits import OpenAIRateScheduler, openai_rate_scheduler, parse_reset
+from app.providers import openai_medical
+from app.services import langchain_service as langchain_module
+from app.services.langchain_service import langchain_service
+from tests.fake_providers import FakeProvider, install_provider
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _scheduler(rpm=0, tpm=0, max_wait=5.0, clock=None) -> OpenAIRateScheduler:
+    return OpenAIRateScheduler(
+        enabled=True, rpm=rpm, tpm=tpm, max_wait=max_wait, default_max_tokens=1000, clock=clock or _Clock()
+    )
+
+
+def _body(**overrides) -> bytes:
+    payload = {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {"role": "system", "content": "피부과 전문의처럼 답하세요."},
+            {"role": "user", "content": [
+                {"type": "text", "text": "이 병변을 진단해주세요."},
+                {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA", "detail": "low"}},
+            ]},
+        ],
+        "max_tokens": 400,
+    }
+    payload.update(overrides)
+    return orjson.dumps(payload)
+
+
+def test_parse_reset_durations():
+    assert parse_reset("2") == 2.0
+    assert parse_reset("20ms") == pytest.approx(0.02)
+    assert parse_reset("6m0s") == 360.0
+    assert parse_reset("1h2m3.5s") == pytest.approx(3723.5)
+    assert parse_reset(None) is None and parse_reset("soon") is None
+
+
+def test_estimate_counts_prompt_images_and_output_budget():
+    scheduler = _scheduler()
+    prompt = prompt_token_counter.count("피부과 전문의처럼 답하세요.") + prompt_token_counter.count("이 병변을 진단해주세요.")
+    assert scheduler.estimate(_body()) == 3 + 2 * 3 + prompt + 85 + 400
+    # detail 미지정 이미지는 high 기준, max_tokens 없으면 기본 상한
+    high = _body(max_tokens=None, messages=[{"role": "user", "content": [{"type": "image_url", "image_url": {"url": "x"}}]}])
+    assert scheduler.estimate(high) == 3 + 3 + 765 + 1000
+
+
+def test_estimate_does_not_depend_on_image_payload():
+    scheduler = _scheduler()
+    large = _body(messages=[
+        {"role": "system", "content": "피부과 전문의처럼 답하세요."},
+        {"role": "user", "content": [
+            {"type": "text", "text": "이 병변을 진단해주세요."},
+            {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64," + "A" * 500_000, "detail": "low"}},
+        ]},
+    ])
+    assert scheduler.estimate(large) == scheduler.estimate(_body())
+
+
+def test_requests_wait_for_token_bucket():
+    clock = _Clock()
+    scheduler = _scheduler(tpm=6000, clock=clock)
+
+    async def scenario():
+        first = await scheduler.acquire(6000)
+        second = await scheduler.acquire(10)  # 잔량 0 → 10토큰(초당 100) 채워질 때까지 0.1s
+        clock.now += 1.0
+        third = await scheduler.acquire(50)
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first == 0.0 and second == pytest.approx(0.1) and third == 0.0
+    stats = scheduler.stats()
+    assert stats["delayed"] == 1 and stats["scheduled"] == 3 and stats["tpm_limit"] == 6000
+
+
+def test_headers_teach_limits_and_lower_remaining():
+    scheduler = _scheduler()
+    assert asyncio.run(scheduler.acquire(100000)) == 0.0  # 한도 미지정 → 대기 없음
+
+    scheduler.observe(200, {
+        "x-ratelimit-limit-requests": "500", "x-ratelimit-remaining-requests": "499",
+        "x-ratelimit-limit-tokens": "200000", "x-ratelimit-remaining-tokens": "150",
+    })
+    stats = scheduler.stats()
+    assert stats["rpm_limit"] == 500 and stats["tpm_limit"] == 200000 and stats["tpm_available"] == 150
+    # 잔량 150 → 3333토큰이 모자라므로 초당 3333토큰 기준 약 1s 대기
+    assert asyncio.run(scheduler.acquire(3483)) == pytest.approx(1.0, abs=0.1)
+
+
+def test_429_pauses_following_requests_until_reset():
+    clock = _Clock()
+    scheduler = _scheduler(clock=clock)
+    scheduler.observe(429, {"x-ratelimit-reset-requests": "120ms", "x-ratelimit-reset-tokens": "200ms"})
+    assert scheduler.stats()["rate_limited_429"] == 1
+    assert asyncio.run(scheduler.acquire(10)) == pytest.approx(0.2)
+
+    # 보류가 max_wait보다 길면 max_wait만 기다리고 전송
+    capped = _scheduler(clock=clock, max_wait=0.05)
+    capped.observe(429, {"retry-after": "60"})
+    assert asyncio.run(capped.acquire(10)) == 0.05 and capped.stats()["capped"] == 1
+
+
+def test_openai_http_client_runs_scheduler_hooks():
+    scheduler = _scheduler()
+
+    def handler(request):
+        return httpx.Response(200, json={"choices": []}, headers={
+            "x-ratelimit-limit-tokens": "30000", "x-ratelimit-remaining-tokens": "29000",
+        })
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), event_hooks=scheduler.event_hooks()) as client:
+            await client.post(f"{OPENAI_BASE_URL}/chat/completions", content=_body())
+            await client.get(f"{OPENAI_BASE_URL}/models")
+
+    asyncio.run(scenario())
+    stats = scheduler.stats()
+    assert stats["scheduled"] == 1 and stats["tpm_limit"] == 30000
+
+    registry = LLMClientRegistry(max_connections=10, max_keepalive_connections=5, keepalive_expiry=5, http2=False)
+    assert openai_rate_scheduler.on_request in registry.http_client().event_hooks["request"]
+    assert registry.http_client("https://runpod.example/v1").event_hooks["request"] == []
+
+
+def test_prepaid_request_is_not_reserved_again():
+    scheduler = _scheduler()
+    statuses = iter([429, 200, 200])
+
+    def handler(request):
+        return httpx.Response(next(statuses), json={"choices": []})
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), event_hooks=scheduler.event_hooks()) as client:
+            await scheduler.prepay(500)
+            # 예약해 둔 첫 전송은 훅이 건너뛰고, 429 후 재전송은 다시 예약
+            await client.post(f"{OPENAI_BASE_URL}/chat/completions", content=_body())
+            await client.post(f"{OPENAI_BASE_URL}/chat/completions", content=_body())
+
+    asyncio.run(scenario())
+    stats = scheduler.stats()
+    assert stats["scheduled"] == 2 and stats["rate_limited_429"] == 1
+
+
+def test_openai_provider_prepays_from_prompt_not_body(monkeypatch):
+    scheduler = _scheduler(tpm=100000)
+    monkeypatch.setattr(openai_medical, "openai_rate_scheduler", scheduler)
+    provider = openai_medical.OpenAIMedicalInterpreter()
+
+    asyncio.run(provider.reserve_rate_budget(additional_info="가려움", image=True))
+    # 시스템 프롬프트 + 이미지 템플릿 + 입력 텍스트, 이미지 파트는 detail=low 고정 토큰, 출력 상한 포함
+    prompts = diagnosis_prompts
+    prompt = (
+        prompts.system_tokens(provider._get_system_prompt()) + prompts.system_tokens(prompts.image_template)
+        + prompt_token_counter.count("가려움")
+    )
+    expected = 3 + 2 * 3 + prompt + 85 + settings.MAX_TOKENS
+    assert scheduler.stats()["tpm_available"] == 100000 - expected and scheduler.stats()["scheduled"] == 1
+
+
+def test_rate_budget_is_taken_before_provider_slot(monkeypatch):
+    seen = []
+
+    class Budgeted(FakeProvider):
+        async def reserve_rate_budget(self, description=None, additional_info=None, image=False):
+            seen.append(limiter._get("runpod").in_flight)
+            self.events.append("budget")
+
+    limiter = ProviderConcurrencyLimiter({"runpod": 1}, queue_size=0, queue_timeout=1.0)
+    monkeypatch.setattr(langchain_module, "provider_limiter", limiter)
+    provider = install_provider(monkeypatch, Budgeted(), image=False)
+    monkeypatch.setattr(langchain_module.settings, "SKIN_DIAGNOSIS_PROVIDER", "runpod")
+
+    asyncio.run(langchain_service.diagnose_skin_lesion("갈색 반점 (요청 한도 예산)"))
+    # 한도 예산은 동시 호출 슬롯을 받기 전에 한 번만
+    assert provider.events == ["budget", "fake:start", "fake:done"]
+    assert seen == [0]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
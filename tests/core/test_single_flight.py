@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+동시 LLM 호출 합치기(single-flight) 테스트
+동일 입력 동시 요청의 프로바이더 호출 1회, 생성 메타데이터 공유, 취소 안전성, 예외 전파, 대기자 수 확인
+"""
+
+import asyncio
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+
+from app.core.single_flight import SingleFlight, llm_flights
+from app.services.langchain_service import langchain_service
+from app.services.refiner_service import refiner_service
+from tests.fake_providers import XML, FakeProvider, FakeRefiner, install_provider
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setattr(llm_flights, "enabled", True)
+    return install_provider(monkeypatch, FakeProvider(delay=0.05))
+
+
+def test_identical_concurrent_diagnoses_share_one_call(provider):
+    async def scenario():
+        return await asyncio.gather(
+            langchain_service.diagnose_skin_lesion("갈색 반점", additional_info="2주 전부터"),
+            langchain_service.diagnose_skin_lesion("  갈색   반점 ", additional_info="2주 전부터"),
+            langchain_service.diagnose_skin_lesion("붉은 결절"),
+        )
+
+    first, duplicate, other = asyncio.run(scenario())
+    assert provider.calls == 2
+    assert first["result"] == duplicate["result"] == other["result"] == XML
+    assert "coalesced" not in first["metadata"] and duplicate["metadata"]["coalesced"] is True
+    # 합류한 요청도 첫 요청의 생성 정보를 메타데이터로 받음
+    assert duplicate["metadata"]["generation"] == first["metadata"]["generation"]
+
+
+def test_image_diagnoses_coalesce_by_image(provider):
+    async def scenario():
+        return await asyncio.gather(*(
+            langchain_service.diagnose_skin_lesion_with_image("data:image/jpeg;base64,AAAA") for _ in range(3)
+        ))
+
+    results = asyncio.run(scenario())
+    assert provider.calls == 1 and all(result["result"] == XML for result in results)
+
+
+def test_waiter_cancellation_is_safe():
+    flights = SingleFlight()
+    provider = FakeProvider(delay=0.1)
+
+    async def scenario():
+        leader = asyncio.ensure_future(flights.do("key", lambda: provider.diagnose_text("갈색 반점")))
+        follower = asyncio.ensure_future(flights.do("key", lambda: provider.diagnose_text("갈색 반점")))
+        await asyncio.sleep(0.01)
+        assert flights.stats()["waiters"] == 2 and flights.stats()["in_flight"] == 1
+
+        # 첫 요청이 끊겨도 공유 호출은 계속되어 남은 대기자가 결과를 받음
+        leader.cancel()
+        result = await follower
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return result
+
+    assert asyncio.run(scenario()) == XML
+    assert provider.calls == 1 and provider.cancelled == 0
+    assert flights.stats()["in_flight"] == 0 and flights.stats()["coalesced"] == 1
+
+
+def test_last_waiter_cancellation_cancels_call():
+    flights = SingleFlight()
+    provider = FakeProvider(delay=1.0)
+
+    async def scenario():
+        waiters = [asyncio.ensure_future(flights.do("key", lambda: provider.diagnose_text("갈색 반점"))) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert provider.cancelled == 1
+    assert flights.stats() == {
+        "enabled": True, "in_flight": 0, "waiters": 0, "max_waiters": 0,
+        "leaders": 1, "coalesced": 1, "cancelled": 1,
+    }
+
+
+def test_errors_reach_all_waiters_and_are_not_kept():
+    flights = SingleFlight()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise TimeoutError("provider timeout")
+
+    async def scenario():
+        results = await asyncio.gather(*(flights.do("key", failing) for _ in range(3)), return_exceptions=True)
+        # 실패한 호출은 남지 않으므로 다음 요청(재시도)은 새로 호출
+        retried = await asyncio.gather(flights.do("key", failing), return_exceptions=True)
+        return results + retried
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, TimeoutError) for result in results)
+    assert len(calls) == 2
+
+
+def test_refiner_requests_coalesce(monkeypatch):
+    refiner = FakeRefiner("꿀팁: 손등 발진을 강조하세요.", delay=0.05)
+    monkeypatch.setattr(refiner_service, "provider", refiner)
+    monkeypatch.setattr(llm_flights, "enabled", True)
+
+    async def scenario():
+        return await asyncio.gather(*(refiner_service.refine("손등이 가렵고 빨개요") for _ in range(4)))
+
+    results = asyncio.run(scenario())
+    assert refiner.calls == 1 and {result["refined_text"] for result in results} == {"꿀팁: 손등 발진을 강조하세요."}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+업로드 검증 테스트
+매직 바이트 판별, 청크 읽기 크기 제한, 본문 크기 제한 미들웨어 확인
+"""
+
+import asyncio
+import io
+import sys
+import os
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import hashlib
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+from PIL import Image
+from starlette.datastructures import Headers
+
+from app.core.config import settings
+from app.core.image_utils import read_image_upload, sniff_image_type
+from app.core.upload_limit import UploadSizeLimitMiddleware
+
+
+def _image_bytes(fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (200, 150, 120)).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def _upload(data: bytes, content_type: str = "image/jpeg") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename="a", headers=Headers({"content-type": content_type}))
+
+
+def test_sniff_ignores_declared_type():
+    assert sniff_image_type(_image_bytes("JPEG")) == "image/jpeg"
+    assert sniff_image_type(_image_bytes("PNG")) == "image/png"
+    assert sniff_image_type(_image_bytes("WEBP")) == "image/webp"
+    assert sniff_image_type(b"<html>not an image</html>") is None
+
+
+def test_read_image_upload_hashes_and_detects():
+    data = _image_bytes("PNG")
+    buffer, digest, detected = asyncio.run(read_image_upload(_upload(data, "application/octet-stream")))
+    assert bytes(buffer) == data
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert detected == "image/png"
+
+
+def test_read_image_upload_rejects_bogus_and_oversized(monkeypatch):
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(read_image_upload(_upload(b"GIF89a" + b"\0" * 100)))
+    assert exc_info.value.status_code == 400
+
+    monkeypatch.setattr(settings, "IMAGE_MAX_UPLOAD_BYTES", 100 * 1024)
+    oversized = _image_bytes("JPEG") + b"\0" * (200 * 1024)
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(read_image_upload(_upload(oversized)))
+    assert exc_info.value.status_code == 413
+
+
+def _limited_app(limit: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_body_bytes=limit)
+
+    @app.post("/upload")
+    async def upload(image: UploadFile = File(...)):
+        return {"size": len(await image.read())}
+
+    return app
+
+
+def test_middleware_rejects_by_content_length_and_stream():
+    client = TestClient(_limited_app(10 * 1024))
+    small = client.post("/upload", files={"image": ("a.jpg", b"x" * 1024, "image/jpeg")})
+    assert small.status_code == 200
+
+    large = client.post("/upload", files={"image": ("a.jpg", b"x" * 50 * 1024, "image/jpeg")})
+    assert large.status_code == 413
+
+    def chunked_body():
+        yield b"--b\r\nContent-Disposition: form-data; name=\"image\"; filename=\"a.jpg\"\r\n\r\n"
+        for _ in range(20):
+            yield b"x" * 4096
+        yield b"\r\n--b--\r\n"
+
+    streamed = client.post(
+        "/upload",
+        content=chunked_body(),
+        headers={"content-type": "multipart/form-data; boundary=b"},
+    )
+    assert streamed.status_code == 413
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
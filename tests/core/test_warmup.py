@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+기동 워밍업 / 준비 상태 테스트
+로컬 스텁 서버로 커넥션 워밍업, 워밍업 전후 /readyz 상태 전환 확인
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.llm_clients import llm_client_registry
+from app.providers.runpod_medical import RunPodMedicalInterpreter
+from app.services.warmup_service import WarmupService, warmup_service
+
+
+@pytest.fixture
+def api_keys(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(settings, "RUNPOD_API_KEY", "rp-test")
+
+
+def test_connect_mode_opens_connection_per_base_url(monkeypatch, chat_stub, api_keys):
+    monkeypatch.setattr(settings, "RUNPOD_BASE_URL", chat_stub.url)
+    provider = RunPodMedicalInterpreter()
+    service = WarmupService(mode="connect", timeout=5)
+    monkeypatch.setattr(service, "_providers", lambda: {"skin_diagnosis_image": provider})
+    monkeypatch.setattr(service, "_chat_models", lambda providers: [provider.llm, provider.vision_llm])
+
+    async def scenario():
+        try:
+            return await service.run()
+        finally:
+            await llm_client_registry.aclose()
+
+    assert not service.ready
+    report = asyncio.run(scenario())
+    assert service.ready
+    assert chat_stub.paths == ["/v1/models"]
+    assert report["requests"][0]["ok"] and report["requests"][0]["status_code"] == 401
+    assert report["providers"] == {"skin_diagnosis_image": "RunPodMedicalInterpreter"}
+
+
+def test_failed_warmup_still_marks_ready(monkeypatch):
+    service = WarmupService(mode="connect", timeout=1)
+
+    def broken():
+        raise RuntimeError("provider init failed")
+
+    monkeypatch.setattr(service, "_providers", broken)
+    report = asyncio.run(service.run())
+    assert service.ready
+    assert report["error"] == "provider init failed"
+
+
+def test_readyz_reports_warmup_state(monkeypatch, api_keys):
+    from app.main import app
+
+    monkeypatch.setattr(warmup_service, "mode", "none")
+    monkeypatch.setattr(warmup_service, "ready", False)
+    client = TestClient(app)
+    assert client.get("/readyz").status_code == 503
+    assert client.get("/healthz").status_code == 200
+
+    with client:
+        deadline = time.monotonic() + 10
+        while not warmup_service.ready and time.monotonic() < deadline:
+            time.sleep(0.05)
+        response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+    assert response.json()["warmup"]["mode"] == "none"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
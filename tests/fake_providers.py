@@ -0,0 +1,118 @@
+"""
+테스트 공용 가짜 진단/정제 프로바이더와 서비스 교체 헬퍼 (외부 호출 없음)
+"""
+
+import asyncio
+from typing import List, Optional
+
+from app.core.generation_governor import generation_governor
+from app.providers.base import MedicalInterpretationProvider, TextRefineProvider
+
+XML = '<root><label id_code="7" score="81.2">지루각화증</label><summary>갈색 구진</summary></root>'
+
+
+def tokens(text: str, size: int = 4) -> List[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class FakeProvider(MedicalInterpretationProvider):
+    """응답 지연/응답 내용(예외면 발생)을 정하고 호출 과정을 기록하는 가짜 진단 프로바이더
+
+    - calls: 호출 횟수, inputs: 호출 인자, cancelled: 응답 전 취소된 횟수
+    - events: "{name}:start/done/cancelled" 순서 기록 (log를 넘기면 여러 프로바이더가 한 목록에 기록)
+    - 스트리밍은 reply를 token_size 글자씩 token_delay 간격으로 전송
+    """
+
+    def __init__(
+        self,
+        reply=XML,
+        delay: float = 0.0,
+        name: str = "fake",
+        log: Optional[List[str]] = None,
+        token_size: int = 4,
+        token_delay: float = 0.0,
+    ):
+        self.reply = reply
+        self.delay = delay
+        self.name = name
+        self.events = log if log is not None else []
+        self.token_size = token_size
+        self.token_delay = token_delay
+        self.calls = 0
+        self.inputs = []
+        self.cancelled = 0
+
+    async def _answer(self, *args) -> str:
+        self.calls += 1
+        self.inputs.append(args)
+        self.events.append(f"{self.name}:start")
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            self.events.append(f"{self.name}:cancelled")
+            raise
+        self.events.append(f"{self.name}:done")
+        if isinstance(self.reply, Exception):
+            raise self.reply
+        generation_governor.finish(self.reply, "stop", 42)
+        return self.reply
+
+    async def diagnose_text(self, description, additional_info=None):
+        return await self._answer(description, additional_info)
+
+    async def diagnose_image(self, image_base64, additional_info=None, questionnaire_data=None):
+        return await self._answer(image_base64, additional_info)
+
+    async def _stream(self, *args):
+        self.calls += 1
+        self.inputs.append(args)
+        self.events.append(f"{self.name}:start")
+        if isinstance(self.reply, Exception):
+            raise self.reply
+        for token in tokens(self.reply, self.token_size):
+            await asyncio.sleep(self.token_delay)
+            yield token
+        self.events.append(f"{self.name}:done")
+
+    def stream_text(self, description, additional_info=None):
+        return self._stream(description, additional_info)
+
+    def stream_image(self, image_base64, additional_info=None, questionnaire_data=None):
+        return self._stream(image_base64, additional_info)
+
+
+class FakeRefiner(TextRefineProvider):
+    """고정 문장을 delay초 뒤 반환하는 가짜 발화 정제 프로바이더"""
+
+    llm = None
+
+    def __init__(self, reply: str = "손등 소양감", delay: float = 0.0):
+        self.reply = reply
+        self.delay = delay
+        self.calls = 0
+
+    async def refine(self, text, language=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.reply
+
+
+def install_provider(monkeypatch, provider, text: bool = True, image: bool = True):
+    """langchain_service의 텍스트/이미지 진단 프로바이더를 provider로 교체"""
+    from app.services.langchain_service import langchain_service
+
+    if text:
+        monkeypatch.setattr(langchain_service, "_skin_diagnosis_provider", provider)
+    if image:
+        monkeypatch.setattr(langchain_service, "_skin_diagnosis_image_provider", provider)
+    return provider
+
+
+def silence_followups(monkeypatch):
+    """진단 저장 후 병원 검색/챗봇 알림 후속 작업 끄기 (API 테스트용)"""
+    from app.services.chatbot_service import chatbot_service
+    from app.services.hospital_service import hospital_service
+
+    monkeypatch.setattr(hospital_service, "search_hospitals_fire_and_forget", lambda **kwargs: None)
+    monkeypatch.setattr(chatbot_service, "notify_diagnosis_fire_and_forget", lambda *args: None)
@@ -0,0 +1,18 @@
+"""
+테스트/벤치마크 공용 합성 이미지
+"""
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+
+def lesion_image(center, radius, seed=0) -> Image.Image:
+    """피부 배경 위 병변과 비슷한 합성 이미지 (1152x864)"""
+    cx, cy = center
+    image = Image.new("RGB", (1152, 864), (224, 172, 150))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((cx - radius, cy - radius * 0.8, cx + radius, cy + radius * 0.8), fill=(110, 60, 45))
+    draw.ellipse((cx - radius * 0.4, cy - radius * 0.3, cx + radius * 0.2, cy + radius * 0.4), fill=(70, 35, 30))
+    image = image.filter(ImageFilter.GaussianBlur(6))
+    noise = np.random.default_rng(seed).normal(0, 5, (864, 1152, 3))
+    return Image.fromarray(np.clip(np.asarray(image) + noise, 0, 255).astype(np.uint8))